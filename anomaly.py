@@ -0,0 +1,139 @@
+# anomaly.py
+# -*- coding: utf-8 -*-
+"""
+Laufende Auffälligkeitserkennung für pH und EC.
+
+Je Pflanze und Feld wird ein kleiner Zustand fortgeschrieben: Anzahl, Mittelwert und
+Quadratsumme nach Welford sowie ein exponentiell gleitender Mittelwert (EWMA). Jede neue
+Messung kostet damit O(1), die Historie wird nie erneut gelesen. Gemeldet wird, wenn eine
+Messung
+    - mehr als z_limit Standardabweichungen vom bisherigen Mittel der Pflanze abweicht,
+    - weiter als die Toleranz vom Sollwert der Planwoche entfernt liegt oder
+    - den EWMA über die halbe Toleranz vom Soll wegzieht (schleichende Drift; nur beim Überschreiten).
+
+Die Zustände und Meldungen speichert db_connector in derselben Transaktion wie die Messung;
+rebuild_anomaly_state baut beide in einem Durchlauf über das Protokoll neu auf.
+Schwellen über [anomaly] in db_config.ini.
+"""
+import math
+
+# Überwachte Protokollspalten und ihre Toleranz zum Soll (Voreinstellung)
+FIELDS = {"ph_wert_ziel": 0.5, "ec_wert": 0.4}
+
+DEFAULT_Z_LIMIT = 3.0
+# Erst ab so vielen Messungen einer Pflanze wird gegen ihr eigenes Mittel geprüft
+DEFAULT_MIN_COUNT = 10
+DEFAULT_EWMA_ALPHA = 0.3
+# Anteil der Toleranz, ab dem der EWMA als Drift gilt
+DRIFT_FACTOR = 0.5
+
+GRUND_AUSREISSER = "Ausreißer"
+GRUND_SOLL = "Soll-Abweichung"
+GRUND_DRIFT = "Drift"
+
+
+class RunningStats:
+    """Welford-Mittel/-Varianz und EWMA eines Messwerts; `letzte_id` = zuletzt eingerechnete Zeile."""
+
+    __slots__ = ("anzahl", "mittel", "m2", "ewma", "letzte_id")
+
+    def __init__(self, anzahl=0, mittel=0.0, m2=0.0, ewma=None, letzte_id=0):
+        self.anzahl = anzahl
+        self.mittel = mittel
+        self.m2 = m2
+        self.ewma = ewma
+        self.letzte_id = letzte_id
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.anzahl - 1)) if self.anzahl > 1 else 0.0
+
+    def add(self, wert, alpha):
+        self.anzahl += 1
+        delta = wert - self.mittel
+        self.mittel += delta / self.anzahl
+        self.m2 += delta * (wert - self.mittel)
+        self.ewma = wert if self.ewma is None else alpha * wert + (1 - alpha) * self.ewma
+
+    def as_row(self):
+        return (self.anzahl, self.mittel, self.m2, self.ewma, self.letzte_id)
+
+
+class AnomalyDetector:
+    """Schwellen und Prüfung; der Zustand liegt beim Aufrufer als {(pflanze, feld): RunningStats}."""
+
+    def __init__(self):
+        self.enabled = True
+        self.z_limit = DEFAULT_Z_LIMIT
+        self.min_count = DEFAULT_MIN_COUNT
+        self.alpha = DEFAULT_EWMA_ALPHA
+        self.tolerances = dict(FIELDS)
+
+    def configure(self, config):
+        """Übernimmt [anomaly] aus der Konfiguration (enabled, z_limit, min_count, ewma_alpha, *_tolerance)."""
+        self.enabled = str(config.get('anomaly_enabled', '1')).strip().lower() in ('1', 'true', 'yes', 'ja')
+        self.z_limit = float(config.get('anomaly_z_limit') or DEFAULT_Z_LIMIT)
+        self.min_count = max(2, int(config.get('anomaly_min_count') or DEFAULT_MIN_COUNT))
+        self.alpha = min(1.0, max(0.01, float(config.get('anomaly_ewma_alpha') or DEFAULT_EWMA_ALPHA)))
+        self.tolerances = {
+            "ph_wert_ziel": float(config.get('anomaly_ph_tolerance') or FIELDS["ph_wert_ziel"]),
+            "ec_wert": float(config.get('anomaly_ec_tolerance') or FIELDS["ec_wert"]),
+        }
+
+    def observe(self, zustand, record_id, plant_name, werte, soll):
+        """
+        Rechnet eine Messung in `zustand` ein. werte/soll = {feld: Wert oder None}.
+        Gibt die Meldungen [(protokoll_id, feld, wert, soll, z, grund), ...] zurück.
+        """
+        meldungen = []
+        for feld, toleranz in self.tolerances.items():
+            wert = werte.get(feld)
+            if wert is None:
+                continue
+            wert = float(wert)
+            stats = zustand.get((plant_name, feld))
+            if stats is None:
+                stats = zustand[(plant_name, feld)] = RunningStats()
+            if record_id <= stats.letzte_id:
+                continue
+            ziel = soll.get(feld)
+            ziel = None if ziel is None else float(ziel)
+
+            gruende = []
+            z = None
+            if stats.anzahl >= self.min_count and stats.std > 0:
+                z = (wert - stats.mittel) / stats.std
+                if abs(z) > self.z_limit:
+                    gruende.append(GRUND_AUSREISSER)
+            if ziel is not None and abs(wert - ziel) > toleranz:
+                gruende.append(GRUND_SOLL)
+            ewma_vorher = stats.ewma
+            stats.add(wert, self.alpha)
+            stats.letzte_id = record_id
+            if ziel is not None:
+                grenze = toleranz * DRIFT_FACTOR
+                if abs(stats.ewma - ziel) > grenze and ewma_vorher is not None and abs(ewma_vorher - ziel) <= grenze:
+                    gruende.append(GRUND_DRIFT)
+            if gruende:
+                meldungen.append((record_id, feld, wert, ziel, z, ", ".join(gruende)))
+        return meldungen
+
+
+# Gemeinsame Instanz für den ganzen Prozess
+ANOMALY_DETECTOR = AnomalyDetector()
+
+
+def configure(config):
+    ANOMALY_DETECTOR.configure(config)
+
+
+def describe(meldung):
+    """Kurztext einer Meldung für Statuszeilen und Dialoge."""
+    _, feld, wert, soll, z, grund = meldung
+    name = "pH" if feld == "ph_wert_ziel" else "EC"
+    text = f"{name} {wert:g}: {grund}"
+    if soll is not None:
+        text += f" (Soll {soll:g})"
+    if z is not None and GRUND_AUSREISSER in grund:
+        text += f", z = {z:+.1f}"
+    return text
@@ -0,0 +1,301 @@
+# benchmark_db.py
+# -*- coding: utf-8 -*-
+"""
+Wiederholbarer Benchmark der db_connector-Operationen.
+
+Legt eine eigene Benchmark-Datenbank an (MySQL: `<database>_bench`, mit --sqlite eine
+temporäre SQLite-Datei als eingebetteter Ersatz), füllt sie über synthetic_data mit
+realistischen Grows und misst jede Operation mehrfach. Festgehalten werden p50/p95/p99,
+Mittelwert und Durchsatz (Aufrufe/s und Zeilen/s). Mit --baseline wird gegen einen
+früheren Lauf verglichen; ein p95 über Toleranz gilt als Regression (Exit-Code 2).
+
+Aufruf:
+    python benchmark_db.py --rows 10000 --output bench_10k.json
+    python benchmark_db.py --rows 1000000 --baseline bench_1m.json --output bench_1m_neu.json
+    python benchmark_db.py --sqlite --rows 10000 --skip fetch_all_data
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from config_manager import load_config
+from db_connector import (
+    close_all_pools,
+    get_db_connection,
+    initialize_database,
+    run_with_connection,
+    insert_pflanzen_data,
+    insert_pflanzen_data_many,
+    insert_pflanzen_data_idempotent,
+    save_pflanzen_plan,
+    get_pflanzen_plan,
+    fetch_all_data,
+    fetch_data_page,
+    delete_data_by_id,
+    save_pflanzen_plan_many,
+)
+from db_dialect import BACKEND_MYSQL, BACKEND_SQLITE, backend_of
+from db_migrations import PROTOKOLL_TABLE_NAME
+from synthetic_data import generate_dataset, plan_row
+
+# Regression, wenn p95 um mehr als diesen Anteil und mindestens REGRESSION_MIN_MS langsamer ist
+DEFAULT_THRESHOLD = 0.2
+REGRESSION_MIN_MS = 0.5
+
+# Zeilen je Journal-Block (wie [journal] batch)
+JOURNAL_BATCH = 200
+
+# Pflanzenname der während des Benchmarks eingefügten (und wieder gelöschten) Zeilen
+BENCH_NAME = "Benchmark"
+
+
+def _percentile(sortiert, p):
+    """Perzentil nach dem Nearest-Rank-Verfahren."""
+    index = max(0, min(len(sortiert) - 1, int(round(p / 100 * len(sortiert) + 0.5)) - 1))
+    return sortiert[index]
+
+
+def _stats(zeiten_ms, zeilen):
+    sortiert = sorted(zeiten_ms)
+    gesamt_s = sum(zeiten_ms) / 1000
+    return {
+        "aufrufe": len(zeiten_ms),
+        "p50_ms": round(_percentile(sortiert, 50), 3),
+        "p95_ms": round(_percentile(sortiert, 95), 3),
+        "p99_ms": round(_percentile(sortiert, 99), 3),
+        "mittel_ms": round(sum(zeiten_ms) / len(zeiten_ms), 3),
+        "aufrufe_pro_s": round(len(zeiten_ms) / max(gesamt_s, 1e-9), 1),
+        "zeilen_pro_s": round(zeilen / max(gesamt_s, 1e-9), 1),
+    }
+
+
+def _check(result):
+    """Die db_connector-Funktionen melden Fehler als (False/None, Meldung)."""
+    ok, info = result
+    if ok is False or ok is None:
+        raise RuntimeError(info)
+    return ok, info
+
+
+class _Context:
+    """Gemeinsamer Zustand der Operationen (eingefügte IDs, Plan-Schlüssel)."""
+
+    def __init__(self, config, plaene):
+        self.config = config
+        self.plaene = plaene
+        self.neue_ids = None
+
+    def benchmark_ids(self):
+        """IDs der von insert_pflanzen_data angelegten Zeilen (einmalig abgefragt)."""
+        if self.neue_ids is None:
+            cnx, cursor = get_db_connection(self.config)
+            if cnx is None:
+                raise RuntimeError(cursor)
+            try:
+                cursor.execute(f"SELECT id FROM {PROTOKOLL_TABLE_NAME} WHERE pflanzen_name = %s", (BENCH_NAME,))
+                self.neue_ids = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+                cnx.close()
+        return self.neue_ids
+
+
+def _op_insert(ctx, i):
+    zeile = (BENCH_NAME, 1 + i % 20) + plan_row(BENCH_NAME, 1, 4)[2:] + (datetime.now(),)
+    _check(run_with_connection(ctx.config, insert_pflanzen_data, zeile))
+    return 1
+
+
+def _op_insert_journal_batch(ctx, i):
+    zeile = ("Benchmark Journal", 1) + plan_row(BENCH_NAME, 1, 4)[2:] + (datetime.now(),)
+    eintraege = [(uuid.uuid4().hex, zeile) for _ in range(JOURNAL_BATCH)]
+    _check(run_with_connection(ctx.config, insert_pflanzen_data_idempotent, eintraege))
+    return JOURNAL_BATCH
+
+
+def _op_save_plan(ctx, i):
+    plan = ctx.plaene[i % len(ctx.plaene)]
+    _check(run_with_connection(ctx.config, save_pflanzen_plan, plan))
+    return 1
+
+
+def _op_get_plan(ctx, i):
+    plan, _ = get_pflanzen_plan(ctx.config, *ctx.plaene[(i * 7919) % len(ctx.plaene)][:2])
+    if plan is None:
+        raise RuntimeError("Plan nicht gefunden")
+    return 1
+
+
+def _op_fetch_page(ctx, i):
+    data, _ = _check(fetch_data_page(ctx.config))
+    return len(data)
+
+
+def _op_fetch_all(ctx, i):
+    data, _ = _check(fetch_all_data(ctx.config))
+    return len(data)
+
+
+def _op_delete(ctx, i):
+    # Löscht die zuvor von insert_pflanzen_data angelegten Zeilen, der Bestand bleibt gleich groß
+    ids = ctx.benchmark_ids()
+    if not ids:
+        raise RuntimeError("Keine Zeilen zum Löschen (insert_pflanzen_data übersprungen?)")
+    _check(delete_data_by_id(ctx.config, ids.pop()))
+    return 1
+
+
+# Name -> (Funktion, Wiederholungen relativ zu --repeat); fetch_all_data lädt die ganze Tabelle
+OPERATIONS = {
+    "insert_pflanzen_data": (_op_insert, 1.0),
+    "insert_journal_block": (_op_insert_journal_batch, 0.2),
+    "save_pflanzen_plan": (_op_save_plan, 1.0),
+    "get_pflanzen_plan": (_op_get_plan, 1.0),
+    "fetch_data_page": (_op_fetch_page, 1.0),
+    "fetch_all_data": (_op_fetch_all, 0.05),
+    "delete_data_by_id": (_op_delete, 1.0),
+}
+
+
+def _fill(config, rows, seed):
+    plaene, messungen = generate_dataset(rows, seed)
+    cnx, result = get_db_connection(config)
+    if cnx is None:
+        raise RuntimeError(result)
+    try:
+        _check(insert_pflanzen_data_many(cnx, messungen, batch_size=2000))
+        _check(save_pflanzen_plan_many(cnx, plaene))
+    finally:
+        cnx.close()
+    return plaene
+
+
+def _bench_config(config, sqlite):
+    if sqlite:
+        verzeichnis = tempfile.mkdtemp(prefix="pflanzen_bench_")
+        return {**config, "storage_backend": BACKEND_SQLITE,
+                "storage_sqlite_path": os.path.join(verzeichnis, "bench.db")}, verzeichnis
+    if backend_of(config) == BACKEND_SQLITE:
+        raise RuntimeError("Für SQLite bitte --sqlite verwenden (die Produktivdatei bleibt unberührt).")
+    return {**config, "database": f"{config['database']}_bench"}, None
+
+
+def _drop(config, verzeichnis):
+    close_all_pools()
+    if verzeichnis:
+        shutil.rmtree(verzeichnis, ignore_errors=True)
+        return
+    cnx, cursor = get_db_connection(config, with_db=False)
+    if cnx is not None:
+        cursor.execute(f"DROP DATABASE IF EXISTS {config['database']}")
+        cursor.close()
+        cnx.close()
+
+
+def run_benchmark(config, rows, repeat, sqlite=False, skip=(), seed=42, keep=False):
+    bench, verzeichnis = _bench_config(config, sqlite)
+    if not sqlite:
+        _drop(bench, None)
+    try:
+        _check(initialize_database(bench))
+        print(f"📥 Erzeuge {rows} synthetische Messungen ({backend_of(bench)}) ...")
+        start = time.perf_counter()
+        plaene = _fill(bench, rows, seed)
+        fuell_s = time.perf_counter() - start
+        print(f"   {rows} Zeilen und {len(plaene)} Pläne in {fuell_s:.1f} s")
+
+        ctx = _Context(bench, plaene)
+        ergebnisse = {}
+        for name, (op, anteil) in OPERATIONS.items():
+            if name in skip:
+                continue
+            anzahl = max(3, int(repeat * anteil))
+            op(ctx, 0)  # Aufwärmen: Verbindung, Statement-Cache, Seiten im Puffer
+            zeiten, zeilen = [], 0
+            for i in range(1, anzahl + 1):
+                t0 = time.perf_counter()
+                zeilen += op(ctx, i)
+                zeiten.append((time.perf_counter() - t0) * 1000)
+            ergebnisse[name] = _stats(zeiten, zeilen)
+            print(f"   ⏱️ {name:<24} p50 {ergebnisse[name]['p50_ms']:>9.2f} ms  p95 {ergebnisse[name]['p95_ms']:>9.2f} ms")
+    finally:
+        if keep:
+            print(f"ℹ️ Benchmark-Daten bleiben erhalten: {bench.get('storage_sqlite_path') if sqlite else bench['database']}")
+            close_all_pools()
+        else:
+            _drop(bench, verzeichnis)
+
+    return {
+        "zeitpunkt": datetime.now().isoformat(timespec="seconds"),
+        "backend": BACKEND_SQLITE if sqlite else BACKEND_MYSQL,
+        "zeilen": rows,
+        "wiederholungen": repeat,
+        "seed": seed,
+        "fuellen_s": round(fuell_s, 1),
+        "system": {"python": platform.python_version(), "plattform": platform.platform()},
+        "operationen": ergebnisse,
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Vergleicht p95 je Operation mit einem früheren Lauf. Gibt die Liste der Regressionen zurück."""
+    if (baseline.get("backend"), baseline.get("zeilen")) != (report["backend"], report["zeilen"]):
+        print(f"⚠️ Baseline mit {baseline.get('backend')}/{baseline.get('zeilen')} Zeilen ist nur bedingt vergleichbar.")
+    regressionen = []
+    print(f"\n{'Operation':<26}{'p95 alt':>11}{'p95 neu':>11}{'Änderung':>10}")
+    for name, neu in report["operationen"].items():
+        alt = baseline.get("operationen", {}).get(name)
+        if alt is None:
+            print(f"{name:<26}{'-':>11}{neu['p95_ms']:>11.2f}{'neu':>10}")
+            continue
+        aenderung = neu["p95_ms"] / max(alt["p95_ms"], 1e-9) - 1
+        regression = aenderung > threshold and neu["p95_ms"] - alt["p95_ms"] > REGRESSION_MIN_MS
+        if regression:
+            regressionen.append(name)
+        print(f"{name:<26}{alt['p95_ms']:>11.2f}{neu['p95_ms']:>11.2f}{aenderung:>+9.0%} {'❌' if regression else ''}")
+    report["regressionen"] = regressionen
+    return regressionen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latenz und Durchsatz der db_connector-Operationen messen.")
+    parser.add_argument("--rows", type=int, default=10000, help="Anzahl synthetischer Messungen (z.B. 10000, 1000000)")
+    parser.add_argument("--repeat", type=int, default=200, help="Aufrufe je Operation")
+    parser.add_argument("--sqlite", action="store_true", help="Eingebettete SQLite-Datei statt MySQL-Server")
+    parser.add_argument("--skip", action="append", default=[], choices=list(OPERATIONS), help="Operation auslassen")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_db.json", help="Ergebnisdatei (JSON)")
+    parser.add_argument("--baseline", help="Früheres Ergebnis zum Vergleich")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Erlaubte p95-Verschlechterung (0.2 = 20 %%)")
+    parser.add_argument("--keep", action="store_true", help="Benchmark-Datenbank nicht löschen")
+    args = parser.parse_args(argv)
+
+    try:
+        report = run_benchmark(load_config(), max(100, args.rows), max(3, args.repeat), sqlite=args.sqlite,
+                               skip=set(args.skip), seed=args.seed, keep=args.keep)
+    except Exception as e:
+        print(f"❌ Benchmark fehlgeschlagen: {e}")
+        return 1
+
+    regressionen = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressionen = compare(report, json.load(f), args.threshold)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Ergebnis gespeichert: {args.output}")
+    if regressionen:
+        print(f"❌ Regression bei: {', '.join(regressionen)}")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
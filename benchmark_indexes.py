@@ -0,0 +1,191 @@
+# benchmark_indexes.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark der Protokoll-Indizes (Migration 004).
+
+Legt eine eigene Datenbank `<database>_bench` mit dem vollständigen Schema an, füllt sie
+mit synthetischen Messwerten und misst die typischen Lese-Abfragen zweimal: ohne
+Sekundärindizes auf dem Protokoll und nach Anwendung der Index-Migration samt der
+Indizes späterer Migrationen. Für jede Abfrage werden der EXPLAIN-Plan
+(Zugriffsart, genutzter Index, geschätzte Zeilen, Extra) sowie Median und p95 der
+Laufzeit festgehalten und als JSON gespeichert.
+
+Aufruf:
+    python benchmark_indexes.py [--rows 200000] [--repeat 20] [--output benchmark_indexes.json] [--keep]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from config_manager import load_config
+from db_connector import get_db_connection, insert_pflanzen_data_many, PLANNING_FIELDS
+from db_migrations import (
+    MIGRATIONS, PROTOKOLL_TABLE_NAME, PROTOKOLL_VIEW_NAME, ZEITREIHE_INDEX, LOESCHUNG_INDEX,
+    _add_index_if_missing, _drop_index_if_exists
+)
+
+PFLANZEN = [f"Sorte {i:02d}" for i in range(1, 21)]
+WOCHEN = 16
+PHASEN = ["Anzucht", "Wachstum", "Blüte", "Spülen"]
+
+# Migration, deren Indizes gemessen werden
+INDEX_MIGRATION = 4
+# Sekundärindizes des Protokolls aus späteren Migrationen; für die Messung "ohne" werden sie entfernt
+WEITERE_INDIZES = [ZEITREIHE_INDEX, LOESCHUNG_INDEX]
+
+# Abfragen wie in der Datenansicht (db_connector.fetch_data_page), dem Soll/Ist-Vergleich
+# und dem gefilterten Export. %(key_datum)s/%(key_id)s ist ein Seitenschlüssel aus der Tabellenmitte.
+QUERIES = {
+    "erste_seite": (
+        f"SELECT * FROM {PROTOKOLL_VIEW_NAME} ORDER BY erstellungsdatum DESC, id DESC LIMIT 200"
+    ),
+    "keyset_seite_mitte": (
+        f"SELECT * FROM {PROTOKOLL_VIEW_NAME} "
+        "WHERE erstellungsdatum < %(key_datum)s OR (erstellungsdatum = %(key_datum)s AND id < %(key_id)s) "
+        "ORDER BY erstellungsdatum DESC, id DESC LIMIT 200"
+    ),
+    "pflanze_woche": (
+        f"SELECT * FROM {PROTOKOLL_VIEW_NAME} WHERE pflanzen_name = %(name)s AND woche = %(woche)s "
+        "ORDER BY erstellungsdatum DESC"
+    ),
+    "export_pflanze_wochenbereich": (
+        f"SELECT * FROM {PROTOKOLL_VIEW_NAME} WHERE pflanzen_name = %(name)s AND woche BETWEEN 4 AND 8 "
+        "ORDER BY erstellungsdatum DESC, id DESC"
+    ),
+}
+
+
+def _synthetic_rows(count, seed=42):
+    """Zufällige, aber reproduzierbare Messwerte über das letzte Jahr verteilt."""
+    rnd = random.Random(seed)
+    jetzt = datetime.now().replace(microsecond=0)
+    for _ in range(count):
+        woche = rnd.randint(1, WOCHEN)
+        werte = [PHASEN[min(3, (woche - 1) // 4)], rnd.choice([18, 12])]
+        werte += [round(rnd.uniform(0, 4), 2) for _ in PLANNING_FIELDS[2:]]
+        yield tuple([rnd.choice(PFLANZEN), woche] + werte + [jetzt - timedelta(seconds=rnd.randint(0, 365 * 86400))])
+
+
+def _explain(cursor, sql, params):
+    cursor.execute("EXPLAIN " + sql, params)
+    spalten = [c[0] for c in cursor.description]
+    plan = [dict(zip(spalten, row)) for row in cursor.fetchall()]
+    return [{k: p.get(k) for k in ("type", "key", "rows", "Extra")} for p in plan]
+
+
+def _measure(cursor, params, repeat):
+    ergebnis = {}
+    for name, sql in QUERIES.items():
+        zeiten = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            zeiten.append((time.perf_counter() - start) * 1000)
+        zeiten.sort()
+        ergebnis[name] = {
+            "plan": _explain(cursor, sql, params),
+            "median_ms": round(statistics.median(zeiten), 3),
+            "p95_ms": round(zeiten[min(len(zeiten) - 1, int(len(zeiten) * 0.95))], 3),
+        }
+    return ergebnis
+
+
+def run_benchmark(config, rows, repeat, keep=False):
+    bench_db = f"{config['database']}_bench"
+    cnx, cursor = get_db_connection(config, with_db=False)
+    if cnx is None:
+        raise RuntimeError(cursor)
+    migrationen = {version: schritt for version, _, schritt in MIGRATIONS}
+    try:
+        cursor.execute(f"DROP DATABASE IF EXISTS {bench_db}")
+        cursor.execute(f"CREATE DATABASE {bench_db}")
+        cursor.execute(f"USE {bench_db}")
+        # Schema wie in der App (jedes Einfügen schreibt z.B. auch die Auffälligkeitszustände),
+        # nur ohne Sekundärindizes auf dem Protokoll
+        for version, schritt in migrationen.items():
+            if version != INDEX_MIGRATION:
+                schritt(cursor)
+        for index, _ in WEITERE_INDIZES:
+            _drop_index_if_exists(cursor, PROTOKOLL_TABLE_NAME, index)
+
+        print(f"📥 Erzeuge {rows} synthetische Zeilen in {bench_db} ...")
+        start = time.perf_counter()
+        ok, result = insert_pflanzen_data_many(cnx, _synthetic_rows(rows))
+        if not ok:
+            raise RuntimeError(result)
+        print(f"   {result} Zeilen in {time.perf_counter() - start:.1f} s")
+
+        cursor.execute(f"ANALYZE TABLE {PROTOKOLL_TABLE_NAME}")
+        cursor.fetchall()
+        cursor.execute(f"SELECT erstellungsdatum, id FROM {PROTOKOLL_TABLE_NAME} "
+                       f"ORDER BY erstellungsdatum DESC, id DESC LIMIT 1 OFFSET %s", (rows // 2,))
+        key_datum, key_id = cursor.fetchone()
+        params = {"key_datum": key_datum, "key_id": key_id, "name": PFLANZEN[0], "woche": 6}
+
+        print("⏱️ Messung ohne Sekundärindizes ...")
+        ohne = _measure(cursor, params, repeat)
+
+        start = time.perf_counter()
+        migrationen[INDEX_MIGRATION](cursor)
+        for index, columns in WEITERE_INDIZES:
+            _add_index_if_missing(cursor, PROTOKOLL_TABLE_NAME, index, columns)
+        index_dauer = (time.perf_counter() - start) * 1000
+        cursor.execute(f"ANALYZE TABLE {PROTOKOLL_TABLE_NAME}")
+        cursor.fetchall()
+
+        print("⏱️ Messung mit Indizes ...")
+        mit = _measure(cursor, params, repeat)
+    finally:
+        if not keep:
+            cursor.execute(f"DROP DATABASE IF EXISTS {bench_db}")
+        cursor.close()
+        cnx.close()
+
+    return {
+        "zeitpunkt": datetime.now().isoformat(timespec="seconds"),
+        "zeilen": rows,
+        "wiederholungen": repeat,
+        "indexaufbau_ms": round(index_dauer, 1),
+        "ohne_indizes": ohne,
+        "mit_indizes": mit,
+    }
+
+
+def _print_report(report):
+    print(f"\nIndexaufbau: {report['indexaufbau_ms']:.0f} ms für {report['zeilen']} Zeilen\n")
+    print(f"{'Abfrage':<30}{'ohne (ms)':>12}{'mit (ms)':>12}{'Faktor':>9}  Plan ohne -> mit")
+    for name in QUERIES:
+        ohne, mit = report["ohne_indizes"][name], report["mit_indizes"][name]
+        faktor = ohne["median_ms"] / max(mit["median_ms"], 1e-6)
+        plan_ohne = f"{ohne['plan'][0]['type']}/{ohne['plan'][0]['key']}"
+        plan_mit = f"{mit['plan'][0]['type']}/{mit['plan'][0]['key']}"
+        print(f"{name:<30}{ohne['median_ms']:>12.2f}{mit['median_ms']:>12.2f}{faktor:>8.1f}x  {plan_ohne} -> {plan_mit}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN-Pläne und Latenzen mit/ohne Protokoll-Indizes messen.")
+    parser.add_argument("--rows", type=int, default=200000, help="Anzahl synthetischer Zeilen")
+    parser.add_argument("--repeat", type=int, default=20, help="Wiederholungen je Abfrage")
+    parser.add_argument("--output", default="benchmark_indexes.json", help="Ergebnisdatei (JSON)")
+    parser.add_argument("--keep", action="store_true", help="Benchmark-Datenbank nicht löschen")
+    args = parser.parse_args(argv)
+
+    try:
+        report = run_benchmark(load_config(), max(1000, args.rows), max(1, args.repeat), keep=args.keep)
+    except Exception as e:
+        print(f"❌ Benchmark fehlgeschlagen: {e}")
+        return 1
+    _print_report(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\n✅ Ergebnis gespeichert: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
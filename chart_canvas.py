@@ -0,0 +1,259 @@
+# chart_canvas.py
+# -*- coding: utf-8 -*-
+"""
+Verlaufsdiagramm auf einem tk.Canvas.
+
+Je Feld ein Bereich untereinander mit gemeinsamer Zeitachse: Ist-Mittelwerte als Linie,
+Minimum/Maximum als Band, Soll als gestrichelte Stufenlinie. Jede Reihe ist ein einziges
+Canvas-Objekt, ein Neuzeichnen kostet daher nur wenige Millisekunden.
+
+Mausrad zoomt um den Mauszeiger, Ziehen verschiebt, Doppelklick zeigt wieder den ganzen
+Verlauf. Während der Bewegung werden die vorhandenen Punkte sofort neu gezeichnet;
+nach einer kurzen Ruhepause fordert on_view_change(von, bis, breite) die Daten genau
+für den sichtbaren Bereich neu an.
+"""
+import math
+from datetime import datetime, timedelta
+
+# Ränder des Zeichenbereichs (px)
+MARGIN_LEFT = 60
+MARGIN_RIGHT = 15
+MARGIN_TOP = 20
+MARGIN_BOTTOM = 25
+PANEL_GAP = 25
+
+# Ruhepause (ms) nach Zoom/Verschieben, bevor der sichtbare Bereich neu geladen wird
+RELOAD_DELAY_MS = 200
+ZOOM_FACTOR = 1.25
+# Kleinste darstellbare Zeitspanne (s)
+MIN_SPAN_S = 3600
+
+IST_COLOR = "#1565C0"
+BAND_COLOR = "#BBDEFB"
+SOLL_COLOR = "#E65100"
+GRID_COLOR = "#E0E0E0"
+TEXT_COLOR = "#424242"
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _nice_step(span, count):
+    """Runde Schrittweite (1, 2, 5 · 10^n) für etwa `count` Achsenmarken."""
+    roh = span / max(1, count)
+    basis = 10 ** math.floor(math.log10(roh))
+    for faktor in (1, 2, 5):
+        if basis * faktor >= roh:
+            return basis * faktor
+    return basis * 10
+
+
+class TimeSeriesChart:
+    """Zeichnet die Ergebnisse von timeseries.load_series; `labels` = {feld: Beschriftung}."""
+
+    def __init__(self, canvas, on_view_change=None, labels=None):
+        self.canvas = canvas
+        self.on_view_change = on_view_change
+        self.labels = labels or {}
+        self.data = None
+        self.view = None
+        self.full = None
+        self._drag = None
+        self._reload_id = None
+        self._message = ""
+        # Wertebereich je Feld aus dem letzten Zeichnen
+        self._axis = {}
+
+        canvas.bind("<Configure>", self._on_configure)
+        canvas.bind("<MouseWheel>", lambda e: self._zoom(e.x, 1 / ZOOM_FACTOR if e.delta > 0 else ZOOM_FACTOR))
+        canvas.bind("<Button-4>", lambda e: self._zoom(e.x, 1 / ZOOM_FACTOR))
+        canvas.bind("<Button-5>", lambda e: self._zoom(e.x, ZOOM_FACTOR))
+        canvas.bind("<ButtonPress-1>", self._on_press)
+        canvas.bind("<B1-Motion>", self._on_drag)
+        canvas.bind("<Double-Button-1>", lambda e: self.reset_view())
+
+    # --- Öffentliche Schnittstelle ----------------------------------------------
+
+    def plot_width(self):
+        """Breite des Zeichenbereichs in Pixeln (= sinnvolle Punktzahl je Reihe)."""
+        return max(50, self.canvas.winfo_width() - MARGIN_LEFT - MARGIN_RIGHT)
+
+    def set_data(self, data, reset_view=False):
+        """Übernimmt ein Ergebnis von load_series; reset_view macht dessen Zeitraum zur Gesamtansicht."""
+        self.data = data
+        if reset_view or self.view is None:
+            self.view = self.full = (data['von'], data['bis'])
+        self.redraw()
+
+    def clear(self, message=""):
+        self.data = None
+        self._message = message
+        self.redraw()
+
+    def reset_view(self):
+        if self.full is not None and self.view != self.full:
+            self.view = self.full
+            self.redraw()
+            self._schedule_reload()
+
+    # --- Zeichnen -------------------------------------------------------------
+
+    def redraw(self):
+        c = self.canvas
+        c.delete("all")
+        breite, hoehe = c.winfo_width(), c.winfo_height()
+        if not self.data or not self.data['serien']:
+            c.create_text(breite / 2, hoehe / 2, text=self._message, fill=TEXT_COLOR)
+            return
+        felder = list(self.data['serien'])
+        links, rechts = MARGIN_LEFT, breite - MARGIN_RIGHT
+        panel_h = (hoehe - MARGIN_TOP - MARGIN_BOTTOM - PANEL_GAP * (len(felder) - 1)) / len(felder)
+        if panel_h < 20 or rechts - links < 20:
+            return
+        v0, v1 = self.view
+        skala_x = (rechts - links) / (v1 - v0)
+
+        def x_of(t):
+            return links + (t - v0) * skala_x
+
+        for n, feld in enumerate(felder):
+            oben = MARGIN_TOP + n * (panel_h + PANEL_GAP)
+            self._draw_panel(feld, self.data['serien'][feld], x_of, links, rechts, oben, oben + panel_h)
+        # Linien außerhalb des sichtbaren Zeitraums abdecken (Canvas kennt kein Clipping)
+        c.create_rectangle(0, 0, links, hoehe, fill=c["bg"], outline="")
+        c.create_rectangle(rechts, 0, breite, hoehe, fill=c["bg"], outline="")
+        for n, feld in enumerate(felder):
+            oben = MARGIN_TOP + n * (panel_h + PANEL_GAP)
+            self._draw_y_axis(feld, links, oben, oben + panel_h)
+        self._draw_time_axis(x_of, links, rechts, hoehe - MARGIN_BOTTOM)
+
+    def _draw_panel(self, feld, serie, x_of, links, rechts, oben, unten):
+        c = self.canvas
+        v0, v1 = self.view
+        sichtbar = [i for i, x in enumerate(serie['x']) if v0 <= x <= v1]
+        werte = [serie['min'][i] for i in sichtbar] + [serie['max'][i] for i in sichtbar]
+        werte += [y for x, y in serie['soll'] if v0 <= x <= v1]
+        if not werte:
+            werte = serie['y'] + [y for _, y in serie['soll']] or [0.0]
+        lo, hi = min(werte), max(werte)
+        rand = (hi - lo) * 0.08 or max(abs(hi) * 0.1, 0.5)
+        lo, hi = lo - rand, hi + rand
+        skala_y = (unten - oben) / (hi - lo)
+
+        def y_of(v):
+            return unten - (v - lo) * skala_y
+
+        self._axis[feld] = (lo, hi)
+        for wert in self._ticks(lo, hi, 4):
+            y = y_of(wert)
+            c.create_line(links, y, rechts, y, fill=GRID_COLOR)
+        c.create_rectangle(links, oben, rechts, unten, outline=GRID_COLOR)
+
+        xs = [x_of(x) for x in serie['x']]
+        if len(xs) >= 2:
+            band = [v for x, y in zip(xs, serie['max']) for v in (x, y_of(y))]
+            band += [v for x, y in zip(reversed(xs), reversed(serie['min'])) for v in (x, y_of(y))]
+            c.create_polygon(band, fill=BAND_COLOR, outline="")
+        soll = serie['soll']
+        if soll:
+            stufen = []
+            for i, (x, y) in enumerate(soll):
+                if i:
+                    stufen += [x_of(x), y_of(soll[i - 1][1])]
+                stufen += [x_of(x), y_of(y)]
+            if len(stufen) >= 4:
+                c.create_line(stufen, fill=SOLL_COLOR, width=2, dash=(6, 3))
+        if len(xs) >= 2:
+            c.create_line([v for x, y in zip(xs, serie['y']) for v in (x, y_of(y))], fill=IST_COLOR, width=2)
+        elif xs:
+            x, y = xs[0], y_of(serie['y'][0])
+            c.create_oval(x - 3, y - 3, x + 3, y + 3, fill=IST_COLOR, outline="")
+
+    def _draw_y_axis(self, feld, links, oben, unten):
+        c = self.canvas
+        lo, hi = self._axis[feld]
+        skala_y = (unten - oben) / (hi - lo)
+        for wert in self._ticks(lo, hi, 4):
+            c.create_text(links - 5, unten - (wert - lo) * skala_y, text=f"{wert:g}", anchor="e",
+                          fill=TEXT_COLOR, font=("Arial", 8))
+        c.create_text(links, oben - 3, text=f"{self.labels.get(feld, feld)}   — Ist (Band: Min/Max)   - - Soll",
+                      anchor="sw", fill=TEXT_COLOR, font=("Arial", 9, "bold"))
+
+    def _draw_time_axis(self, x_of, links, rechts, y):
+        v0, v1 = self.view
+        spanne = v1 - v0
+        tag = 86400
+        if spanne > 3 * tag:
+            schritt = max(tag, _nice_step(spanne / tag, 6) * tag)
+            fmt = "%d.%m.%y"
+        else:
+            schritt = _nice_step(spanne / 3600, 6) * 3600
+            fmt = "%d.%m. %H:%M"
+        t = (v0 // schritt + 1) * schritt
+        while t < v1:
+            x = x_of(t)
+            if links <= x <= rechts:
+                self.canvas.create_line(x, y, x, y + 4, fill=TEXT_COLOR)
+                self.canvas.create_text(x, y + 6, text=(EPOCH + timedelta(seconds=t)).strftime(fmt), anchor="n",
+                                        fill=TEXT_COLOR, font=("Arial", 8))
+            t += schritt
+
+    @staticmethod
+    def _ticks(lo, hi, count):
+        schritt = _nice_step(hi - lo, count)
+        wert = (lo // schritt + 1) * schritt
+        ticks = []
+        while wert < hi:
+            ticks.append(round(wert, 10))
+            wert += schritt
+        return ticks
+
+    # --- Zoom und Verschieben ---------------------------------------------------
+
+    def _time_at(self, x):
+        v0, v1 = self.view
+        anteil = (x - MARGIN_LEFT) / self.plot_width()
+        return v0 + min(1.0, max(0.0, anteil)) * (v1 - v0)
+
+    def _zoom(self, x, faktor):
+        if self.view is None:
+            return
+        v0, v1 = self.view
+        mitte = self._time_at(x)
+        spanne = (v1 - v0) * faktor
+        if self.full is not None:
+            spanne = min(spanne, (self.full[1] - self.full[0]) * 2)
+        spanne = max(spanne, MIN_SPAN_S)
+        anteil = (mitte - v0) / (v1 - v0)
+        self.view = (mitte - anteil * spanne, mitte + (1 - anteil) * spanne)
+        self.redraw()
+        self._schedule_reload()
+
+    def _on_press(self, event):
+        self._drag = (event.x, self.view)
+
+    def _on_drag(self, event):
+        if self._drag is None or self.view is None:
+            return
+        start_x, (v0, v1) = self._drag
+        verschiebung = (start_x - event.x) * (v1 - v0) / self.plot_width()
+        self.view = (v0 + verschiebung, v1 + verschiebung)
+        self.redraw()
+        self._schedule_reload()
+
+    def _on_configure(self, event):
+        self.redraw()
+        # Andere Breite = andere Punktzahl
+        if self.data is not None:
+            self._schedule_reload()
+
+    def _schedule_reload(self):
+        if self.on_view_change is None:
+            return
+        if self._reload_id is not None:
+            self.canvas.after_cancel(self._reload_id)
+        self._reload_id = self.canvas.after(RELOAD_DELAY_MS, self._reload)
+
+    def _reload(self):
+        self._reload_id = None
+        if self.view is not None:
+            self.on_view_change(self.view[0], self.view[1], self.plot_width())
@@ -4,24 +4,96 @@ from configparser import ConfigParser
 
 CONFIG_FILE = 'db_config.ini'
 
+# Standardwerte je Abschnitt der db_config.ini.
+# Der Abschnitt [mysql] wird direkt (ohne Präfix) in das Konfigurations-Dict übernommen,
+# alle anderen Abschnitte mit Präfix, z.B. [pool] size -> 'pool_size'.
+DEFAULTS = {
+    'mysql': {
+        'host': 'localhost',
+        'user': 'root',
+        'password': '',
+        'database': 'pflanzendatenbank'
+    },
+    'pool': {
+        'size': '5',        # Maximale Anzahl gleichzeitig geöffneter Verbindungen
+        'timeout': '10',    # Sekunden, die auf eine freie Verbindung gewartet wird
+        'recycle': '1800'   # Sekunden, nach denen eine ungenutzte Verbindung neu aufgebaut wird
+    },
+    'storage': {
+        'backend': 'mysql',             # 'mysql' (Server) oder 'sqlite' (lokale Datei, ohne Server)
+        'sqlite_path': 'pflanzen.db'    # Datenbankdatei für das SQLite-Backend
+    },
+    'journal': {
+        'path': 'messungen_journal.db',  # Lokales Journal für noch nicht übertragene Messungen
+        'batch': '200'                   # Messungen je Übertragungs-Transaktion
+    },
+    'diagnostics': {
+        'enabled': '0',         # Laufzeitmessung für den Diagnostik-Tab (1 = an)
+        'log_path': '',         # Optional: jede Messung in diese (rotierende) Logdatei schreiben
+        'log_max_kb': '1024',
+        'log_backups': '3'
+    },
+    'anomaly': {
+        'enabled': '1',         # pH/EC-Auffälligkeiten bei jeder neuen Messung erkennen (1 = an)
+        'z_limit': '3.0',       # Abweichung vom bisherigen Mittel der Pflanze in Standardabweichungen
+        'min_count': '10',      # Messungen je Pflanze, ab denen gegen ihr Mittel geprüft wird
+        'ewma_alpha': '0.3',    # Gewicht der neuesten Messung im gleitenden Mittel (Drift)
+        'ph_tolerance': '0.5',  # Zulässige Abweichung vom Soll der Planwoche
+        'ec_tolerance': '0.4'
+    },
+    'trash': {
+        'keep_days': '7'        # Tage, die gelöschte Messungen wiederherstellbar bleiben, danach endgültig gelöscht
+    },
+    'archive': {
+        'after_days': '180'     # Tage ohne neue Messung, nach denen ein Grow ins Archiv wandert (0 = nie)
+    },
+    'connection': {
+        'connect_timeout': '3',     # Sekunden für den Verbindungsaufbau zum MySQL-Server
+        'read_timeout': '30',       # Sekunden, die höchstens auf eine Antwort des Servers gewartet wird
+        'failure_threshold': '3',   # Verbindungsfehler in Folge, ab denen Zugriffe sofort abgelehnt werden
+        'probe_min': '2',           # Sekunden bis zum ersten Prüfversuch, verdoppelt sich bis probe_max
+        'probe_max': '60'
+    }
+}
+
 def load_config():
-    """Lädt die MySQL-Einstellungen aus der Konfigurationsdatei."""
+    """Lädt die MySQL-Einstellungen (und Zusatzabschnitte wie [pool]) aus der Konfigurationsdatei."""
     config = ConfigParser()
     # Versucht, die Datei db_config.ini zu lesen
     config.read(CONFIG_FILE, encoding='utf-8') # Explizit UTF-8 beim Lesen
     if 'mysql' not in config:
         # Standardwerte, falls die Datei fehlt
-        return {
-            'host': 'localhost',
-            'user': 'root',
-            'password': '',
-            'database': 'pflanzendatenbank'
-        }
-    return dict(config['mysql'])
+        settings = dict(DEFAULTS['mysql'])
+    else:
+        settings = dict(config['mysql'])
+
+    for section, defaults in DEFAULTS.items():
+        if section == 'mysql':
+            continue
+        values = dict(defaults)
+        if section in config:
+            values.update(config[section])
+        for key, value in values.items():
+            settings[f"{section}_{key}"] = value
+    return settings
 
 def save_config(settings):
-    """Speichert die MySQL-Einstellungen in der Konfigurationsdatei."""
+    """Speichert die MySQL-Einstellungen in der Konfigurationsdatei.
+    Schlüssel mit Abschnittspräfix (z.B. 'pool_size') landen im passenden Abschnitt,
+    bereits vorhandene Abschnitte der Datei bleiben erhalten."""
     config = ConfigParser()
-    config['mysql'] = settings
+    config.read(CONFIG_FILE, encoding='utf-8')
+
+    mysql_settings = {}
+    for key, value in settings.items():
+        section, _, option = key.partition('_')
+        if section in DEFAULTS and section != 'mysql' and option:
+            if section not in config:
+                config[section] = {}
+            config[section][option] = str(value)
+        else:
+            mysql_settings[key] = str(value)
+    config['mysql'] = mysql_settings
+
     with open(CONFIG_FILE, 'w', encoding='utf-8') as configfile: # Explizit UTF-8 beim Schreiben
-        config.write(configfile)
\ No newline at end of file
+        config.write(configfile)
@@ -0,0 +1,245 @@
+# data_export.py
+# -*- coding: utf-8 -*-
+"""
+Streaming-Export des Pflanzenprotokolls direkt aus der Datenbank.
+
+Die Zeilen werden über einen ungepufferten Cursor in Blöcken (fetchmany) gelesen und
+sofort in die Zieldatei geschrieben; weder die GUI noch dieser Prozess halten die
+ganze Tabelle im Speicher. Unterstützt werden:
+    csv      ';'-getrennt wie bisher (wieder importierbar über data_importer)
+    csv.gz   dasselbe, gzip-komprimiert
+    parquet  spaltenorientiert über pyarrow (die Parquet-Engine von pandas)
+
+Aufruf von der Kommandozeile:
+    python data_export.py export.csv.gz [--pflanze Tomate] [--woche-von 3] [--datum-bis 2024-06-30] [--mit-archiv]
+"""
+import argparse
+import csv
+import gzip
+import os
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from config_manager import load_config
+from db_connector import (get_db_connection, build_protokoll_filter, protokoll_quelle, PROTOKOLL_TABLE_NAME,
+                          ARCHIV_TABLE_NAME, NICHT_GELOESCHT)
+
+FORMATS = ("csv", "csv.gz", "parquet")
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class ExportCancelled(Exception):
+    """Der Export wurde über das Abbruch-Event beendet."""
+
+
+def detect_format(path):
+    """Ermittelt das Exportformat anhand der Dateiendung."""
+    lower = path.lower()
+    if lower.endswith(".parquet"):
+        return "parquet"
+    if lower.endswith(".gz"):
+        return "csv.gz"
+    return "csv"
+
+
+class _CsvWriter:
+    def __init__(self, path, columns, compress):
+        opener = gzip.open if compress else open
+        self._handle = opener(path, mode='wt', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._handle, delimiter=';')
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._handle.close()
+
+
+class _ParquetWriter:
+    """
+    Schreibt jeden Block als eigene Row-Group. Das Schema folgt aus den MySQL-Spaltentypen;
+    SQLite meldet keine Typen, dort wird es aus den Werten des ersten Blocks abgeleitet.
+    """
+
+    def __init__(self, path, columns, description, sample):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet-Export benötigt pyarrow (pip install pyarrow).")
+        self._pa = pa
+        self.columns = columns
+        self.schema = pa.schema([
+            (col[0], self._arrow_type(col[1], [row[i] for row in sample]))
+            for i, col in enumerate(description)
+        ])
+        self._writer = pq.ParquetWriter(path, self.schema, compression="snappy")
+
+    def _arrow_type(self, type_code, values):
+        pa = self._pa
+        if type_code is None:
+            return self._arrow_type_from_values(values)
+        from mysql.connector import FieldType
+        if type_code in (FieldType.TINY, FieldType.SHORT, FieldType.LONG, FieldType.LONGLONG, FieldType.INT24):
+            return pa.int64()
+        if type_code in (FieldType.FLOAT, FieldType.DOUBLE, FieldType.DECIMAL, FieldType.NEWDECIMAL):
+            return pa.float64()
+        if type_code in (FieldType.DATETIME, FieldType.TIMESTAMP, FieldType.DATE):
+            return pa.timestamp('s')
+        return pa.string()
+
+    def _arrow_type_from_values(self, values):
+        pa = self._pa
+        probe = next((v for v in values if v is not None), None)
+        if isinstance(probe, bool) or probe is None or isinstance(probe, str):
+            return pa.string()
+        if isinstance(probe, int):
+            return pa.int64()
+        if isinstance(probe, (float, Decimal)):
+            return pa.float64()
+        if isinstance(probe, (datetime, date)):
+            return pa.timestamp('s')
+        return pa.string()
+
+    def write(self, rows):
+        spalten = {col: [row[i] for row in rows] for i, col in enumerate(self.columns)}
+        for field in self.schema:
+            # DECIMAL kommt als Decimal zurück, Arrow erwartet für float64 echte floats
+            if self._pa.types.is_floating(field.type):
+                spalten[field.name] = [None if v is None else float(v) for v in spalten[field.name]]
+        self._writer.write_table(self._pa.Table.from_pydict(spalten, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def _count_rows(cursor, where, params, archiv=False):
+    # Wie die Ansicht ohne Zeilen im Papierkorb
+    aktiv = f"{where} AND {NICHT_GELOESCHT}" if where else f" WHERE {NICHT_GELOESCHT}"
+    cursor.execute(f"SELECT COUNT(*) FROM {PROTOKOLL_TABLE_NAME}{aktiv}", params)
+    anzahl = cursor.fetchone()[0]
+    if archiv:
+        cursor.execute(f"SELECT COUNT(*) FROM {ARCHIV_TABLE_NAME}{where}", params)
+        anzahl += cursor.fetchone()[0]
+    return anzahl
+
+
+def export_protokoll(config, path, fmt=None, filters=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None,
+                     cancel_event=None):
+    """
+    Exportiert das (gefilterte) Protokoll nach `path`.
+    `filters` wie bei db_connector.build_protokoll_filter; filters['archiv'] exportiert das Archiv mit.
+    `progress` wird nach jedem Block mit (exportiert, gesamt) aufgerufen – aus dem Worker-Thread.
+    Ist `cancel_event` (threading.Event) gesetzt, wird nach dem aktuellen Block abgebrochen
+    und die unvollständige Datei gelöscht.
+    Gibt (True, Zusammenfassung) oder (False, Fehlermeldung) zurück.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        return False, f"❌ Unbekanntes Exportformat: {fmt}"
+    bedingung, params = build_protokoll_filter(filters)
+    where = f" WHERE {bedingung}" if bedingung else ""
+
+    cnx, cursor = get_db_connection(config)
+    if cnx is None:
+        return False, cursor
+
+    writer = None
+    exportiert = 0
+    sauber = False
+    start = time.perf_counter()
+    try:
+        gesamt = _count_rows(cursor, where, params, bool((filters or {}).get('archiv')))
+        cursor.close()
+        if gesamt == 0:
+            sauber = True
+            return False, "Keine Daten für die gewählten Filter."
+
+        # Ungepuffert: der Server liefert die Zeilen blockweise, statt das Ergebnis vorab zu laden
+        cursor = cnx.cursor(buffered=False)
+        cursor.execute(
+            f"SELECT * FROM {protokoll_quelle(filters)}{where} ORDER BY erstellungsdatum DESC, id DESC", params
+        )
+        columns = [col[0] for col in cursor.description]
+
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExportCancelled()
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if writer is None:
+                # Erst nach dem ersten Block anlegen, damit Parquet die Typen daraus ableiten kann
+                if fmt == "parquet":
+                    writer = _ParquetWriter(path, columns, cursor.description, rows)
+                else:
+                    writer = _CsvWriter(path, columns, compress=(fmt == "csv.gz"))
+            writer.write(rows)
+            exportiert += len(rows)
+            if progress:
+                progress(exportiert, gesamt)
+        sauber = True
+    except ExportCancelled:
+        return False, f"Export abgebrochen nach {exportiert} Zeilen."
+    except Exception as e:
+        return False, f"❌ Export fehlgeschlagen nach {exportiert} Zeilen: {e}"
+    finally:
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+            if not sauber and os.path.exists(path):
+                os.remove(path)
+        if sauber:
+            cursor.close()
+            cnx.close()
+        else:
+            # Ein abgebrochener Streaming-Read hinterlässt ungelesene Zeilen auf der Verbindung
+            cnx.discard()
+
+    dauer = max(time.perf_counter() - start, 1e-9)
+    return True, (f"✅ {exportiert} Zeilen exportiert ({exportiert / dauer:.0f} Zeilen/s, {dauer:.1f} s).\n"
+                  f"Datei: {path}")
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pflanzenprotokoll als CSV, CSV.gz oder Parquet exportieren.")
+    parser.add_argument("datei", help="Zieldatei (.csv, .csv.gz oder .parquet)")
+    parser.add_argument("--format", choices=FORMATS, help="Exportformat (Standard: anhand der Endung)")
+    parser.add_argument("--pflanze", help="Nur diese Pflanze")
+    parser.add_argument("--woche-von", type=int)
+    parser.add_argument("--woche-bis", type=int)
+    parser.add_argument("--datum-von", type=_parse_date, help="JJJJ-MM-TT")
+    parser.add_argument("--datum-bis", type=_parse_date, help="JJJJ-MM-TT (inklusive)")
+    parser.add_argument("--mit-archiv", action="store_true", help="Archivierte Grows mit exportieren")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Zeilen pro Block")
+    args = parser.parse_args(argv)
+
+    filters = {
+        'pflanzen_name': args.pflanze,
+        'woche_von': args.woche_von,
+        'woche_bis': args.woche_bis,
+        'datum_von': args.datum_von,
+        'datum_bis': args.datum_bis,
+        'archiv': args.mit_archiv,
+    }
+
+    def _progress(exportiert, gesamt):
+        print(f"📤 {exportiert}/{gesamt} Zeilen exportiert")
+
+    ok, msg = export_protokoll(load_config(), args.datei, fmt=args.format, filters=filters,
+                               chunk_size=max(1, args.chunk_size), progress=_progress)
+    print(msg)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
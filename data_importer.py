@@ -0,0 +1,269 @@
+# data_importer.py
+# -*- coding: utf-8 -*-
+"""
+Streaming-Import historischer Ist-Datensätze.
+
+Unterstützt die ';'-getrennten CSV-Dateien aus dem CSV-Export der GUI sowie
+JSON Lines (ein JSON-Objekt pro Zeile). Die Datei wird zeilenweise gelesen und
+in Batches über insert_pflanzen_data_many geschrieben, sodass auch sehr große
+Dateien nie vollständig im Speicher liegen. Spalten weiterer Produkte aus dem
+Nährstoffkatalog der Zieldatenbank werden ins Langformat der Dosierung übernommen. Ungültige Zeilen landen mit Grund
+in einer Reject-Datei neben der Quelldatei.
+
+Aufruf von der Kommandozeile:
+    python data_importer.py messwerte.csv [--batch-size 1000] [--format jsonl]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from config_manager import load_config
+from db_connector import (
+    fetch_naehrstoffe,
+    get_db_connection,
+    insert_pflanzen_data,
+    insert_pflanzen_data_many,
+    parse_erstellungsdatum,
+    PROTOKOLL_INSERT_COLUMNS,
+    DEFAULT_BATCH_SIZE
+)
+
+REQUIRED_COLUMNS = ("pflanzen_name", "woche")
+# Spalten aus dem Export, die beim Import bewusst verworfen werden (neue IDs vergibt die DB)
+IGNORED_COLUMNS = ("id",)
+KNOWN_COLUMNS = set(PROTOKOLL_INSERT_COLUMNS) | set(IGNORED_COLUMNS)
+
+INT_COLUMNS = ("woche", "lichtzyklus_h")
+TEXT_COLUMNS = ("pflanzen_name", "phase")
+EMPTY_VALUES = ("", "None", "NULL", "null")
+
+# Alle wie viele Zeilen ein Fortschritt gemeldet wird
+PROGRESS_EVERY = 10000
+
+
+class RejectedRow(ValueError):
+    """Eine Zeile konnte nicht übernommen werden."""
+
+
+def detect_format(path):
+    """Ermittelt das Dateiformat anhand der Endung ('csv' oder 'jsonl')."""
+    ext = os.path.splitext(path)[1].lower()
+    return "jsonl" if ext in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+def zusatz_spalten(katalog):
+    """{kuerzel: naehrstoff_id} der Katalogprodukte, die keine feste Spalte von PROTOKOLL_INSERT_COLUMNS sind."""
+    return {kuerzel: nid for nid, kuerzel, _, _ in katalog if kuerzel not in PROTOKOLL_INSERT_COLUMNS}
+
+
+def validate_columns(columns, zusatz=None):
+    """
+    Prüft Spaltennamen gegen das Schema und die Zusatzprodukte `zusatz` (wie zusatz_spalten).
+    Gibt eine Fehlermeldung oder None zurück.
+    """
+    zusatz = zusatz or {}
+    unknown = [c for c in columns if c not in KNOWN_COLUMNS and c not in zusatz]
+    if unknown:
+        return (f"Unbekannte Spalten: {', '.join(unknown)} (erlaubt: {', '.join([*PROTOKOLL_INSERT_COLUMNS, *zusatz])}; "
+                f"Produkte ggf. zuerst im Nährstoffkatalog anlegen)")
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        return f"Pflichtspalten fehlen: {', '.join(missing)}"
+    return None
+
+
+def _iter_csv(handle, zusatz):
+    reader = csv.DictReader(handle, delimiter=';')
+    fehler = validate_columns(reader.fieldnames or [], zusatz)
+    if fehler:
+        raise ValueError(fehler)
+    # Zeile 1 ist die Kopfzeile
+    for zeile, row in enumerate(reader, start=2):
+        yield zeile, row
+
+
+def _iter_jsonl(handle, zusatz):
+    for zeile, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield zeile, RejectedRow(f"Ungültiges JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield zeile, RejectedRow("Zeile ist kein JSON-Objekt")
+            continue
+        fehler = validate_columns(list(row), zusatz)
+        yield zeile, (RejectedRow(fehler) if fehler else row)
+
+
+def _parse_date(value):
+    try:
+        return parse_erstellungsdatum(value)
+    except ValueError:
+        raise RejectedRow(f"Ungültiges Datum: {value!r}")
+
+
+def convert_row(row, zusatz=None):
+    """
+    Wandelt eine Eingabezeile (Dict) in ein Tupel in PROTOKOLL_INSERT_COLUMNS-Reihenfolge um.
+    Mengen der Zusatzprodukte `zusatz` (wie zusatz_spalten) werden als ((naehrstoff_id, menge), ...)
+    angehängt, wie es insert_pflanzen_data(_many) erwartet.
+    """
+    werte = []
+    for col in PROTOKOLL_INSERT_COLUMNS:
+        raw = row.get(col)
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw is None or raw in EMPTY_VALUES:
+            if col in REQUIRED_COLUMNS:
+                raise RejectedRow(f"Pflichtfeld '{col}' ist leer")
+            # Fehlendes Datum wie in der GUI: heute
+            werte.append(parse_erstellungsdatum(None) if col == "erstellungsdatum" else None)
+            continue
+        try:
+            if col in TEXT_COLUMNS:
+                raw = str(raw)
+                if len(raw) > 50:
+                    raise RejectedRow(f"'{col}' ist länger als 50 Zeichen")
+                werte.append(raw)
+            elif col in INT_COLUMNS:
+                werte.append(int(float(str(raw).replace(',', '.'))))
+            elif col == "erstellungsdatum":
+                werte.append(_parse_date(str(raw)))
+            else:
+                werte.append(float(str(raw).replace(',', '.')))
+        except (TypeError, ValueError) as e:
+            if isinstance(e, RejectedRow):
+                raise
+            raise RejectedRow(f"Ungültiger Wert für '{col}': {raw!r}")
+    mengen = []
+    for col, nid in (zusatz or {}).items():
+        raw = row.get(col)
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw is None or raw in EMPTY_VALUES:
+            continue
+        try:
+            mengen.append((nid, float(str(raw).replace(',', '.'))))
+        except ValueError:
+            raise RejectedRow(f"Ungültiger Wert für '{col}': {raw!r}")
+    return tuple(werte) + (tuple(mengen),) if mengen else tuple(werte)
+
+
+class _RejectWriter:
+    """Schreibt abgelehnte Zeilen erst dann in eine Datei, wenn es tatsächlich welche gibt."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._handle = None
+        self._writer = None
+
+    def write(self, zeile, grund, row):
+        if self._handle is None:
+            self._handle = open(self.path, mode='w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._handle, delimiter=';')
+            self._writer.writerow(["zeile", "grund", "daten"])
+        daten = row if isinstance(row, str) else json.dumps(row, ensure_ascii=False, default=str)
+        self._writer.writerow([zeile, grund, daten])
+        self.count += 1
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+
+
+def _insert_batch(cnx, batch, batch_size, rejects):
+    """Schreibt einen Batch; schlägt er fehl, werden die Zeilen einzeln versucht, um Ausreißer zu finden."""
+    ok, result = insert_pflanzen_data_many(cnx, [werte for _, werte, _ in batch], batch_size)
+    if ok:
+        return result
+    eingefuegt = 0
+    for zeile, werte, row in batch:
+        suc, msg = insert_pflanzen_data(cnx, werte)
+        if suc:
+            eingefuegt += 1
+        else:
+            rejects.write(zeile, msg, row)
+    return eingefuegt
+
+
+def import_file(config, path, batch_size=DEFAULT_BATCH_SIZE, fmt=None, reject_path=None, progress=None):
+    """
+    Importiert eine CSV- oder JSONL-Datei zeilenweise in das Protokoll.
+    `progress` wird optional mit (gelesene_zeilen, eingefuegt, abgelehnt, zeilen_pro_s) aufgerufen.
+    Gibt (True, Zusammenfassung) oder (False, Fehlermeldung) zurück.
+    """
+    fmt = fmt or detect_format(path)
+    reject_path = reject_path or f"{os.path.splitext(path)[0]}.rejects.csv"
+
+    katalog, fehler = fetch_naehrstoffe(config)
+    if katalog is None:
+        return False, fehler
+    zusatz = zusatz_spalten(katalog)
+    cnx, result = get_db_connection(config)
+    if cnx is None:
+        return False, result
+
+    rejects = _RejectWriter(reject_path)
+    gelesen = eingefuegt = 0
+    batch = []
+    start = time.perf_counter()
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            rows = _iter_csv(handle, zusatz) if fmt == "csv" else _iter_jsonl(handle, zusatz)
+            for zeile, row in rows:
+                gelesen += 1
+                if isinstance(row, RejectedRow):
+                    rejects.write(zeile, str(row), "")
+                    continue
+                try:
+                    batch.append((zeile, convert_row(row, zusatz), row))
+                except RejectedRow as e:
+                    rejects.write(zeile, str(e), row)
+
+                if len(batch) >= batch_size:
+                    eingefuegt += _insert_batch(cnx, batch, batch_size, rejects)
+                    batch = []
+                if progress and gelesen % PROGRESS_EVERY == 0:
+                    progress(gelesen, eingefuegt, rejects.count, gelesen / max(time.perf_counter() - start, 1e-9))
+            if batch:
+                eingefuegt += _insert_batch(cnx, batch, batch_size, rejects)
+    except (OSError, ValueError) as e:
+        return False, f"❌ Import abgebrochen nach {eingefuegt} Zeilen: {e}"
+    finally:
+        rejects.close()
+        cnx.close()
+
+    dauer = max(time.perf_counter() - start, 1e-9)
+    msg = (f"✅ {eingefuegt} Zeilen importiert, {rejects.count} abgelehnt "
+           f"({gelesen / dauer:.0f} Zeilen/s, {dauer:.1f} s).")
+    if rejects.count:
+        msg += f"\nAbgelehnte Zeilen: {reject_path}"
+    return True, msg
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ist-Datensätze aus CSV/JSONL importieren.")
+    parser.add_argument("datei", help="CSV-Datei (';'-getrennt) oder JSON-Lines-Datei")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Dateiformat (Standard: anhand der Endung)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Zeilen pro Transaktion")
+    parser.add_argument("--rejects", help="Pfad der Reject-Datei (Standard: <datei>.rejects.csv)")
+    args = parser.parse_args(argv)
+
+    def _progress(gelesen, eingefuegt, abgelehnt, rate):
+        print(f"📥 {gelesen} gelesen, {eingefuegt} importiert, {abgelehnt} abgelehnt ({rate:.0f} Zeilen/s)")
+
+    ok, msg = import_file(load_config(), args.datei, batch_size=max(1, args.batch_size), fmt=args.format,
+                          reject_path=args.rejects, progress=_progress)
+    print(msg)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,174 +1,830 @@
 # db_connector.py
 # -*- coding: utf-8 -*-
-import mysql.connector
-from mysql.connector import errorcode
+import queue
+import threading
+import time
+from datetime import date, datetime, timedelta
 
-PROTOKOLL_TABLE_NAME = 'pflanzenprotokoll'
-PLANUNG_TABLE_NAME = 'pflanzenplanung' 
+import sqlite_backend
+from db_dialect import mysql, DB_ERRORS, DATA_ERRORS, BACKEND_MYSQL, BACKEND_SQLITE, backend_of, sqlite_path, error_message
+from instrumentation import timed
+from plan_cache import PLAN_CACHE, PLAN_INDEX
+from anomaly import ANOMALY_DETECTOR, FIELDS as ANOMALY_FIELDS, RunningStats, describe as describe_anomaly
+from db_migrations import (
+    PROTOKOLL_TABLE_NAME, PLANUNG_TABLE_NAME, CHANGE_LOG_TABLE_NAME, IDEMPOTENZ_TABLE_NAME,
+    NAEHRSTOFF_TABLE_NAME, PROTOKOLL_DOSIERUNG_TABLE_NAME, PLANUNG_DOSIERUNG_TABLE_NAME, NACHLAUF_TABLE_NAME,
+    PROTOKOLL_VIEW_NAME, PLANUNG_VIEW_NAME, NAEHRSTOFF_KATALOG, NACHLAUF_DOSIERUNG, KUERZEL_MUSTER,
+    ANOMALIE_ZUSTAND_TABLE_NAME, ANOMALIE_TABLE_NAME, NACHLAUF_ANOMALIE, LOESCHUNG_TABLE_NAME,
+    ARCHIV_TABLE_NAME, ARCHIV_VIEW_NAME, GESAMT_VIEW_NAME, ARCHIV_COLUMNS,
+    run_migrations, create_views, nachlauf_stand
+)
 
+if mysql is not None:
+    from mysql.connector import errorcode
+    from mysql.connector.constants import DEFAULT_CONFIGURATION
+    from mysql.connector.errors import PoolError
+    # read_timeout/write_timeout kennt der Treiber erst in neueren Versionen
+    _DRIVER_READ_TIMEOUT = 'read_timeout' in DEFAULT_CONFIGURATION
+else:
+    errorcode = None
+    _DRIVER_READ_TIMEOUT = False
+
+    class PoolError(Exception):
+        """Ersatz für mysql.connector.errors.PoolError, wenn nur SQLite verfügbar ist."""
+
+# Düngerfelder des Stammkatalogs (Spaltennamen der breiten Ansichten)
+NAEHRSTOFF_FIELDS = [kuerzel for _, kuerzel, _, _ in NAEHRSTOFF_KATALOG]
+
+# Definierte Reihenfolge der Planungsfelder eines Datensatzes
+PLANNING_FIELDS = ["phase", "lichtzyklus_h"] + NAEHRSTOFF_FIELDS + ["ph_wert_ziel", "ec_wert"]
+
+# Spaltenreihenfolge eines Ist-Datensatzes für insert_pflanzen_data(_many)
+PROTOKOLL_INSERT_COLUMNS = ["pflanzen_name", "woche"] + PLANNING_FIELDS + ["erstellungsdatum"]
+
+# Anzahl Zeilen pro Transaktion beim Massen-Import
+DEFAULT_BATCH_SIZE = 500
+
+# Lesbare Eingabeformate für erstellungsdatum (GUI, Journal, Import)
+DATUM_FORMATE = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%d.%m.%Y")
+# Höchstlängen der Textspalten eines Ist-Datensatzes (VARCHAR im Schema; SQLite prüft sie nicht)
+TEXT_MAX_LAENGE = {"pflanzen_name": 50, "phase": 50}
+
+# Zeilen pro Seite bei der Keyset-Pagination der Datenansicht
+DEFAULT_PAGE_SIZE = 200
+
+# Sortierbare Spalten der Datenansicht (Whitelist, da Spaltennamen nicht parametrisierbar sind)
+SORTABLE_COLUMNS = ["id"] + PROTOKOLL_INSERT_COLUMNS
+# Spalten ohne NULL-Werte: für sie genügt die einfache, indexfreundliche Schlüsselbedingung
+NOT_NULL_COLUMNS = ("id", "pflanzen_name", "woche", "erstellungsdatum")
+DEFAULT_SORT = ("erstellungsdatum", True)
+
+# Aktionen im Änderungsprotokoll (Einfügungen erkennt der Client an der höchsten ID)
+AKTION_GEAENDERT = 'U'
+AKTION_GELOESCHT = 'D'
+# Ins Archiv verschoben: fehlt im laufenden Bestand, bleibt aber in der Ansicht mit Archiv
+AKTION_ARCHIVIERT = 'A'
+
+# Obergrenze neuer Zeilen pro Delta-Abfrage; darüber lohnt sich ein komplettes Neuladen
+DELTA_MAX_ROWS = 1000
+
+# Tage, die Einträge im Änderungsprotokoll aufbewahrt werden
+CHANGE_LOG_KEEP_DAYS = 7
+
+# Tage, die Schlüssel übernommener Journal-Einträge aufbewahrt werden (länger als jede Offline-Phase)
+IDEMPOTENZ_KEEP_DAYS = 90
+
+# Protokoll-IDs je Block beim Umkopieren alter Düngermengen ins Langformat
+NACHLAUF_CHUNK = 5000
+
+# Tage, die vorläufig gelöschte Messungen im Papierkorb bleiben (so lange ist Rückgängig möglich)
+PAPIERKORB_KEEP_DAYS = 7
+# Zeilen je Transaktion beim endgültigen Löschen; kleine Blöcke halten Sperren kurz
+PURGE_CHUNK = 500
+
+# Bedingung für nicht gelöschte Protokollzeilen bei Abfragen auf die Basistabelle
+NICHT_GELOESCHT = "loeschung_id IS NULL"
+
+# Tage ohne neue Messung, nach denen ein Grow als abgeschlossen gilt und ins Archiv wandert
+ARCHIV_NACH_TAGEN = 180
+# Zeilen je Transaktion beim Archivieren
+ARCHIV_CHUNK = 1000
+
+# Standardwerte für den Verbindungspool (überschreibbar über [pool] in db_config.ini)
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 10
+DEFAULT_POOL_RECYCLE = 1800
+
+# Timeouts und Schutzschalter für den MySQL-Server (überschreibbar über [connection])
+DEFAULT_CONNECT_TIMEOUT = 3
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_PROBE_MIN = 2
+DEFAULT_PROBE_MAX = 60
+
+# Fehlernummern des Clients (CR_*): Server nicht erreichbar, Verbindung abgebrochen, Timeout
+CLIENT_ERRNOS = range(2000, 3000)
+
+# Zustände von ConnectionHealth.status()
+VERBINDUNG_OK = "ok"
+VERBINDUNG_GESTOERT = "gestört"
+VERBINDUNG_OFFEN = "offen"
+
+
+class PoolTimeoutError(PoolError):
+    """Wird geworfen, wenn innerhalb des Timeouts keine Verbindung frei wurde."""
+
+
+class DatensatzAbgelehnt(Exception):
+    """Die Daten selbst sind ungültig; anders als bei Verbindungsfehlern hilft kein erneuter Versuch."""
+
+
+class PooledConnection:
+    """
+    Dünne Hülle um eine MySQL-Verbindung aus dem Pool.
+    Alle Attribute werden an die echte Verbindung durchgereicht,
+    close() gibt die Verbindung jedoch an den Pool zurück, statt sie zu trennen.
+    """
+
+    dialect = BACKEND_MYSQL
+
+    def __init__(self, pool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+
+    def __getattr__(self, name):
+        if self._cnx is None:
+            raise PoolError("Verbindung wurde bereits an den Pool zurückgegeben.")
+        return getattr(self._cnx, name)
+
+    def close(self):
+        """Gibt die Verbindung an den Pool zurück (mehrfacher Aufruf ist unschädlich)."""
+        if self._cnx is not None:
+            cnx, self._cnx = self._cnx, None
+            self._pool.release(cnx)
+
+    def discard(self):
+        """Trennt die Verbindung, statt sie zurückzugeben (z.B. nach einem abgebrochenen Streaming-Read)."""
+        if self._cnx is not None:
+            cnx, self._cnx = self._cnx, None
+            self._pool.discard(cnx)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Thread-sicherer Pool wiederverwendbarer MySQL-Verbindungen.
+    - begrenzt die Anzahl gleichzeitig ausgeliehener Verbindungen auf `size`
+    - wartet höchstens `timeout` Sekunden auf eine freie Verbindung
+    - prüft jede Verbindung beim Ausleihen per ping() und verbindet bei Bedarf neu
+    - baut Verbindungen, die länger als `recycle` Sekunden ungenutzt waren, neu auf
+    """
+
+    def __init__(self, connect_args, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_POOL_TIMEOUT,
+                 recycle=DEFAULT_POOL_RECYCLE):
+        self.connect_args = connect_args
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @timed
+    def acquire(self):
+        """Leiht eine geprüfte Verbindung aus. Wirft mysql.connector.Error bei Fehlern."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(
+                f"Keine freie Datenbankverbindung innerhalb von {self.timeout} s (Poolgröße {self.size}).")
+        try:
+            return PooledConnection(self, self._checkout())
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkout(self):
+        while True:
+            try:
+                cnx, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return mysql.connector.connect(**self.connect_args)
+
+            if time.monotonic() - last_used > self.recycle:
+                self._discard(cnx)
+                continue
+            try:
+                # Health-Check; baut die Verbindung neu auf, falls der Server sie getrennt hat
+                cnx.ping(reconnect=True, attempts=1, delay=0)
+                return cnx
+            except DB_ERRORS:
+                self._discard(cnx)
+
+    def release(self, cnx):
+        """Nimmt eine Verbindung zurück. Offene Transaktionen werden zurückgerollt."""
+        try:
+            if cnx.in_transaction:
+                cnx.rollback()
+            self._idle.put((cnx, time.monotonic()))
+        except Exception:
+            # Verbindung in unklarem Zustand (z.B. ungelesene Ergebnisse) -> verwerfen
+            self._discard(cnx)
+        finally:
+            self._slots.release()
+
+    def discard(self, cnx):
+        """Trennt eine ausgeliehene Verbindung und gibt ihren Platz im Pool frei."""
+        try:
+            self._discard(cnx)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        """Trennt alle aktuell ungenutzten Verbindungen."""
+        while True:
+            try:
+                cnx, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(cnx)
+
+    @staticmethod
+    def _discard(cnx):
+        try:
+            cnx.close()
+        except Exception:
+            pass
+
+
+class ConnectionHealth:
+    """
+    Schutzschalter für den MySQL-Server.
+    Nach `threshold` Verbindungsfehlern in Folge ist der Schalter offen: get_db_connection scheitert
+    dann sofort mit der zuletzt gesehenen Meldung, statt jedes Mal den Verbindungs-Timeout abzuwarten.
+    Ein Hintergrund-Thread versucht die Verbindung nach probe_min Sekunden, danach mit jeweils
+    doppeltem Abstand bis probe_max, und schließt den Schalter beim ersten Erfolg.
+    """
+
+    def __init__(self):
+        self.threshold = DEFAULT_FAILURE_THRESHOLD
+        self.probe_min = DEFAULT_PROBE_MIN
+        self.probe_max = DEFAULT_PROBE_MAX
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._message = None
+        self._open = False
+        self._next_probe = None
+        self._probe_args = None
+        self._wake = threading.Event()
+        self._thread = None
+
+    def configure(self, config):
+        """Übernimmt [connection] aus der Konfiguration (failure_threshold, probe_min, probe_max)."""
+        self.threshold = max(1, int(config.get('connection_failure_threshold') or DEFAULT_FAILURE_THRESHOLD))
+        self.probe_min = max(0.5, float(config.get('connection_probe_min') or DEFAULT_PROBE_MIN))
+        self.probe_max = max(self.probe_min, float(config.get('connection_probe_max') or DEFAULT_PROBE_MAX))
+
+    def check(self):
+        """None, solange Zugriffe erlaubt sind; bei offenem Schalter die Fehlermeldung für den Aufrufer."""
+        if not self._open:
+            return None
+        with self._lock:
+            if not self._open:
+                return None
+            warten = max(0, self._next_probe - time.monotonic())
+            return f"{self._message} (Server nicht erreichbar, nächster Versuch in {warten:.0f} s)"
+
+    def record_success(self):
+        if self._failures or self._open:
+            with self._lock:
+                self._close()
+
+    def record_failure(self, message, probe_args):
+        """Zählt einen Verbindungsfehler; probe_args = Parameter für die Prüfversuche im Hintergrund."""
+        with self._lock:
+            self._failures += 1
+            self._message = message
+            self._probe_args = probe_args
+            if self._open or self._failures < self.threshold:
+                return
+            self._open = True
+            self._next_probe = time.monotonic() + self.probe_min
+            self._wake.clear()
+            self._thread = threading.Thread(target=self._probe_loop, name="db-health", daemon=True)
+            self._thread.start()
+
+    def reset(self):
+        """Schließt den Schalter ohne Prüfung, z.B. nach geänderten Zugangsdaten."""
+        with self._lock:
+            self._close()
+
+    def status(self):
+        """(Zustand, letzte Fehlermeldung, Sekunden bis zum nächsten Prüfversuch oder None)."""
+        with self._lock:
+            if self._open:
+                return VERBINDUNG_OFFEN, self._message, max(0, self._next_probe - time.monotonic())
+            if self._failures:
+                return VERBINDUNG_GESTOERT, self._message, None
+            return VERBINDUNG_OK, None, None
+
+    def _current(self):
+        """Schalter offen und dieser Thread der zuständige Prüf-Thread (nicht einer von früher)."""
+        return self._open and self._thread is threading.current_thread()
+
+    def _close(self):
+        self._failures = 0
+        self._message = None
+        self._open = False
+        self._next_probe = None
+        self._wake.set()
+
+    def _probe_loop(self):
+        abstand = self.probe_min
+        while True:
+            with self._lock:
+                if not self._current():
+                    return
+                warten = self._next_probe - time.monotonic()
+                args = self._probe_args
+            if warten > 0 and self._wake.wait(warten):
+                # reset() oder Erfolg eines anderen Aufrufs
+                return
+            ok, message = self._probe(args)
+            with self._lock:
+                if not self._current():
+                    return
+                if ok:
+                    self._close()
+                    return
+                abstand = min(abstand * 2, self.probe_max)
+                self._message = message
+                self._next_probe = time.monotonic() + abstand
+
+    @staticmethod
+    def _probe(args):
+        """Einmal verbinden und wieder trennen. Antwortet der Server mit einem Fehler, ist er erreichbar."""
+        try:
+            mysql.connector.connect(**args).close()
+            return True, None
+        except DB_ERRORS as err:
+            if _is_connection_error(err):
+                return False, _connection_error_message(err, args['host'], args['port'])
+            return True, None
+
+
+# Gemeinsame Instanz für den ganzen Prozess
+CONNECTION_HEALTH = ConnectionHealth()
+
+
+def _is_connection_error(err):
+    """True für Fehler, bei denen der Server nicht erreicht wurde (nicht z.B. falsches Passwort)."""
+    return getattr(err, 'errno', None) in CLIENT_ERRNOS
+
+
+def _connection_error_message(err, host, port):
+    if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+        return "❌ Falscher Benutzername oder Passwort."
+    elif err.errno == errorcode.CR_CONN_HOST_ERROR:
+        return f"❌ Verbindung zum Host {host} an Port {port} nicht möglich."
+    else:
+        return f"❌ Unbekannter Fehler bei der Verbindung: {err}"
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _connect_args(config, with_db=True):
+    """Baut die Verbindungsparameter für mysql.connector.connect() aus der Config."""
+    args = {
+        'user': config['user'],
+        'password': config['password'],
+        'host': config['host'],
+        'port': int(config.get('port', 3306)),
+        'charset': 'utf8',
+    }
+    connect_timeout = int(float(config.get('connection_connect_timeout') or DEFAULT_CONNECT_TIMEOUT))
+    read_timeout = int(float(config.get('connection_read_timeout') or DEFAULT_READ_TIMEOUT))
+    if _DRIVER_READ_TIMEOUT:
+        args['connection_timeout'] = connect_timeout
+        args['read_timeout'] = args['write_timeout'] = read_timeout
+    else:
+        # Ältere Treiber setzen connection_timeout auch für jedes Lesen; lange Abfragen dürfen nicht abbrechen
+        args['connection_timeout'] = max(connect_timeout, read_timeout)
+    if with_db and 'database' in config:
+        args['database'] = config['database']
+    return args
+
+
+def get_pool(config, with_db=True):
+    """Liefert den gemeinsamen Pool für diese Verbindungsparameter (wird bei Bedarf angelegt)."""
+    args = _connect_args(config, with_db)
+    key = tuple(sorted(args.items()))
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                args,
+                size=int(config.get('pool_size', DEFAULT_POOL_SIZE)),
+                timeout=float(config.get('pool_timeout', DEFAULT_POOL_TIMEOUT)),
+                recycle=float(config.get('pool_recycle', DEFAULT_POOL_RECYCLE))
+            )
+            _POOLS[key] = pool
+        return pool
+
+
+def close_all_pools():
+    """Schließt alle Pools, z.B. nach geänderten Zugangsdaten oder beim Beenden."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close_all()
+    sqlite_backend.close_all()
+    CONNECTION_HEALTH.reset()
+
+
+@timed
 def get_db_connection(config, with_db=True):
     """
-    Versucht, eine Verbindung zur Datenbank herzustellen.
+    Leiht eine Verbindung aus dem gemeinsamen Pool aus.
     Standardmäßig wird versucht, die in der Config angegebene DB direkt zu nutzen.
+    cnx.close() gibt die Verbindung an den Pool zurück.
+    Mit [storage] backend = sqlite wird stattdessen die lokale SQLite-Datei geöffnet.
+    Ist der MySQL-Server wiederholt nicht erreichbar, scheitert der Aufruf sofort (CONNECTION_HEALTH).
     """
     port = config.get('port', 3306)
-    
-    db_args = {}
-    if with_db and 'database' in config:
-        db_args['database'] = config['database']
-        
+    if backend_of(config) == BACKEND_SQLITE:
+        try:
+            cnx = sqlite_backend.connect(sqlite_path(config))
+            return cnx, cnx.cursor()
+        except DB_ERRORS as err:
+            return None, f"❌ SQLite-Datenbank {sqlite_path(config)} kann nicht geöffnet werden: {err}"
+    if mysql is None:
+        return None, "❌ mysql-connector-python ist nicht installiert (oder in db_config.ini [storage] backend = sqlite wählen)."
+    fehler = CONNECTION_HEALTH.check()
+    if fehler is not None:
+        return None, fehler
+
     try:
-        cnx = mysql.connector.connect(
-            user=config['user'],
-            password=config['password'],
-            host=config['host'],
-            port=port,
-            charset='utf8',
-            **db_args
-        )
-        return cnx, cnx.cursor()
+        cnx = get_pool(config, with_db).acquire()
+        cursor = cnx.cursor()
+    except PoolTimeoutError as err:
+        return None, f"❌ {err}"
+    except DB_ERRORS as err:
+        message = _connection_error_message(err, config['host'], port)
+        if _is_connection_error(err):
+            CONNECTION_HEALTH.record_failure(message, _connect_args(config, with_db=False))
+        return None, message
+    CONNECTION_HEALTH.record_success()
+    return cnx, cursor
 
-    except mysql.connector.Error as err:
-        if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-            return None, "❌ Falscher Benutzername oder Passwort."
-        elif err.errno == errorcode.CR_CONN_HOST_ERROR:
-             return None, f"❌ Verbindung zum Host {config['host']} an Port {port} nicht möglich."
-        else:
-            return None, f"❌ Unbekannter Fehler bei der Verbindung: {err}"
+
+@timed
+def run_with_connection(config, fn, *args):
+    """
+    Leiht eine Verbindung aus, ruft fn(cnx, *args) auf und gibt sie danach zurück.
+    Für Funktionen mit Verbindungsparameter (z.B. insert_pflanzen_data), die im
+    Hintergrund laufen sollen. Gibt (False, Fehlermeldung) zurück, wenn keine Verbindung zustande kommt.
+    """
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return False, result
+    try:
+        return fn(cnx, *args)
+    finally:
+        cnx.close()
 
 
-def setup_database_and_table(cursor, db_name):
-    """Stellt sicher, dass Datenbank, Protokoll- und Planungstabelle existieren."""
-    
+@timed
+def initialize_database(config):
+    """Legt Datenbank und Schema beim Start an bzw. migriert es und bereinigt das Änderungsprotokoll."""
+    # Ohne DB verbinden, damit eine noch fehlende Datenbank angelegt werden kann
+    cnx, cursor = get_db_connection(config, with_db=False)
+    if cnx is None:
+        return False, cursor
     try:
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {db_name} DEFAULT CHARACTER SET 'utf8'")
-        cursor.execute(f"USE {db_name}")
-    except mysql.connector.Error as err:
-        return False, f"Fehler beim Erstellen oder Auswählen der Datenbank: {err}"
-
-    # Protokoll-Tabelle (Ist-Werte)
-    PROTOKOLL_DESCRIPTION = f"""
-    CREATE TABLE IF NOT EXISTS {PROTOKOLL_TABLE_NAME} (
-      id INT AUTO_INCREMENT PRIMARY KEY,
-      pflanzen_name VARCHAR(50) NOT NULL,
-      woche INT NOT NULL,
-      phase VARCHAR(50),
-      lichtzyklus_h INT,
-      root_juice_ml_l FLOAT,
-      calmag_ml_l FLOAT,
-      bio_grow_ml_l FLOAT,
-      fish_mix_ml_l FLOAT,
-      bio_heaven_ml_l FLOAT,
-      acti_alc_ml_l FLOAT,
-      bio_bloom_ml_l FLOAT,
-      top_max_ml_l FLOAT,
-      ph_wert_ziel FLOAT,
-      ec_wert FLOAT,
-      erstellungsdatum TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
+        ok, msg = setup_database_and_table(cursor, config['database'], cnx.dialect)
+    finally:
+        cnx.close()
+    if ok:
+        prune_change_log(config)
+        prune_idempotency_keys(config)
+    return ok, msg
+
+
+@timed
+def setup_database_and_table(cursor, db_name, dialect=BACKEND_MYSQL):
     """
-    
-    # Planungstabelle (Soll-Werte)
-    PLANUNG_DESCRIPTION = f"""
-    CREATE TABLE IF NOT EXISTS {PLANUNG_TABLE_NAME} (
-      pflanzen_name VARCHAR(50) NOT NULL,
-      woche INT NOT NULL,
-      phase VARCHAR(50),
-      lichtzyklus_h INT,
-      root_juice_ml_l FLOAT,
-      calmag_ml_l FLOAT,
-      bio_grow_ml_l FLOAT,
-      fish_mix_ml_l FLOAT,
-      bio_heaven_ml_l FLOAT,
-      acti_alc_ml_l FLOAT,
-      bio_bloom_ml_l FLOAT,
-      top_max_ml_l FLOAT,
-      ph_wert_ziel FLOAT,
-      ec_wert FLOAT,
-      PRIMARY KEY (pflanzen_name, woche)
-    )
+    Stellt sicher, dass die Datenbank existiert und das Schema auf dem neuesten Stand ist.
+    Bereits angewendete Migrationen werden übersprungen, sodass ein aktuelles Schema
+    nur eine einzige Versionsabfrage kostet. Einmal beim Start aufrufen, nicht pro Insert.
     """
     
+    if dialect == BACKEND_MYSQL:
+        # Eine SQLite-Datei ist selbst die Datenbank, dort entfällt dieser Schritt
+        try:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {db_name} DEFAULT CHARACTER SET 'utf8'")
+            cursor.execute(f"USE {db_name}")
+        except DB_ERRORS as err:
+            return False, f"Fehler beim Erstellen oder Auswählen der Datenbank: {err}"
+
+    ok, result = run_migrations(cursor, db_name, dialect)
+    if not ok:
+        return False, f"Fehler beim Aktualisieren der Tabellen: {result}"
+    if result:
+        return True, f"Datenbankstruktur aktualisiert ({len(result)} Migration(en) ausgeführt)."
+    return True, "Datenbankstruktur ist aktuell."
+
+
+def _split_columns(columns):
+    """(Basisspalten, Positionen der Basisspalten, [(Position, naehrstoff_id), ...]) einer Datensatz-Spaltenliste."""
+    basis = [c for c in columns if c not in NAEHRSTOFF_FIELDS]
+    mengen = [(columns.index(kuerzel), nid) for nid, kuerzel, _, _ in NAEHRSTOFF_KATALOG]
+    return basis, [columns.index(c) for c in basis], mengen
+
+
+PROTOKOLL_BASE_COLUMNS, _PROTOKOLL_BASE_POS, _PROTOKOLL_MENGEN_POS = _split_columns(PROTOKOLL_INSERT_COLUMNS)
+
+
+def _protokoll_insert_sql():
+    platzhalter = ", ".join(["%s"] * len(PROTOKOLL_BASE_COLUMNS))
+    return (f"INSERT INTO {PROTOKOLL_TABLE_NAME} "
+            f"({', '.join(PROTOKOLL_BASE_COLUMNS)}) VALUES ({platzhalter})")
+
+
+def parse_erstellungsdatum(value):
+    """
+    Erstellungsdatum als sekundengenaues datetime (wie MySQL DATETIME). Akzeptiert datetime, date
+    und Text in einem der DATUM_FORMATE; leer bedeutet wie in der GUI "jetzt".
+    SQLite vergleicht Zeitstempel als Text, deshalb darf dort nur dieses eine Format landen.
+    Wirft ValueError bei unlesbarem Text.
+    """
+    if value is None or value == "":
+        return datetime.now().replace(microsecond=0)
+    if isinstance(value, datetime):
+        return value.replace(microsecond=0)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    text = str(value).strip()
+    for fmt in DATUM_FORMATE:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"Ungültiges Datum: {value!r} (erwartet z.B. JJJJ-MM-TT)")
+
+
+def validate_datensatz(datensatz):
+    """Prüft einen Ist-Datensatz (Spalten wie PROTOKOLL_INSERT_COLUMNS) gegen das Schema. Wirft ValueError."""
+    if not datensatz[_NAME_POS]:
+        raise ValueError("Name der Pflanze fehlt.")
     try:
-        cursor.execute(PROTOKOLL_DESCRIPTION)
-        cursor.execute(PLANUNG_DESCRIPTION)
-        
-        # Spalten nachträglich hinzufügen, falls sie fehlen (Migration)
-        for table in [PROTOKOLL_TABLE_NAME, PLANUNG_TABLE_NAME]:
-            # Fish-Mix
-            try:
-                cursor.execute(f"ALTER TABLE {table} ADD COLUMN fish_mix_ml_l FLOAT AFTER bio_grow_ml_l")
-            except: pass
-            # Bio-Heaven
-            try:
-                cursor.execute(f"ALTER TABLE {table} ADD COLUMN bio_heaven_ml_l FLOAT AFTER fish_mix_ml_l")
-            except: pass
-            # EC-Wert
-            try:
-                cursor.execute(f"ALTER TABLE {table} ADD COLUMN ec_wert FLOAT AFTER ph_wert_ziel")
-            except: pass
+        int(datensatz[_WOCHE_POS])
+    except (TypeError, ValueError):
+        raise ValueError(f"Woche muss eine ganze Zahl sein: {datensatz[_WOCHE_POS]!r}")
+    for spalte, laenge in TEXT_MAX_LAENGE.items():
+        wert = datensatz[PROTOKOLL_INSERT_COLUMNS.index(spalte)]
+        if wert is not None and len(str(wert)) > laenge:
+            raise ValueError(f"'{spalte}' ist länger als {laenge} Zeichen.")
+    parse_erstellungsdatum(datensatz[_DATUM_POS])
 
-        return True, "Datenbankstruktur erfolgreich eingerichtet oder aktualisiert."
-    except mysql.connector.Error as err:
-        return False, f"Fehler beim Erstellen der Tabellen: {err.msg}"
 
+def _inserted_ids(cursor, dialect, anzahl):
+    """
+    IDs der Zeilen des letzten Mehrzeilen-INSERTs in Einfügereihenfolge. InnoDB vergibt sie für ein
+    INSERT mit bekannter Zeilenzahl in einem Schritt (auch bei innodb_autoinc_lock_mode=2) im Abstand
+    von auto_increment_increment, der in Galera- und Multi-Primary-Setups größer als 1 ist.
+    In SQLite schreibt die Transaktion allein, die IDs folgen lückenlos aufeinander.
+    """
+    if dialect == BACKEND_SQLITE:
+        cursor.execute("SELECT last_insert_rowid()")
+        letzte_id = cursor.fetchone()[0]
+        return list(range(letzte_id - anzahl + 1, letzte_id + 1))
+    cursor.execute("SELECT LAST_INSERT_ID(), @@SESSION.auto_increment_increment")
+    erste_id, schritt = cursor.fetchone()
+    return list(range(erste_id, erste_id + anzahl * schritt, schritt))
 
+
+def _insert_protokoll_rows(cursor, dialect, datensaetze):
+    """
+    Schreibt Ist-Datensätze (Spalten wie PROTOKOLL_INSERT_COLUMNS) ohne Commit: Stammdaten ins
+    Protokoll, Düngermengen ins Langformat, dazu die Auffälligkeitszustände.
+    Optional folgt auf die Spalten ein Tupel ((naehrstoff_id, menge), ...) mit Mengen weiterer
+    Produkte aus dem Nährstoffkatalog (z.B. beim Import eines Exports mit eigenen Produkten).
+    Das Erstellungsdatum wird dabei vereinheitlicht (parse_erstellungsdatum).
+    Gibt (IDs der neuen Zeilen, Auffälligkeiten) zurück; ungültige Datensätze (validate_datensatz)
+    lösen ValueError aus, bevor etwas geschrieben wird.
+    """
+    for d in datensaetze:
+        validate_datensatz(d)
+    basis = [tuple(parse_erstellungsdatum(d[i]) if i == _DATUM_POS else d[i] for i in _PROTOKOLL_BASE_POS)
+             for d in datensaetze]
+    if len(basis) == 1:
+        cursor.execute(_protokoll_insert_sql(), basis[0])
+        ids = [cursor.lastrowid]
+    else:
+        cursor.executemany(_protokoll_insert_sql(), basis)
+        ids = _inserted_ids(cursor, dialect, len(basis))
+    mengen = [(rid, nid, d[pos]) for rid, d in zip(ids, datensaetze)
+              for pos, nid in _PROTOKOLL_MENGEN_POS if d[pos] is not None]
+    mengen += [(rid, nid, menge) for rid, d in zip(ids, datensaetze) if len(d) > _ZUSATZ_POS
+               for nid, menge in d[_ZUSATZ_POS] if menge is not None]
+    if mengen:
+        cursor.executemany(f"INSERT INTO {PROTOKOLL_DOSIERUNG_TABLE_NAME} (protokoll_id, naehrstoff_id, menge) "
+                           f"VALUES (%s, %s, %s)", mengen)
+    return ids, _detect_anomalies(cursor, dialect, ids, datensaetze)
+
+
+_DATUM_POS = PROTOKOLL_INSERT_COLUMNS.index("erstellungsdatum")
+_ZUSATZ_POS = len(PROTOKOLL_INSERT_COLUMNS)
+_NAME_POS = PROTOKOLL_INSERT_COLUMNS.index("pflanzen_name")
+_WOCHE_POS = PROTOKOLL_INSERT_COLUMNS.index("woche")
+_ANOMALIE_POS = [(f, PROTOKOLL_INSERT_COLUMNS.index(f)) for f in ANOMALY_FIELDS]
+
+
+def _anomaly_state_upsert_sql(dialect):
+    sql = (f"INSERT INTO {ANOMALIE_ZUSTAND_TABLE_NAME} (pflanzen_name, feld, anzahl, mittel, m2, ewma, letzte_id) "
+           f"VALUES (%s, %s, %s, %s, %s, %s, %s)")
+    spalten = ("anzahl", "mittel", "m2", "ewma", "letzte_id")
+    if dialect == BACKEND_SQLITE:
+        return f"{sql} ON CONFLICT (pflanzen_name, feld) DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in spalten)
+    return f"{sql} ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in spalten)
+
+
+def _write_anomalies(cursor, dialect, zustand, meldungen):
+    if zustand:
+        cursor.executemany(_anomaly_state_upsert_sql(dialect),
+                           [(name, feld, *stats.as_row()) for (name, feld), stats in zustand.items()])
+    if meldungen:
+        cursor.executemany(f"INSERT INTO {ANOMALIE_TABLE_NAME} (protokoll_id, feld, wert, soll, z_wert, grund) "
+                           f"VALUES (%s, %s, %s, %s, %s, %s)", meldungen)
+
+
+def _detect_anomalies(cursor, dialect, ids, datensaetze):
+    """
+    Rechnet neue Messungen (IDs `ids` in Reihenfolge von `datensaetze`) in die Zustände ihrer Pflanzen ein und speichert
+    Zustände und Meldungen ohne Commit. Gelesen werden nur die Zustände und Pläne der
+    betroffenen Pflanzen, die Kosten hängen also nicht von der Länge der Historie ab.
+    """
+    if not ANOMALY_DETECTOR.enabled:
+        return []
+    namen = sorted({d[_NAME_POS] for d in datensaetze})
+    platzhalter = ", ".join(["%s"] * len(namen))
+    # MySQL: Zustände bis zum Commit sperren, damit parallele Schreiber nacheinander einrechnen
+    sperre = "" if dialect == BACKEND_SQLITE else " FOR UPDATE"
+    cursor.execute(f"SELECT pflanzen_name, feld, anzahl, mittel, m2, ewma, letzte_id FROM {ANOMALIE_ZUSTAND_TABLE_NAME} "
+                   f"WHERE pflanzen_name IN ({platzhalter}){sperre}", namen)
+    zustand = {(row[0], row[1]): RunningStats(*row[2:]) for row in cursor.fetchall()}
+    cursor.execute(f"SELECT pflanzen_name, woche, {', '.join(ANOMALY_FIELDS)} FROM {PLANUNG_TABLE_NAME} "
+                   f"WHERE pflanzen_name IN ({platzhalter})", namen)
+    soll = {(row[0], row[1]): dict(zip(ANOMALY_FIELDS, row[2:])) for row in cursor.fetchall()}
+    meldungen = []
+    for rid, d in zip(ids, datensaetze):
+        meldungen += ANOMALY_DETECTOR.observe(zustand, rid, d[_NAME_POS],
+                                              {f: d[pos] for f, pos in _ANOMALIE_POS},
+                                              soll.get((d[_NAME_POS], d[_WOCHE_POS]), {}))
+    _write_anomalies(cursor, dialect, zustand, meldungen)
+    return meldungen
+
+
+@timed
 def insert_pflanzen_data(cnx, datensatz):
     """Fügt einen neuen IST-Datensatz (Protokoll) in die Tabelle ein."""
     cursor = cnx.cursor()
-    
-    add_log = (f"INSERT INTO {PROTOKOLL_TABLE_NAME} "
-               "(pflanzen_name, woche, phase, lichtzyklus_h, root_juice_ml_l, "
-               "calmag_ml_l, bio_grow_ml_l, fish_mix_ml_l, bio_heaven_ml_l, acti_alc_ml_l, "
-               "bio_bloom_ml_l, top_max_ml_l, ph_wert_ziel, ec_wert, erstellungsdatum) "
-               "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)")
 
     try:
-        cursor.execute(add_log, datensatz)
-        last_id = cursor.lastrowid
+        (last_id,), meldungen = _insert_protokoll_rows(cursor, cnx.dialect, [datensatz])
         cnx.commit()
         cursor.close()
-        return True, f"✅ Datensatz erfolgreich eingefügt. (ID: {last_id})"
-    except mysql.connector.Error as err:
+        hinweis = "".join(f"\n⚠️ {describe_anomaly(m)}" for m in meldungen)
+        return True, f"✅ Datensatz erfolgreich eingefügt. (ID: {last_id}){hinweis}"
+    except (ValueError, *DB_ERRORS) as err:
+        cnx.rollback()
         cursor.close()
-        return False, f"❌ Fehler beim Einfügen des Datensatzes: {err.msg}"
+        return False, f"❌ Fehler beim Einfügen des Datensatzes: {error_message(err)}"
 
 
+@timed
+def insert_pflanzen_data_many(cnx, datensaetze, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Fügt viele IST-Datensätze gebündelt ein (Spaltenreihenfolge wie PROTOKOLL_INSERT_COLUMNS,
+    optional mit Mengen weiterer Katalogprodukte wie bei _insert_protokoll_rows).
+    `datensaetze` darf ein beliebiges Iterable (auch ein Generator) sein. Je `batch_size`
+    Zeilen werden Protokoll und Dosierung mit je einem executemany() geschrieben, das
+    mysql.connector zu einem mehrzeiligen INSERT zusammenfasst, und gemeinsam committet.
+    Gibt (True, Anzahl eingefügter Zeilen) oder (False, Fehlermeldung) zurück; bei einem
+    Fehler wird nur der laufende Batch zurückgerollt, frühere Batches bleiben gespeichert.
+    """
+    cursor = cnx.cursor()
+    eingefuegt = 0
+    batch = []
+
+    def _flush():
+        _insert_protokoll_rows(cursor, cnx.dialect, batch)
+        cnx.commit()
+        return len(batch)
+
+    try:
+        for datensatz in datensaetze:
+            batch.append(datensatz)
+            if len(batch) >= batch_size:
+                eingefuegt += _flush()
+                batch = []
+        if batch:
+            eingefuegt += _flush()
+        cursor.close()
+        return True, eingefuegt
+    except (ValueError, *DB_ERRORS) as err:
+        cnx.rollback()
+        cursor.close()
+        return False, f"❌ Fehler beim Masseneinfügen nach {eingefuegt} Zeilen: {error_message(err)}"
+
+
+@timed
+def insert_pflanzen_data_idempotent(cnx, eintraege):
+    """
+    Überträgt Einträge aus dem Offline-Journal: `eintraege` = [(schluessel, datensatz), ...].
+    Zeilen und Schlüssel werden in einer Transaktion geschrieben. Schlüssel, die der Server
+    bereits kennt (z.B. weil nur die Bestätigung eines früheren Versuchs verloren ging),
+    werden übersprungen; Wiederholungen erzeugen so keine doppelten Zeilen.
+    Gibt (True, Anzahl neu eingefügter Zeilen) oder bei vorübergehenden Fehlern (False, Fehlermeldung)
+    zurück. Lehnt der Server die Daten selbst ab, wird DatensatzAbgelehnt geworfen.
+    """
+    cursor = cnx.cursor()
+    try:
+        platzhalter = ", ".join(["%s"] * len(eintraege))
+        cursor.execute(f"SELECT schluessel FROM {IDEMPOTENZ_TABLE_NAME} WHERE schluessel IN ({platzhalter})",
+                       tuple(k for k, _ in eintraege))
+        vorhanden = {row[0] for row in cursor.fetchall()}
+        neu = [(k, d) for k, d in eintraege if k not in vorhanden]
+        if neu:
+            _insert_protokoll_rows(cursor, cnx.dialect, [d for _, d in neu])
+            # Der Primärschlüssel verhindert Duplikate auch bei gleichzeitigen Übertragungen
+            cursor.executemany(f"INSERT INTO {IDEMPOTENZ_TABLE_NAME} (schluessel) VALUES (%s)",
+                               [(k,) for k, _ in neu])
+        cnx.commit()
+        return True, len(neu)
+    except (ValueError, *DATA_ERRORS) as err:
+        cnx.rollback()
+        raise DatensatzAbgelehnt(error_message(err)) from err
+    except DB_ERRORS as err:
+        cnx.rollback()
+        return False, f"❌ Fehler beim Übertragen des Journals: {error_message(err)}"
+    finally:
+        cursor.close()
+
+
+PLAN_COLUMNS = ["pflanzen_name", "woche"] + PLANNING_FIELDS
+PLAN_BASE_COLUMNS, _PLAN_BASE_POS, _PLAN_MENGEN_POS = _split_columns(PLAN_COLUMNS)
+
+
+def _plan_upsert_sql(dialect):
+    """INSERT, das einen vorhandenen Plan (gleicher Name und Woche) aktualisiert."""
+    platzhalter = ", ".join(["%s"] * len(PLAN_BASE_COLUMNS))
+    sql = f"INSERT INTO {PLANUNG_TABLE_NAME} ({', '.join(PLAN_BASE_COLUMNS)}) VALUES ({platzhalter})"
+    if dialect == BACKEND_SQLITE:
+        updates = ", ".join(f"{c} = excluded.{c}" for c in PLAN_BASE_COLUMNS[2:])
+        return f"{sql} ON CONFLICT (pflanzen_name, woche) DO UPDATE SET {updates}"
+    updates = ", ".join(f"{c} = VALUES({c})" for c in PLAN_BASE_COLUMNS[2:])
+    return f"{sql} ON DUPLICATE KEY UPDATE {updates}"
+
+
+def _write_plans(cursor, dialect, plaene):
+    """
+    Schreibt SOLL-Datensätze (Spalten wie PLAN_COLUMNS) ohne Commit. Die Mengen des Stammkatalogs
+    ersetzen die bisherigen; Mengen später aufgenommener Produkte bleiben unberührt.
+    """
+    cursor.executemany(_plan_upsert_sql(dialect), [tuple(p[i] for i in _PLAN_BASE_POS) for p in plaene])
+    stamm_ids = ", ".join(str(nid) for _, nid in _PLAN_MENGEN_POS)
+    cursor.executemany(f"DELETE FROM {PLANUNG_DOSIERUNG_TABLE_NAME} WHERE pflanzen_name = %s AND woche = %s "
+                       f"AND naehrstoff_id IN ({stamm_ids})", [(p[0], p[1]) for p in plaene])
+    mengen = [(p[0], p[1], nid, p[pos]) for p in plaene for pos, nid in _PLAN_MENGEN_POS if p[pos] is not None]
+    if mengen:
+        cursor.executemany(f"INSERT INTO {PLANUNG_DOSIERUNG_TABLE_NAME} (pflanzen_name, woche, naehrstoff_id, menge) "
+                           f"VALUES (%s, %s, %s, %s)", mengen)
+
+
+@timed
 def save_pflanzen_plan(cnx, planungsdatensatz):
     """Speichert oder aktualisiert einen SOLL-Datensatz in der Planungstabelle."""
     cursor = cnx.cursor()
-    
-    save_plan = f"""
-    INSERT INTO {PLANUNG_TABLE_NAME} 
-    (pflanzen_name, woche, phase, lichtzyklus_h, root_juice_ml_l, 
-     calmag_ml_l, bio_grow_ml_l, fish_mix_ml_l, bio_heaven_ml_l, acti_alc_ml_l, 
-     bio_bloom_ml_l, top_max_ml_l, ph_wert_ziel, ec_wert) 
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    ON DUPLICATE KEY UPDATE
-    phase = VALUES(phase),
-    lichtzyklus_h = VALUES(lichtzyklus_h),
-    root_juice_ml_l = VALUES(root_juice_ml_l),
-    calmag_ml_l = VALUES(calmag_ml_l),
-    bio_grow_ml_l = VALUES(bio_grow_ml_l),
-    fish_mix_ml_l = VALUES(fish_mix_ml_l),
-    bio_heaven_ml_l = VALUES(bio_heaven_ml_l),
-    acti_alc_ml_l = VALUES(acti_alc_ml_l),
-    bio_bloom_ml_l = VALUES(bio_bloom_ml_l),
-    top_max_ml_l = VALUES(top_max_ml_l),
-    ph_wert_ziel = VALUES(ph_wert_ziel),
-    ec_wert = VALUES(ec_wert)
-    """
-
-    try:
-        cursor.execute(save_plan, planungsdatensatz)
+
+    try:
+        _write_plans(cursor, cnx.dialect, [planungsdatensatz])
         cnx.commit()
         cursor.close()
+        PLAN_CACHE.invalidate(planungsdatensatz[0], planungsdatensatz[1])
+        PLAN_INDEX.upsert(dict(zip(PLAN_COLUMNS, planungsdatensatz)))
         return True, "✅ Planung erfolgreich gespeichert/aktualisiert."
-    except mysql.connector.Error as err:
+    except DB_ERRORS as err:
+        cnx.rollback()
+        cursor.close()
+        return False, f"❌ Fehler beim Speichern der Planung: {error_message(err)}"
+
+
+@timed
+def save_pflanzen_plan_many(cnx, plaene):
+    """Speichert viele SOLL-Datensätze in einer Transaktion (z.B. für Testdaten). Gibt (True, Anzahl) zurück."""
+    plaene = list(plaene)
+    cursor = cnx.cursor()
+    try:
+        if plaene:
+            _write_plans(cursor, cnx.dialect, plaene)
+        cnx.commit()
+        PLAN_CACHE.invalidate()
+        PLAN_INDEX.clear()
+        return True, len(plaene)
+    except DB_ERRORS as err:
+        cnx.rollback()
+        return False, f"❌ Fehler beim Speichern der Planungen: {error_message(err)}"
+    finally:
         cursor.close()
-        return False, f"❌ Fehler beim Speichern der Planung: {err.msg}"
 
 
+@timed
 def get_pflanzen_plan(config, plant_name, week):
     """Holt einen spezifischen Plan (Soll-Werte) aus der DB."""
     cnx, result = get_db_connection(config, with_db=True)
@@ -177,7 +833,7 @@ def get_pflanzen_plan(config, plant_name, week):
         
     cursor = cnx.cursor()
     try:
-        query = f"SELECT * FROM {PLANUNG_TABLE_NAME} WHERE pflanzen_name = %s AND woche = %s"
+        query = f"SELECT * FROM {PLANUNG_VIEW_NAME} WHERE pflanzen_name = %s AND woche = %s"
         cursor.execute(query, (plant_name, week))
         plan = cursor.fetchone()
         
@@ -192,69 +848,949 @@ def get_pflanzen_plan(config, plant_name, week):
         return None, None
 
 
-def fetch_all_data(config):
-    """Holt alle Datensätze aus dem Protokoll für die Anzeige."""
+@timed
+def get_pflanzen_plan_cached(config, plant_name, week):
+    """
+    Wie get_pflanzen_plan, liest aber zuerst aus dem Plan-Index bzw. Plan-Cache.
+    Nur erfolgreiche Abfragen (auch "kein Plan vorhanden") werden gecacht, Fehler nicht.
+    """
+    hit, value = get_cached_plan_only(config, plant_name, week)
+    if hit:
+        return value
+    plan, column_names = get_pflanzen_plan(config, plant_name, week)
+    if column_names is not None:
+        PLAN_CACHE.put(config, plant_name, week, (plan, column_names))
+    return plan, column_names
+
+
+def get_cached_plan_only(config, plant_name, week):
+    """Liefert (True, (plan, columns)) ausschließlich aus Plan-Index oder Cache, ohne DB-Zugriff."""
+    hit, value = PLAN_INDEX.get(config, plant_name, week)
+    if hit:
+        return hit, value
+    return PLAN_CACHE.get(config, plant_name, week)
+
+
+@timed
+def delete_pflanzen_plan(config, plant_name):
+    """Löscht alle Wochen eines Plans und invalidiert den Plan-Cache."""
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return False, result
+
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {PLANUNG_DOSIERUNG_TABLE_NAME} WHERE pflanzen_name = %s", (plant_name,))
+        cursor.execute(f"DELETE FROM {PLANUNG_TABLE_NAME} WHERE pflanzen_name = %s", (plant_name,))
+        cnx.commit()
+        return True, f"Plan für {plant_name} gelöscht."
+    except DB_ERRORS as err:
+        cnx.rollback()
+        return False, f"❌ Konnte nicht löschen: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+        PLAN_CACHE.invalidate(plant_name)
+        PLAN_INDEX.remove(plant_name)
+
+
+@timed
+def load_plan_index(config):
+    """
+    Lädt alle Pläne mit einer Abfrage in den Plan-Index (PLAN_INDEX).
+    Gibt (alphabetisch sortierte Plannamen, None) oder (None, Fehlermeldung) zurück.
+    """
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return None, result
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"SELECT * FROM {PLANUNG_VIEW_NAME} ORDER BY pflanzen_name, woche")
+        rows = cursor.fetchall()
+        PLAN_INDEX.load(config, rows, [i[0] for i in cursor.description])
+        return PLAN_INDEX.names(), None
+    except DB_ERRORS as err:
+        return None, f"❌ Fehler beim Laden der Pläne: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def fetch_plan_weeks(config, plant_name):
+    """Liefert die geplanten Wochen einer Pflanze, aufsteigend sortiert."""
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return None, result
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"SELECT woche FROM {PLANUNG_TABLE_NAME} WHERE pflanzen_name = %s ORDER BY woche ASC",
+                       (plant_name,))
+        return [row[0] for row in cursor.fetchall()], None
+    except DB_ERRORS as err:
+        return None, f"❌ Fehler beim Laden der Wochen: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def fetch_naehrstoffe(config):
+    """Katalog aller Produkte als [(id, kuerzel, bezeichnung, einheit), ...] in Anzeigereihenfolge."""
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return None, result
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"SELECT id, kuerzel, bezeichnung, einheit FROM {NAEHRSTOFF_TABLE_NAME} ORDER BY reihenfolge, id")
+        return cursor.fetchall(), None
+    except DB_ERRORS as err:
+        return None, f"❌ Fehler beim Laden des Nährstoffkatalogs: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def add_naehrstoff(config, kuerzel, bezeichnung, einheit="ml/L"):
+    """
+    Nimmt ein neues Produkt in den Katalog auf. Es erscheint danach als Spalte `kuerzel`
+    in den Ansichten von Protokoll und Planung; die Basistabellen bleiben unverändert.
+    """
+    if not KUERZEL_MUSTER.match(kuerzel or "") or kuerzel in SORTABLE_COLUMNS + PLANNING_FIELDS:
+        return False, f"❌ Ungültiges Kürzel '{kuerzel}' (a-z, 0-9, _; nicht wie eine vorhandene Spalte)."
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return False, result
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(
+            f"INSERT INTO {NAEHRSTOFF_TABLE_NAME} (kuerzel, bezeichnung, einheit, reihenfolge) "
+            f"SELECT %s, %s, %s, COALESCE(MAX(reihenfolge), 0) + 1 FROM {NAEHRSTOFF_TABLE_NAME}",
+            (kuerzel, bezeichnung, einheit)
+        )
+        create_views(cursor, cnx.dialect)
+        cnx.commit()
+        PLAN_CACHE.invalidate()
+        PLAN_INDEX.clear()
+        return True, f"✅ {bezeichnung} in den Nährstoffkatalog aufgenommen."
+    except DB_ERRORS as err:
+        cnx.rollback()
+        return False, f"❌ Produkt konnte nicht angelegt werden: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def run_dosierung_nachlauf(config, chunk_size=NACHLAUF_CHUNK):
+    """
+    Kopiert die Düngermengen des nächsten Blocks alter Protokollzeilen (ID-Bereich) aus den
+    früheren Spalten ins Langformat. Eine kurze Transaktion je Aufruf, damit der Betrieb
+    weiterläuft; wiederholte oder parallele Aufrufe schaden nicht, der Stand steht in der
+    Nachlauf-Tabelle. Nach dem letzten Block lesen die Ansichten nur noch das Langformat.
+    Gibt (True, Anzahl noch offener IDs) oder (False, Fehlermeldung) zurück.
+    """
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return False, result
+    cursor = cnx.cursor()
+    insert_ignore = "INSERT OR IGNORE" if cnx.dialect == BACKEND_SQLITE else "INSERT IGNORE"
+    try:
+        stand = nachlauf_stand(cursor)
+        if stand is None or stand[0] >= stand[1]:
+            return True, 0
+        von, ziel = stand
+        bis = min(von + chunk_size, ziel)
+        for nid, kuerzel, _, _ in NAEHRSTOFF_KATALOG:
+            cursor.execute(
+                f"{insert_ignore} INTO {PROTOKOLL_DOSIERUNG_TABLE_NAME} (protokoll_id, naehrstoff_id, menge) "
+                f"SELECT id, %s, {kuerzel} FROM {PROTOKOLL_TABLE_NAME} "
+                f"WHERE id > %s AND id <= %s AND {kuerzel} IS NOT NULL",
+                (nid, von, bis)
+            )
+        cursor.execute(f"UPDATE {NACHLAUF_TABLE_NAME} SET letzte_id = %s WHERE name = %s AND letzte_id = %s",
+                       (bis, NACHLAUF_DOSIERUNG, von))
+        if bis >= ziel:
+            create_views(cursor, cnx.dialect)
+        cnx.commit()
+        return True, ziel - bis
+    except DB_ERRORS as err:
+        cnx.rollback()
+        return False, f"❌ Fehler beim Umkopieren der Düngermengen: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def rebuild_anomaly_state(config, only_pending=False, chunk_size=NACHLAUF_CHUNK):
+    """
+    Baut Auffälligkeitszustände und -meldungen aus dem ganzen Protokoll samt Archiv neu auf: ein Durchlauf
+    in ID-Reihenfolge, blockweise gelesen, in einer Transaktion (danach stimmen Zustand und
+    laufende Erkennung wieder überein, z.B. nach geänderten Schwellen). Mit only_pending nur,
+    wenn der Aufbau vorgemerkt ist (nach der Migration).
+    Gibt (True, Meldung oder None) oder (False, Fehlermeldung) zurück.
+    """
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return False, result
+    cursor = cnx.cursor()
+    try:
+        if only_pending and (not ANOMALY_DETECTOR.enabled or nachlauf_stand(cursor, NACHLAUF_ANOMALIE) is None):
+            return True, None
+        cursor.execute(f"DELETE FROM {ANOMALIE_ZUSTAND_TABLE_NAME}")
+        cursor.execute(f"DELETE FROM {ANOMALIE_TABLE_NAME}")
+        felder = len(ANOMALY_FIELDS)
+        spalten = ", ".join(["id", "pflanzen_name", "woche", *ANOMALY_FIELDS])
+        # Laufender Bestand und Archiv in gemeinsamer ID-Reihenfolge, aus jeder Quelle höchstens ein Block
+        quelle = (f"SELECT * FROM (SELECT {spalten} FROM {PROTOKOLL_TABLE_NAME} WHERE id > %s AND {NICHT_GELOESCHT} "
+                  f"ORDER BY id LIMIT %s) h UNION ALL "
+                  f"SELECT * FROM (SELECT {spalten} FROM {ARCHIV_TABLE_NAME} WHERE id > %s ORDER BY id LIMIT %s) a")
+        zustand, letzte_id, gelesen, gemeldet = {}, 0, 0, 0
+        while True:
+            cursor.execute(
+                f"SELECT p.id, p.pflanzen_name, {', '.join('p.' + f for f in ANOMALY_FIELDS)}, "
+                f"{', '.join('s.' + f for f in ANOMALY_FIELDS)} FROM ({quelle}) p "
+                f"LEFT JOIN {PLANUNG_TABLE_NAME} s ON s.pflanzen_name = p.pflanzen_name AND s.woche = p.woche "
+                f"ORDER BY p.id LIMIT %s", (letzte_id, chunk_size, letzte_id, chunk_size, chunk_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            meldungen = []
+            for row in rows:
+                meldungen += ANOMALY_DETECTOR.observe(zustand, row[0], row[1],
+                                                      dict(zip(ANOMALY_FIELDS, row[2:2 + felder])),
+                                                      dict(zip(ANOMALY_FIELDS, row[2 + felder:])))
+            _write_anomalies(cursor, cnx.dialect, {}, meldungen)
+            letzte_id, gelesen, gemeldet = rows[-1][0], gelesen + len(rows), gemeldet + len(meldungen)
+        _write_anomalies(cursor, cnx.dialect, zustand, [])
+        cursor.execute(f"DELETE FROM {NACHLAUF_TABLE_NAME} WHERE name = %s", (NACHLAUF_ANOMALIE,))
+        cnx.commit()
+        return True, f"✅ {gelesen} Messungen ausgewertet, {gemeldet} Auffälligkeit(en)."
+    except DB_ERRORS as err:
+        cnx.rollback()
+        return False, f"❌ Fehler beim Aufbau der Auffälligkeitserkennung: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def fetch_anomalies(config, limit=DEFAULT_PAGE_SIZE):
+    """
+    Neueste Auffälligkeiten mit Pflanze, Woche und Zeitpunkt der Messung (nur laufender Bestand;
+    die Meldungen archivierter Grows bleiben gespeichert). Gibt (rows, column_names) zurück.
+    """
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return None, result
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(
+            f"SELECT a.protokoll_id, p.pflanzen_name, p.woche, p.erstellungsdatum, a.feld, a.wert, a.soll, "
+            f"a.z_wert, a.grund FROM {ANOMALIE_TABLE_NAME} a JOIN {PROTOKOLL_TABLE_NAME} p ON p.id = a.protokoll_id "
+            f"WHERE p.{NICHT_GELOESCHT} ORDER BY a.protokoll_id DESC LIMIT %s", (limit,)
+        )
+        return cursor.fetchall(), [c[0] for c in cursor.description]
+    except DB_ERRORS as err:
+        return None, f"❌ Fehler beim Laden der Auffälligkeiten: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def fetch_soll_ist_rows(config, fields, filters=None):
+    """
+    Verknüpft alle Ist-Datensätze mit ihrem Plan (gleicher Name und Woche) in einer Abfrage.
+    Spalten: id, pflanzen_name, woche, erstellungsdatum, je Feld ist_<feld> und soll_<feld>.
+    Datensätze ohne Plan fehlen im Ergebnis; mit filters['archiv'] zählen archivierte Grows mit.
+    Gibt (rows, column_names) oder (None, Fehlermeldung) zurück.
+    """
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return None, result
+    bedingung, params = build_protokoll_filter(filters, alias="i")
+    spalten = ", ".join([f"i.{f} AS ist_{f}" for f in fields] + [f"s.{f} AS soll_{f}" for f in fields])
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(
+            f"SELECT i.id, i.pflanzen_name, i.woche, i.erstellungsdatum, {spalten} "
+            f"FROM {protokoll_quelle(filters)} i JOIN {PLANUNG_VIEW_NAME} s "
+            f"ON s.pflanzen_name = i.pflanzen_name AND s.woche = i.woche"
+            + (f" WHERE {bedingung}" if bedingung else ""),
+            tuple(params)
+        )
+        return cursor.fetchall(), [c[0] for c in cursor.description]
+    except DB_ERRORS as err:
+        return None, f"❌ Fehler beim Soll/Ist-Abgleich: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def fetch_protokoll_names(config, archiv=False):
+    """Namen aller Pflanzen mit Messungen, alphabetisch (nutzt den Index auf pflanzen_name); mit `archiv` auch archivierte."""
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return None, result
+    cursor = cnx.cursor()
+    try:
+        sql = f"SELECT DISTINCT pflanzen_name FROM {PROTOKOLL_TABLE_NAME} WHERE {NICHT_GELOESCHT}"
+        if archiv:
+            sql += f" UNION SELECT DISTINCT pflanzen_name FROM {ARCHIV_TABLE_NAME}"
+        cursor.execute(f"{sql} ORDER BY pflanzen_name ASC")
+        return [row[0] for row in cursor.fetchall()], None
+    except DB_ERRORS as err:
+        return None, f"❌ Fehler beim Laden der Pflanzen: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+def _epoch_sql(dialect, column):
+    """Sekunden seit 1970-01-01 eines (zeitzonenlosen) Zeitstempels, in beiden Dialekten gleich gerechnet."""
+    if dialect == BACKEND_SQLITE:
+        return f"((julianday({column}) - 2440587.5) * 86400.0)"
+    return f"TIMESTAMPDIFF(SECOND, '1970-01-01', {column})"
+
+
+def _window_sql(dialect, column):
+    """Nummer des Zeitfensters eines Zeitstempels; Fensterbreite in Sekunden als Parameter."""
+    if dialect == BACKEND_SQLITE:
+        return f"CAST({_epoch_sql(dialect, column)} AS INTEGER) / %s"
+    return f"{_epoch_sql(dialect, column)} DIV %s"
+
+
+@timed
+def fetch_zeitreihe(config, plant_name, fields, von=None, bis=None, fenster_s=86400, archiv=False):
+    """
+    Zeitreihe einer Pflanze, zu Fenstern von `fenster_s` Sekunden zusammengefasst (GROUP BY in der DB).
+    Je Fenster: zeit (mittlere Sekunden seit 1970, zeitzonenlos), anzahl und je Feld
+    <feld>_mittel, <feld>_min, <feld>_max sowie <feld>_soll (Mittel der Planwerte der Wochen im Fenster).
+    von/bis (datetime, bis exklusiv) begrenzen den Zeitraum; ohne sie wird der ganze Verlauf gelesen.
+    Mit `archiv` zählen archivierte Messungen mit.
+    Gibt (rows, column_names) oder (None, Fehlermeldung) zurück.
+    """
+    unbekannt = [f for f in fields if f not in PLANNING_FIELDS or f == "phase"]
+    if unbekannt:
+        return None, f"❌ Keine Zeitreihe für: {', '.join(unbekannt)}"
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return None, result
+    cursor = cnx.cursor()
+    try:
+        # Direkt auf den Basistabellen statt über die Ansichten: nur die Mengen der gewählten
+        # Felder werden nachgeschlagen, und der Plan wird nicht als Ganzes materialisiert.
+        stand = nachlauf_stand(cursor)
+        nachlauf_offen = stand is not None and stand[0] < stand[1]
+        ids = {kuerzel: nid for nid, kuerzel, _, _ in NAEHRSTOFF_KATALOG}
+        spalten, joins = [], []
+        for f in fields:
+            if f in ids:
+                nid = ids[f]
+                joins.append(f"LEFT JOIN {PROTOKOLL_DOSIERUNG_TABLE_NAME} di{nid} "
+                             f"ON di{nid}.protokoll_id = i.id AND di{nid}.naehrstoff_id = {nid}")
+                joins.append(f"LEFT JOIN {PLANUNG_DOSIERUNG_TABLE_NAME} ds{nid} ON ds{nid}.pflanzen_name = "
+                             f"i.pflanzen_name AND ds{nid}.woche = i.woche AND ds{nid}.naehrstoff_id = {nid}")
+                # Noch nicht umkopierte Altzeilen wie in der Ansicht aus der früheren Spalte
+                ist = f"COALESCE(di{nid}.menge, i.{f})" if nachlauf_offen else f"di{nid}.menge"
+                soll = f"ds{nid}.menge"
+            else:
+                ist, soll = f"i.{f}", f"s.{f}"
+            spalten += [f"AVG({ist}) AS {f}_mittel", f"MIN({ist}) AS {f}_min", f"MAX({ist}) AS {f}_max",
+                        f"AVG({soll}) AS {f}_soll"]
+        bedingungen, params = ["pflanzen_name = %s"], [plant_name]
+        if von is not None:
+            bedingungen.append("erstellungsdatum >= %s"); params.append(von)
+        if bis is not None:
+            bedingungen.append("erstellungsdatum < %s"); params.append(bis)
+        if archiv:
+            # Beide Quellen mit den Bedingungen auf ihrem eigenen Index, nur die benötigten Spalten
+            bedingung = " AND ".join(bedingungen)
+            basis = ["id", "pflanzen_name", "woche", "erstellungsdatum"] + [f for f in fields if f not in ids]
+            alt = [f for f in fields if f in ids] if nachlauf_offen else []
+            quelle = (f"(SELECT {', '.join(basis + alt)} FROM {PROTOKOLL_TABLE_NAME} "
+                      f"WHERE {bedingung} AND {NICHT_GELOESCHT} UNION ALL "
+                      f"SELECT {', '.join(basis + [f'NULL AS {f}' for f in alt])} FROM {ARCHIV_TABLE_NAME} "
+                      f"WHERE {bedingung}) i")
+            where, params = "", params * 2
+        else:
+            quelle = f"{PROTOKOLL_TABLE_NAME} i"
+            where = " WHERE " + " AND ".join(["i." + b for b in bedingungen] + [f"i.{NICHT_GELOESCHT}"])
+        cursor.execute(
+            f"SELECT {_window_sql(cnx.dialect, 'i.erstellungsdatum')} AS fenster, "
+            f"AVG({_epoch_sql(cnx.dialect, 'i.erstellungsdatum')}) AS zeit, COUNT(*) AS anzahl, {', '.join(spalten)} "
+            f"FROM {quelle} LEFT JOIN {PLANUNG_TABLE_NAME} s "
+            f"ON s.pflanzen_name = i.pflanzen_name AND s.woche = i.woche {' '.join(joins)}"
+            f"{where} GROUP BY fenster ORDER BY fenster",
+            (max(1, int(fenster_s)), *params)
+        )
+        return cursor.fetchall(), [c[0] for c in cursor.description]
+    except DB_ERRORS as err:
+        return None, f"❌ Fehler beim Laden der Zeitreihe: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def fetch_zeitraum(config, plant_name, archiv=False):
+    """(erste, letzte) Messung einer Pflanze als datetime, (None, None) ohne Messungen oder bei Fehlern."""
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return None, None
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"SELECT MIN(erstellungsdatum), MAX(erstellungsdatum) FROM {PROTOKOLL_TABLE_NAME} "
+                       f"WHERE pflanzen_name = %s AND {NICHT_GELOESCHT}", (plant_name,))
+        werte = [cursor.fetchone()]
+        if archiv:
+            cursor.execute(f"SELECT MIN(erstellungsdatum), MAX(erstellungsdatum) FROM {ARCHIV_TABLE_NAME} "
+                           f"WHERE pflanzen_name = %s", (plant_name,))
+            werte.append(cursor.fetchone())
+        # SQLite liefert Aggregate über Zeitstempel als Text
+        werte = [[datetime.fromisoformat(v) if isinstance(v, str) else v for v in w] for w in werte]
+        erste = [w[0] for w in werte if w[0] is not None]
+        letzte = [w[1] for w in werte if w[1] is not None]
+        return (min(erste), max(letzte)) if erste else (None, None)
+    except DB_ERRORS:
+        return None, None
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def fetch_all_data(config, archiv=False):
+    """Holt alle Datensätze aus dem Protokoll für die Anzeige (mit `archiv` auch archivierte)."""
     cnx, result = get_db_connection(config, with_db=True)
     if cnx is None:
         return None, result
         
     cursor = cnx.cursor()
     try:
-        cursor.execute(f"SELECT * FROM {PROTOKOLL_TABLE_NAME} ORDER BY erstellungsdatum DESC")
+        cursor.execute(f"SELECT * FROM {GESAMT_VIEW_NAME if archiv else PROTOKOLL_VIEW_NAME} ORDER BY erstellungsdatum DESC")
+        data = cursor.fetchall()
+        column_names = [i[0] for i in cursor.description]
+        cursor.close()
+        cnx.close()
+        return data, column_names
+    except DB_ERRORS as err:
+        cursor.close()
+        cnx.close()
+        return None, f"❌ Fehler beim Abrufen der Daten: {error_message(err)}"
+
+
+def build_protokoll_filter(filters, alias=None):
+    """
+    Übersetzt Filter für das Protokoll in eine parametrisierte WHERE-Bedingung.
+    Unterstützte Schlüssel: pflanzen_name, phase, woche_von, woche_bis, datum_von, datum_bis
+    (Datumsgrenzen inklusive; ein reines Datum bei datum_bis zählt den ganzen Tag mit)
+    sowie ph_ausserhalb / ec_ausserhalb = (min, max): nur Messungen außerhalb dieses Bereichs.
+    'archiv': True ist keine Bedingung, sondern wählt die Quelle (siehe protokoll_quelle).
+    `alias` qualifiziert die Spalten, z.B. in einem JOIN.
+    Gibt (sql, params) zurück; sql ist leer, wenn kein Filter gesetzt ist.
+    """
+    p = f"{alias}." if alias else ""
+    bedingungen, params = [], []
+    filters = filters or {}
+    if filters.get('pflanzen_name'):
+        bedingungen.append(f"{p}pflanzen_name = %s"); params.append(filters['pflanzen_name'])
+    if filters.get('phase'):
+        bedingungen.append(f"{p}phase = %s"); params.append(filters['phase'])
+    if filters.get('woche_von') is not None:
+        bedingungen.append(f"{p}woche >= %s"); params.append(int(filters['woche_von']))
+    if filters.get('woche_bis') is not None:
+        bedingungen.append(f"{p}woche <= %s"); params.append(int(filters['woche_bis']))
+    if filters.get('datum_von') is not None:
+        bedingungen.append(f"{p}erstellungsdatum >= %s"); params.append(filters['datum_von'])
+    if filters.get('datum_bis') is not None:
+        bis = filters['datum_bis']
+        if isinstance(bis, date) and not isinstance(bis, datetime):
+            bedingungen.append(f"{p}erstellungsdatum < %s"); params.append(bis + timedelta(days=1))
+        else:
+            bedingungen.append(f"{p}erstellungsdatum <= %s"); params.append(bis)
+    for key, spalte in (('ph_ausserhalb', 'ph_wert_ziel'), ('ec_ausserhalb', 'ec_wert')):
+        if filters.get(key) is not None:
+            untergrenze, obergrenze = filters[key]
+            bedingungen.append(f"({p}{spalte} < %s OR {p}{spalte} > %s)")
+            params += [float(untergrenze), float(obergrenze)]
+    return " AND ".join(bedingungen), params
+
+
+def protokoll_quelle(filters):
+    """Ansicht für `filters`: nur der laufende Bestand oder mit filters['archiv'] auch das Archiv."""
+    return GESAMT_VIEW_NAME if (filters or {}).get('archiv') else PROTOKOLL_VIEW_NAME
+
+
+def _seek_condition(column, descending, key):
+    """
+    Keyset-Bedingung für "Zeilen hinter `key` = (wert, id)" in der Reihenfolge column, id.
+    NULL gilt wie bei MySQL und SQLite als kleinster Wert (aufsteigend vorn, absteigend hinten).
+    """
+    wert, rid = key
+    op = "<" if descending else ">"
+    if column == "id":
+        return f"id {op} %s", [rid]
+    if column in NOT_NULL_COLUMNS:
+        return f"({column} {op} %s OR ({column} = %s AND id {op} %s))", [wert, wert, rid]
+    if wert is None:
+        if descending:
+            return f"({column} IS NULL AND id < %s)", [rid]
+        return f"({column} IS NOT NULL OR ({column} IS NULL AND id > %s))", [rid]
+    bedingung = f"{column} {op} %s OR ({column} = %s AND id {op} %s)"
+    if descending:
+        bedingung += f" OR {column} IS NULL"
+    return f"({bedingung})", [wert, wert, rid]
+
+
+def build_protokoll_query(filters=None, sort=None, after=None, before=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Baut die parametrisierte Seitenabfrage der Datenansicht aus Filtern (wie
+    build_protokoll_filter) und Sortierung `sort` = (spalte, absteigend).
+    after/before sind Seitenschlüssel (wert, id) wie bei fetch_data_page. Gibt (sql, params) zurück.
+    Mit filters['archiv'] liest jede Quelle ihre Seite über den eigenen Index, sortiert wird nur
+    die Vereinigung beider Seiten.
+    """
+    spalte, absteigend = sort or DEFAULT_SORT
+    if spalte not in SORTABLE_COLUMNS:
+        raise ValueError(f"Nach '{spalte}' kann nicht sortiert werden.")
+    bedingung, params = build_protokoll_filter(filters)
+    bedingungen = [bedingung] if bedingung else []
+    if before is not None:
+        # Rückwärts lesen: umgekehrte Reihenfolge, der Aufrufer dreht das Ergebnis wieder um
+        absteigend = not absteigend
+    schluessel = after if after is not None else before
+    if schluessel is not None:
+        seek, seek_params = _seek_condition(spalte, absteigend, schluessel)
+        bedingungen.append(seek); params += seek_params
+    richtung = "DESC" if absteigend else "ASC"
+    where = " WHERE " + " AND ".join(bedingungen) if bedingungen else ""
+    if spalte == "id":
+        order = f" ORDER BY id {richtung}"
+    else:
+        order = f" ORDER BY {spalte} {richtung}, id {richtung}"
+    if (filters or {}).get('archiv'):
+        teile = [f"SELECT * FROM (SELECT * FROM {view}{where}{order} LIMIT %s) t{n}"
+                 for n, view in enumerate((PROTOKOLL_VIEW_NAME, ARCHIV_VIEW_NAME))]
+        query = f"SELECT * FROM ({' UNION ALL '.join(teile)}) u{order} LIMIT %s"
+        return query, [*params, int(limit), *params, int(limit), int(limit)]
+    query = f"SELECT * FROM {PROTOKOLL_VIEW_NAME}{where}{order} LIMIT %s"
+    params.append(int(limit))
+    return query, params
+
+
+@timed
+def fetch_data_page(config, after=None, before=None, limit=DEFAULT_PAGE_SIZE, filters=None, sort=None):
+    """
+    Holt eine Seite des Protokolls per Keyset-Pagination, standardmäßig neueste Einträge zuerst.
+    Der Seitenschlüssel ist das Paar (Sortierwert, id) einer Zeile:
+    - after:  Schlüssel der letzten bereits geladenen Zeile -> die folgenden Zeilen
+    - before: Schlüssel der ersten bereits geladenen Zeile -> die direkt davor liegenden Zeilen
+    Ohne Schlüssel wird die erste Seite geliefert. Die Abfrage kostet dank
+    Schlüsselvergleich unabhängig von der Position in der Tabelle gleich viel (kein OFFSET).
+    `filters` wie bei build_protokoll_filter, `sort` = (spalte, absteigend); beides wird
+    in SQL übersetzt, der Server liefert nur passende Zeilen.
+    Gibt (rows, column_names) in Anzeigereihenfolge oder (None, Fehlermeldung) zurück.
+    """
+    try:
+        query, params = build_protokoll_query(filters, sort, after, before, limit)
+    except ValueError as e:
+        return None, f"❌ {e}"
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return None, result
+
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(query, tuple(params))
         data = cursor.fetchall()
         column_names = [i[0] for i in cursor.description]
         cursor.close()
         cnx.close()
+        if before is not None:
+            # Rückwärts gelesene Seite wieder in Anzeigereihenfolge bringen
+            data.reverse()
         return data, column_names
-    except mysql.connector.Error as err:
+    except DB_ERRORS as err:
         cursor.close()
         cnx.close()
-        return None, f"❌ Fehler beim Abrufen der Daten: {err.msg}"
+        return None, f"❌ Fehler beim Abrufen der Daten: {error_message(err)}"
+
+
+def log_changes(cursor, record_ids, aktion):
+    """Vermerkt Änderungen/Löschungen im Änderungsprotokoll (innerhalb der laufenden Transaktion)."""
+    cursor.executemany(
+        f"INSERT INTO {CHANGE_LOG_TABLE_NAME} (datensatz_id, aktion) VALUES (%s, %s)",
+        [(rid, aktion) for rid in record_ids]
+    )
+
+
+@timed
+def fetch_changes_since(config, marks=None, limit=DELTA_MAX_ROWS, filters=None):
+    """
+    Liefert alles, was sich seit den Marken `marks` = (max_id, max_log_id) geändert hat.
+    Ist nichts passiert, kostet das genau eine kleine Abfrage auf zwei Primärschlüssel.
+    Gibt (True, changes) oder (False, Fehlermeldung) zurück. `changes` enthält:
+      marks        neue Marken für den nächsten Aufruf
+      columns      Spaltennamen der Zeilen
+      neu          neu hinzugekommene Zeilen (id > max_id)
+      geaendert    aktualisierte Zeilen
+      geloescht    IDs gelöschter Datensätze
+      neu_laden    True, wenn ein Delta nicht ausreicht (zu viele Änderungen / Protokoll bereinigt)
+    Ohne `marks` werden nur die aktuellen Marken ermittelt. Mit `filters` (wie bei
+    build_protokoll_filter) kommen nur passende Zeilen zurück; geänderte Zeilen, die nicht
+    mehr passen, stehen unter `geloescht`, ebenso archivierte, solange filters['archiv'] fehlt.
+    """
+    bedingung, filter_params = build_protokoll_filter(filters)
+    und_filter = f" AND {bedingung}" if bedingung else ""
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return False, result
+
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(
+            f"SELECT (SELECT COALESCE(MAX(id), 0) FROM {PROTOKOLL_TABLE_NAME}), "
+            f"(SELECT COALESCE(MAX(log_id), 0) FROM {CHANGE_LOG_TABLE_NAME}), "
+            f"(SELECT MIN(log_id) FROM {CHANGE_LOG_TABLE_NAME})"
+        )
+        max_id, max_log_id, min_log_id = cursor.fetchone()
+        changes = {'marks': (max_id, max_log_id), 'columns': [], 'neu': [], 'geaendert': [],
+                   'geloescht': [], 'neu_laden': False}
+
+        if marks is None or (max_id, max_log_id) == tuple(marks):
+            return True, changes
 
+        alt_id, alt_log_id = marks
+        if min_log_id is not None and alt_log_id + 1 < min_log_id and max_log_id > alt_log_id:
+            # Protokoll wurde seit dem letzten Abgleich bereinigt, Lücke nicht rekonstruierbar
+            changes['neu_laden'] = True
+            return True, changes
 
+        if max_id > alt_id:
+            cursor.execute(f"SELECT * FROM {PROTOKOLL_VIEW_NAME} WHERE id > %s{und_filter} ORDER BY id LIMIT %s",
+                           (alt_id, *filter_params, limit + 1))
+            changes['neu'] = cursor.fetchall()
+            changes['columns'] = [i[0] for i in cursor.description]
+            if len(changes['neu']) > limit:
+                changes['neu_laden'] = True
+                return True, changes
+
+        if max_log_id > alt_log_id:
+            cursor.execute(f"SELECT datensatz_id, aktion FROM {CHANGE_LOG_TABLE_NAME} WHERE log_id > %s ORDER BY log_id",
+                           (alt_log_id,))
+            letzte_aktion = {}
+            for rid, aktion in cursor.fetchall():
+                letzte_aktion[rid] = aktion
+            entfernt = (AKTION_GELOESCHT,) if (filters or {}).get('archiv') else (AKTION_GELOESCHT, AKTION_ARCHIVIERT)
+            changes['geloescht'] = [rid for rid, a in letzte_aktion.items() if a in entfernt]
+            if len(changes['geloescht']) > limit:
+                # z.B. nach dem Archivieren ganzer Grows: Neuladen ist billiger als Zeile für Zeile entfernen
+                changes['neu_laden'] = True
+                return True, changes
+            geaendert = [rid for rid, a in letzte_aktion.items() if a == AKTION_GEAENDERT and rid <= alt_id]
+            if len(geaendert) > limit:
+                changes['neu_laden'] = True
+                return True, changes
+            if geaendert:
+                platzhalter = ", ".join(["%s"] * len(geaendert))
+                cursor.execute(f"SELECT * FROM {PROTOKOLL_VIEW_NAME} WHERE id IN ({platzhalter}){und_filter}",
+                               (*geaendert, *filter_params))
+                changes['geaendert'] = cursor.fetchall()
+                changes['columns'] = [i[0] for i in cursor.description]
+                if bedingung:
+                    # Durch die Änderung aus dem Filter gefallen -> aus der Ansicht entfernen
+                    passend = {row[0] for row in changes['geaendert']}
+                    changes['geloescht'] += [rid for rid in geaendert if rid not in passend]
+        return True, changes
+    except DB_ERRORS as err:
+        return False, f"❌ Fehler beim Abrufen der Änderungen: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def prune_change_log(config, keep_days=CHANGE_LOG_KEEP_DAYS):
+    """Entfernt alte Einträge aus dem Änderungsprotokoll."""
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return False, result
+    cursor = cnx.cursor()
+    try:
+        # Stichtag clientseitig berechnen, das funktioniert mit jedem Backend
+        cursor.execute(f"DELETE FROM {CHANGE_LOG_TABLE_NAME} WHERE zeitpunkt < %s",
+                       (datetime.now() - timedelta(days=int(keep_days)),))
+        cnx.commit()
+        return True, cursor.rowcount
+    except DB_ERRORS as err:
+        return False, f"❌ Fehler beim Bereinigen des Änderungsprotokolls: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def prune_idempotency_keys(config, keep_days=IDEMPOTENZ_KEEP_DAYS):
+    """Entfernt Schlüssel von Journal-Einträgen, die längst übertragen sind."""
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return False, result
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {IDEMPOTENZ_TABLE_NAME} WHERE angelegt < %s",
+                       (datetime.now() - timedelta(days=int(keep_days)),))
+        cnx.commit()
+        return True, cursor.rowcount
+    except DB_ERRORS as err:
+        return False, f"❌ Fehler beim Bereinigen der Journal-Schlüssel: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+def _soft_delete(config, where, params, beschreibung):
+    """
+    Markiert alle nicht gelöschten Zeilen, die `where` erfüllen, mit einer Anweisung als gelöscht
+    (ein neuer Löschvorgang, eine Transaktion). Gibt (True, (loeschung_id, anzahl)) zurück.
+    """
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return False, result
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"INSERT INTO {LOESCHUNG_TABLE_NAME} (zeitpunkt, beschreibung) VALUES (%s, %s)",
+                       (datetime.now().replace(microsecond=0), beschreibung[:200]))
+        loeschung_id = cursor.lastrowid
+        cursor.execute(f"UPDATE {PROTOKOLL_TABLE_NAME} SET loeschung_id = %s WHERE {where} AND {NICHT_GELOESCHT}",
+                       (loeschung_id, *params))
+        anzahl = cursor.rowcount
+        if anzahl == 0:
+            cnx.rollback()
+            return True, (None, 0)
+        cursor.execute(f"UPDATE {LOESCHUNG_TABLE_NAME} SET anzahl = %s WHERE id = %s", (anzahl, loeschung_id))
+        # Andere Clients entfernen die Zeilen beim nächsten Delta-Abgleich
+        cursor.execute(f"INSERT INTO {CHANGE_LOG_TABLE_NAME} (datensatz_id, aktion) "
+                       f"SELECT id, %s FROM {PROTOKOLL_TABLE_NAME} WHERE loeschung_id = %s",
+                       (AKTION_GELOESCHT, loeschung_id))
+        cnx.commit()
+        return True, (loeschung_id, anzahl)
+    except DB_ERRORS as err:
+        cnx.rollback()
+        return False, f"❌ Fehler beim Löschen: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def delete_data_by_ids(config, record_ids):
+    """
+    Verschiebt die Datensätze `record_ids` in den Papierkorb (ein UPDATE, eine Transaktion).
+    Gibt (True, (loeschung_id, anzahl)) oder (False, Fehlermeldung) zurück; mit der
+    loeschung_id macht undo_delete den Vorgang rückgängig.
+    """
+    ids = sorted({int(rid) for rid in record_ids})
+    if not ids:
+        return True, (None, 0)
+    platzhalter = ", ".join(["%s"] * len(ids))
+    beschreibung = f"ID {ids[0]}" if len(ids) == 1 else f"{len(ids)} ausgewählte Datensätze"
+    return _soft_delete(config, f"id IN ({platzhalter})", ids, beschreibung)
+
+
+@timed
+def delete_data_where(config, filters):
+    """
+    Verschiebt alle Datensätze, die `filters` (wie bei build_protokoll_filter, z.B. Pflanze,
+    Wochen- oder Datumsbereich) erfüllen, in den Papierkorb. Ohne Filter wird nichts gelöscht,
+    archivierte Messungen bleiben unberührt. Rückgabe wie delete_data_by_ids.
+    """
+    bedingung, params = build_protokoll_filter(filters)
+    if not bedingung:
+        return False, "Ohne Filter wird nicht gelöscht."
+    beschreibung = ", ".join(f"{k}={v}" for k, v in filters.items() if v not in (None, "") and k != 'archiv')
+    return _soft_delete(config, bedingung, params, beschreibung)
+
+
+@timed
 def delete_data_by_id(config, record_id):
-    """Löscht einen spezifischen Datensatz anhand der ID."""
+    """Löscht einen spezifischen Datensatz anhand der ID (vorläufig, siehe delete_data_by_ids)."""
+    ok, result = delete_data_by_ids(config, [record_id])
+    if not ok:
+        return False, result
+    if result[1] == 0:
+        return False, f"Datensatz mit ID {record_id} nicht gefunden."
+    return True, f"✅ Datensatz (ID: {record_id}) erfolgreich gelöscht."
+
+
+@timed
+def undo_delete(config, loeschung_id):
+    """Holt die Zeilen eines Löschvorgangs aus dem Papierkorb zurück, solange sie noch nicht endgültig gelöscht sind."""
     cnx, result = get_db_connection(config, with_db=True)
     if cnx is None:
         return False, result
-        
     cursor = cnx.cursor()
     try:
-        query = f"DELETE FROM {PROTOKOLL_TABLE_NAME} WHERE id = %s"
-        cursor.execute(query, (record_id,))
+        cursor.execute(f"INSERT INTO {CHANGE_LOG_TABLE_NAME} (datensatz_id, aktion) "
+                       f"SELECT id, %s FROM {PROTOKOLL_TABLE_NAME} WHERE loeschung_id = %s",
+                       (AKTION_GEAENDERT, loeschung_id))
+        cursor.execute(f"UPDATE {PROTOKOLL_TABLE_NAME} SET loeschung_id = NULL WHERE loeschung_id = %s",
+                       (loeschung_id,))
+        anzahl = cursor.rowcount
+        cursor.execute(f"DELETE FROM {LOESCHUNG_TABLE_NAME} WHERE id = %s", (loeschung_id,))
         cnx.commit()
-        rows_affected = cursor.rowcount
+        if anzahl == 0:
+            return False, "Nichts wiederherzustellen (bereits endgültig gelöscht?)."
+        return True, f"↩️ {anzahl} Datensatz/Datensätze wiederhergestellt."
+    except DB_ERRORS as err:
+        cnx.rollback()
+        return False, f"❌ Fehler beim Wiederherstellen: {error_message(err)}"
+    finally:
         cursor.close()
         cnx.close()
-        
-        if rows_affected > 0:
-            return True, f"✅ Datensatz (ID: {record_id}) erfolgreich gelöscht."
-        else:
-            return False, f"Datensatz mit ID {record_id} nicht gefunden."
-            
-    except mysql.connector.Error as err:
+
+
+@timed
+def fetch_deletions(config, limit=50):
+    """Letzte Löschvorgänge im Papierkorb: [(id, zeitpunkt, beschreibung, anzahl), ...], neueste zuerst."""
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return None, result
+    cursor = cnx.cursor()
+    try:
+        cursor.execute(f"SELECT id, zeitpunkt, beschreibung, anzahl FROM {LOESCHUNG_TABLE_NAME} "
+                       f"ORDER BY id DESC LIMIT %s", (limit,))
+        return cursor.fetchall(), None
+    except DB_ERRORS as err:
+        return None, f"❌ Fehler beim Laden des Papierkorbs: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
+def purge_deleted(config, keep_days=PAPIERKORB_KEEP_DAYS, chunk_size=PURGE_CHUNK):
+    """
+    Löscht bis zu `chunk_size` Zeilen aus Löschvorgängen, die älter als keep_days sind, endgültig
+    (samt Düngermengen und Auffälligkeiten). Eine kurze Transaktion je Aufruf; der Aufrufer
+    wiederholt mit Pausen, solange noch Zeilen offen sind. Vollständig geleerte Vorgänge verschwinden.
+    Gibt (True, True wenn noch Zeilen offen sind) oder (False, Fehlermeldung) zurück.
+    """
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return False, result
+    cursor = cnx.cursor()
+    try:
+        stichtag = datetime.now() - timedelta(days=float(keep_days))
+        cursor.execute(f"SELECT id FROM {LOESCHUNG_TABLE_NAME} WHERE zeitpunkt <= %s", (stichtag,))
+        vorgaenge = [row[0] for row in cursor.fetchall()]
+        if not vorgaenge:
+            return True, False
+        platzhalter = ", ".join(["%s"] * len(vorgaenge))
+        cursor.execute(f"SELECT id FROM {PROTOKOLL_TABLE_NAME} WHERE loeschung_id IN ({platzhalter}) LIMIT %s",
+                       (*vorgaenge, chunk_size))
+        ids = [row[0] for row in cursor.fetchall()]
+        if ids:
+            id_platzhalter = ", ".join(["%s"] * len(ids))
+            cursor.execute(f"DELETE FROM {PROTOKOLL_DOSIERUNG_TABLE_NAME} WHERE protokoll_id IN ({id_platzhalter})", ids)
+            cursor.execute(f"DELETE FROM {ANOMALIE_TABLE_NAME} WHERE protokoll_id IN ({id_platzhalter})", ids)
+            cursor.execute(f"DELETE FROM {PROTOKOLL_TABLE_NAME} WHERE id IN ({id_platzhalter})", ids)
+        if len(ids) < chunk_size:
+            cursor.execute(f"DELETE FROM {LOESCHUNG_TABLE_NAME} WHERE id IN ({platzhalter})", vorgaenge)
+        cnx.commit()
+        return True, len(ids) == chunk_size
+    except DB_ERRORS as err:
+        cnx.rollback()
+        return False, f"❌ Fehler beim Leeren des Papierkorbs: {error_message(err)}"
+    finally:
         cursor.close()
         cnx.close()
-        return False, f"❌ Fehler beim Löschen des Datensatzes: {err.msg}"
 
 
+@timed
+def archive_protokoll(config, after_days=ARCHIV_NACH_TAGEN, chunk_size=ARCHIV_CHUNK):
+    """
+    Verschiebt bis zu `chunk_size` Messungen abgeschlossener Grows (Pflanzen ohne Messung seit
+    after_days Tagen) ins Archiv: kopieren, im Änderungsprotokoll vermerken, löschen, in einer
+    kurzen Transaktion. Der Aufrufer wiederholt mit Pausen, solange noch Zeilen offen sind; ein
+    Abbruch dazwischen schadet nicht. So bleibt der laufende Bestand und mit ihm jede Abfrage
+    darauf gleich groß, egal wie viele Jahre Verlauf sich ansammeln.
+    Ob ein Grow abgeschlossen ist, entscheiden nur nicht gelöschte Messungen. Zeilen im Papierkorb
+    bleiben im laufenden Bestand, bis sie endgültig gelöscht werden; macht der Nutzer die Löschung
+    rückgängig, erscheinen sie dort wieder, der Rest des Grows bleibt im Archiv (die Ansicht mit
+    Archiv zeigt beides). Nicht archiviert werden außerdem die höchste ID (sonst könnte MySQL 5.7
+    sie nach einem Neustart erneut vergeben) und alles, solange der Dosierungs-Nachlauf offen ist.
+    Gibt (True, (archiviert, True wenn noch Zeilen offen sind)) oder (False, Fehlermeldung) zurück.
+    """
+    if float(after_days) <= 0:
+        return True, (0, False)
+    cnx, result = get_db_connection(config, with_db=True)
+    if cnx is None:
+        return False, result
+    cursor = cnx.cursor()
+    try:
+        stand = nachlauf_stand(cursor)
+        if stand is not None and stand[0] < stand[1]:
+            return True, (0, False)
+        stichtag = datetime.now() - timedelta(days=float(after_days))
+        cursor.execute(
+            f"SELECT p.id FROM {PROTOKOLL_TABLE_NAME} p JOIN (SELECT pflanzen_name FROM {PROTOKOLL_TABLE_NAME} "
+            f"WHERE {NICHT_GELOESCHT} GROUP BY pflanzen_name HAVING MAX(erstellungsdatum) < %s) f ON f.pflanzen_name = p.pflanzen_name "
+            f"WHERE p.{NICHT_GELOESCHT} AND p.id < (SELECT MAX(id) FROM {PROTOKOLL_TABLE_NAME}) LIMIT %s",
+            (stichtag, chunk_size)
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return True, (0, False)
+        platzhalter = ", ".join(["%s"] * len(ids))
+        spalten = ", ".join(ARCHIV_COLUMNS)
+        cursor.execute(f"INSERT INTO {ARCHIV_TABLE_NAME} ({spalten}) "
+                       f"SELECT {spalten} FROM {PROTOKOLL_TABLE_NAME} WHERE id IN ({platzhalter})", ids)
+        log_changes(cursor, ids, AKTION_ARCHIVIERT)
+        cursor.execute(f"DELETE FROM {PROTOKOLL_TABLE_NAME} WHERE id IN ({platzhalter})", ids)
+        cnx.commit()
+        return True, (len(ids), len(ids) == chunk_size)
+    except DB_ERRORS as err:
+        cnx.rollback()
+        return False, f"❌ Fehler beim Archivieren: {error_message(err)}"
+    finally:
+        cursor.close()
+        cnx.close()
+
+
+@timed
 def test_db_connection(config):
     """Testet die Verbindung zur Datenbank und gibt den Status zurück."""
     port = config.get('port', 3306)
+    if backend_of(config) == BACKEND_SQLITE:
+        cnx, cursor = get_db_connection(config)
+        if cnx is None:
+            return False, cursor
+        try:
+            cursor.execute("SELECT sqlite_version()")
+            return True, f"✅ SQLite {cursor.fetchone()[0]} bereit: {sqlite_path(config)}"
+        except DB_ERRORS as err:
+            return False, f"❌ Fehler: {error_message(err)}"
+        finally:
+            cursor.close()
+            cnx.close()
+    if mysql is None:
+        return False, "❌ mysql-connector-python ist nicht installiert."
     
+    # Ein ausdrücklicher Test umgeht den Schutzschalter (evtl. mit noch nicht gespeicherten Zugangsdaten)
     try:
-        cnx = mysql.connector.connect(
-            user=config['user'],
-            password=config['password'],
-            host=config['host'],
-            port=port,
-            charset='utf8',
-            database=config['database']
-        )
+        cnx = get_pool(config, with_db=True).acquire()
         cnx.close()
         return True, "✅ Verbindung erfolgreich hergestellt und Datenbank gefunden."
 
-    except mysql.connector.Error as err:
+    except PoolTimeoutError as err:
+        return False, f"❌ {err}"
+    except DB_ERRORS as err:
         if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
             return False, "❌ Falscher Benutzername oder Passwort."
         elif err.errno == errorcode.CR_CONN_HOST_ERROR:
@@ -262,4 +1798,4 @@ def test_db_connection(config):
         elif err.errno == errorcode.ER_BAD_DB_ERROR:
              return False, f"⚠️ Datenbank '{config['database']}' existiert nicht. Wird beim Speichern erstellt."
         else:
-            return False, f"❌ Fehler: {err.msg}"
\ No newline at end of file
+            return False, f"❌ Fehler: {error_message(err)}"
\ No newline at end of file
@@ -0,0 +1,42 @@
+# db_dialect.py
+# -*- coding: utf-8 -*-
+"""
+Auswahl des Speicher-Backends und backendübergreifende Fehlerbehandlung.
+
+In db_config.ini legt [storage] backend fest, ob MySQL/MariaDB (Standard) oder eine
+lokale SQLite-Datei genutzt wird. mysql-connector-python ist nur für das MySQL-Backend
+nötig; fehlt es, bleibt SQLite voll nutzbar.
+"""
+import sqlite3
+
+try:
+    import mysql.connector
+except ImportError:  # Ohne mysql-connector-python ist nur das SQLite-Backend nutzbar
+    mysql = None
+
+BACKEND_MYSQL = 'mysql'
+BACKEND_SQLITE = 'sqlite'
+BACKENDS = (BACKEND_MYSQL, BACKEND_SQLITE)
+
+DEFAULT_SQLITE_PATH = 'pflanzen.db'
+
+# Fehlerklassen aller verfügbaren Backends, für except-Klauseln im gemeinsamen Code
+DB_ERRORS = (sqlite3.Error,) if mysql is None else (mysql.connector.Error, sqlite3.Error)
+# Der Server lehnt die Daten selbst ab (Wert ungültig oder zu lang, Constraint verletzt):
+# eine Wiederholung scheitert genauso, anders als bei Verbindungs- oder Sperrfehlern
+DATA_ERRORS = (sqlite3.DataError, sqlite3.IntegrityError) + (
+    () if mysql is None else (mysql.connector.DataError, mysql.connector.IntegrityError))
+
+
+def backend_of(config):
+    """Gewähltes Backend laut Config ('mysql' oder 'sqlite')."""
+    return str(config.get('storage_backend', BACKEND_MYSQL)).strip().lower()
+
+
+def sqlite_path(config):
+    return config.get('storage_sqlite_path') or DEFAULT_SQLITE_PATH
+
+
+def error_message(err):
+    """Lesbare Fehlermeldung; mysql.connector liefert sie in .msg, sqlite3 nur über str()."""
+    return getattr(err, 'msg', None) or str(err)
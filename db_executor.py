@@ -0,0 +1,118 @@
+# db_executor.py
+# -*- coding: utf-8 -*-
+"""
+Hintergrund-Ausführung von Datenbankzugriffen für die Tk-Oberfläche.
+
+Tk ist nicht thread-sicher: Worker-Threads dürfen keine Widgets anfassen.
+Der DbExecutor führt Aufgaben daher in einem Thread-Pool aus, sammelt die fertigen
+Futures in einer Queue und ruft die Callbacks per after() im Tk-Hauptthread auf.
+Aufgaben mit gleichem `key` ersetzen sich gegenseitig: Eine neue Plan-Abfrage
+storniert die vorherige, deren Ergebnis dann verworfen wird.
+"""
+import queue
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import measure
+
+DEFAULT_WORKERS = 3
+DEFAULT_POLL_MS = 30
+
+
+class DbExecutor:
+    """
+    Thread-Pool für DB-Aufgaben mit Ergebniszustellung im Tk-Hauptthread.
+    submit() und cancel() dürfen nur aus dem Tk-Hauptthread aufgerufen werden.
+    """
+
+    def __init__(self, root, workers=DEFAULT_WORKERS, poll_ms=DEFAULT_POLL_MS, on_busy_change=None, on_error=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy_change = on_busy_change
+        self.on_error = on_error
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-worker")
+        self._results = queue.Queue()
+        self._latest = {}
+        self._pending = 0
+        self._poll_id = None
+        self._closed = False
+
+    @property
+    def pending(self):
+        """Anzahl noch nicht zugestellter Aufgaben."""
+        return self._pending
+
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None, **kwargs):
+        """
+        Führt fn(*args, **kwargs) im Hintergrund aus.
+        on_done(result) bzw. on_error(exception) laufen anschließend im Tk-Hauptthread.
+        Mit `key` wird eine noch laufende Aufgabe desselben Schlüssels storniert.
+        """
+        if self._closed:
+            return None
+        if key is not None:
+            self.cancel(key)
+        future = self._pool.submit(fn, *args, **kwargs)
+        future.db_key = key
+        if key is not None:
+            self._latest[key] = future
+        self._pending += 1
+        self._notify_busy()
+        future.add_done_callback(lambda f: self._results.put((f, on_done, on_error)))
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+        return future
+
+    def cancel(self, key):
+        """Storniert die letzte Aufgabe mit diesem Schlüssel; ihr Ergebnis wird nicht zugestellt."""
+        old = self._latest.pop(key, None)
+        if old is not None:
+            old.cancel()
+
+    def shutdown(self):
+        """Nimmt keine Aufgaben mehr an; laufende Aufgaben werden nicht abgewartet."""
+        self._closed = True
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except Exception:
+                pass
+            self._poll_id = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _notify_busy(self):
+        if self.on_busy_change:
+            self.on_busy_change(self._pending)
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                future, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            key = future.db_key
+            if key is not None and self._latest.get(key) is future:
+                del self._latest[key]
+            elif key is not None or future.cancelled():
+                # Überholt oder storniert -> Ergebnis verwerfen
+                continue
+            try:
+                exc = future.exception()
+                if exc is not None:
+                    handler = on_error or self.on_error
+                    if handler:
+                        handler(exc)
+                    else:
+                        traceback.print_exception(type(exc), exc, exc.__traceback__)
+                elif on_done:
+                    # Zeit im Tk-Hauptthread, z.B. für das Befüllen des Treeviews
+                    with measure("tk." + getattr(on_done, '__qualname__', 'callback').replace('.<locals>', '')):
+                        on_done(future.result())
+            except Exception:
+                # Ein fehlerhafter Callback darf die Zustellung der übrigen nicht blockieren
+                traceback.print_exc()
+        self._notify_busy()
+        if self._pending > 0 and not self._closed:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
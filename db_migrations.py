@@ -0,0 +1,714 @@
+# db_migrations.py
+# -*- coding: utf-8 -*-
+"""
+Versionierte Schema-Migrationen für die Pflanzendatenbank.
+
+Jede Migration hat eine fortlaufende Nummer und wird genau einmal ausgeführt.
+Der erreichte Stand steht in der Tabelle `schema_version`. Beim Programmstart
+genügt damit eine einzige Abfrage, um festzustellen, ob etwas zu tun ist.
+
+Für das SQLite-Backend gibt es eine eigene Liste mit denselben Versionsnummern,
+die jeweils denselben Schemastand in SQLite-Syntax herstellt.
+
+Ab Version 6 stehen die Düngermengen nicht mehr in eigenen Spalten, sondern im Langformat
+(Nährstoffkatalog + Dosierungstabellen). Die Ansichten PROTOKOLL_VIEW_NAME und
+PLANUNG_VIEW_NAME liefern daraus wieder die gewohnte breite Zeile; ein neues Produkt ist
+eine Katalogzeile und ein Neuaufbau der Ansichten, kein ALTER TABLE auf das Protokoll.
+
+Ab Version 10 liegen abgeschlossene Grows im Archiv (ARCHIV_TABLE_NAME). PROTOKOLL_VIEW_NAME
+zeigt nur den laufenden Bestand, GESAMT_VIEW_NAME zusätzlich das Archiv.
+"""
+import re
+import time
+
+from db_dialect import DB_ERRORS, BACKEND_SQLITE
+
+PROTOKOLL_TABLE_NAME = 'pflanzenprotokoll'
+PLANUNG_TABLE_NAME = 'pflanzenplanung'
+SCHEMA_VERSION_TABLE_NAME = 'schema_version'
+CHANGE_LOG_TABLE_NAME = 'pflanzenprotokoll_aenderungen'
+IDEMPOTENZ_TABLE_NAME = 'pflanzenprotokoll_schluessel'
+NAEHRSTOFF_TABLE_NAME = 'naehrstoffe'
+PROTOKOLL_DOSIERUNG_TABLE_NAME = 'pflanzenprotokoll_dosierung'
+PLANUNG_DOSIERUNG_TABLE_NAME = 'pflanzenplanung_dosierung'
+NACHLAUF_TABLE_NAME = 'schema_nachlauf'
+ANOMALIE_ZUSTAND_TABLE_NAME = 'anomalie_zustand'
+ANOMALIE_TABLE_NAME = 'anomalien'
+LOESCHUNG_TABLE_NAME = 'pflanzenprotokoll_loeschungen'
+ARCHIV_TABLE_NAME = 'pflanzenprotokoll_archiv'
+PROTOKOLL_VIEW_NAME = 'pflanzenprotokoll_ansicht'
+PLANUNG_VIEW_NAME = 'pflanzenplanung_ansicht'
+ARCHIV_VIEW_NAME = 'pflanzenprotokoll_archiv_ansicht'
+GESAMT_VIEW_NAME = 'pflanzenprotokoll_gesamt_ansicht'
+
+# Stammkatalog: (id, kuerzel, bezeichnung, einheit). Die Kürzel sind zugleich die Spaltennamen
+# der Ansichten und der früheren breiten Tabellen, die IDs sind fest vergeben.
+NAEHRSTOFF_KATALOG = [
+    (1, 'root_juice_ml_l', 'Root·Juice', 'ml/L'),
+    (2, 'calmag_ml_l', 'Calmag', 'ml/L'),
+    (3, 'bio_grow_ml_l', 'Bio·Grow', 'ml/L'),
+    (4, 'fish_mix_ml_l', 'Fish·Mix', 'ml/L'),
+    (5, 'bio_heaven_ml_l', 'Bio·Heaven', 'ml/L'),
+    (6, 'acti_alc_ml_l', 'Acti·a•alc', 'ml/L'),
+    (7, 'bio_bloom_ml_l', 'Bio·Bloom', 'ml/L'),
+    (8, 'top_max_ml_l', 'Top·Max', 'ml/L'),
+]
+# Produkte, deren Mengen in Altbeständen noch in gleichnamigen Spalten stehen
+ALT_SPALTEN = [kuerzel for _, kuerzel, _, _ in NAEHRSTOFF_KATALOG]
+
+# Name des Nachlaufs, der Düngermengen alter Protokollzeilen ins Langformat kopiert
+NACHLAUF_DOSIERUNG = 'dosierung'
+# Vormerkung, dass die Auffälligkeitszustände einmal aus dem ganzen Protokoll aufzubauen sind
+NACHLAUF_ANOMALIE = 'anomalie'
+
+# Zulässige Kürzel neuer Produkte (werden als Spaltennamen der Ansichten verwendet)
+KUERZEL_MUSTER = re.compile(r'^[a-z][a-z0-9_]{0,49}$')
+
+# Sekunden, die auf die Migrationssperre eines anderen Clients gewartet wird
+LOCK_TIMEOUT = 30
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def _add_column_if_missing(cursor, table, column, definition):
+    if not _column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _index_exists(cursor, table, index):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (table, index)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def _table_exists(cursor, table, dialect=None):
+    if dialect == BACKEND_SQLITE:
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+    else:
+        cursor.execute("SELECT COUNT(*) FROM information_schema.TABLES "
+                       "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def _drop_index_if_exists(cursor, table, index):
+    if _index_exists(cursor, table, index):
+        cursor.execute(f"ALTER TABLE {table} DROP INDEX {index}, ALGORITHM=INPLACE, LOCK=NONE")
+
+
+def _add_index_if_missing(cursor, table, index, columns):
+    if not _index_exists(cursor, table, index):
+        # INPLACE/LOCK=NONE: Schreibzugriffe anderer Clients laufen während des Aufbaus weiter
+        cursor.execute(f"ALTER TABLE {table} ADD INDEX {index} ({columns}), ALGORITHM=INPLACE, LOCK=NONE")
+
+
+# --- Migrationsschritte -------------------------------------------------------
+
+def _migration_001_basistabellen(cursor):
+    """Protokoll- (Ist) und Planungstabelle (Soll) anlegen."""
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {PROTOKOLL_TABLE_NAME} (
+      id INT AUTO_INCREMENT PRIMARY KEY,
+      pflanzen_name VARCHAR(50) NOT NULL,
+      woche INT NOT NULL,
+      phase VARCHAR(50),
+      lichtzyklus_h INT,
+      root_juice_ml_l FLOAT,
+      calmag_ml_l FLOAT,
+      bio_grow_ml_l FLOAT,
+      fish_mix_ml_l FLOAT,
+      bio_heaven_ml_l FLOAT,
+      acti_alc_ml_l FLOAT,
+      bio_bloom_ml_l FLOAT,
+      top_max_ml_l FLOAT,
+      ph_wert_ziel FLOAT,
+      ec_wert FLOAT,
+      erstellungsdatum TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {PLANUNG_TABLE_NAME} (
+      pflanzen_name VARCHAR(50) NOT NULL,
+      woche INT NOT NULL,
+      phase VARCHAR(50),
+      lichtzyklus_h INT,
+      root_juice_ml_l FLOAT,
+      calmag_ml_l FLOAT,
+      bio_grow_ml_l FLOAT,
+      fish_mix_ml_l FLOAT,
+      bio_heaven_ml_l FLOAT,
+      acti_alc_ml_l FLOAT,
+      bio_bloom_ml_l FLOAT,
+      top_max_ml_l FLOAT,
+      ph_wert_ziel FLOAT,
+      ec_wert FLOAT,
+      PRIMARY KEY (pflanzen_name, woche)
+    )
+    """)
+
+
+def _migration_002_fish_heaven_ec(cursor):
+    """Fish-Mix, Bio-Heaven und EC-Wert in Tabellen älterer Installationen nachrüsten."""
+    for table in [PROTOKOLL_TABLE_NAME, PLANUNG_TABLE_NAME]:
+        _add_column_if_missing(cursor, table, 'fish_mix_ml_l', "FLOAT AFTER bio_grow_ml_l")
+        _add_column_if_missing(cursor, table, 'bio_heaven_ml_l', "FLOAT AFTER fish_mix_ml_l")
+        _add_column_if_missing(cursor, table, 'ec_wert', "FLOAT AFTER ph_wert_ziel")
+
+
+def _migration_003_aenderungsprotokoll(cursor):
+    """Änderungs-/Löschprotokoll für die inkrementelle Aktualisierung der Datenansicht."""
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE_NAME} (
+      log_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+      datensatz_id INT NOT NULL,
+      aktion CHAR(1) NOT NULL,
+      zeitpunkt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      INDEX idx_aenderungen_zeitpunkt (zeitpunkt)
+    )
+    """)
+
+
+# Sekundärindizes des Protokolls: (Name, Woche, Datum) für Soll/Ist-Vergleich und Filter,
+# (Datum, id) für die sortierte Datenansicht, Keyset-Pagination und den Export
+PROTOKOLL_INDEXES = [
+    ("idx_protokoll_name_woche_datum", "pflanzen_name, woche, erstellungsdatum"),
+    ("idx_protokoll_datum_id", "erstellungsdatum, id"),
+]
+
+# (Name, Datum) für Zeitreihen einer Pflanze: Zoom und Verschieben lesen nur den sichtbaren Zeitraum
+ZEITREIHE_INDEX = ("idx_protokoll_name_datum", "pflanzen_name, erstellungsdatum")
+
+# Zeilen eines Löschvorgangs für Rückgängig und endgültiges Löschen. Datum und id gehören mit hinein:
+# Die Ansicht filtert auf loeschung_id IS NULL; nutzt der Planer dafür diesen Index, liefert er die
+# Zeilen so schon in der Sortierung der Datenansicht (sonst Sortieren des ganzen Bestands je Seite)
+LOESCHUNG_INDEX = ("idx_protokoll_loeschung_datum", "loeschung_id, erstellungsdatum, id")
+# Einspaltiger Vorgänger aus Migration 9, ersetzt durch Migration 12
+LOESCHUNG_INDEX_ALT = "idx_protokoll_loeschung"
+
+
+def _migration_004_protokoll_indizes(cursor):
+    """Indizes für die Zugriffsmuster der Datenansicht und des Soll/Ist-Vergleichs."""
+    for index, columns in PROTOKOLL_INDEXES:
+        _add_index_if_missing(cursor, PROTOKOLL_TABLE_NAME, index, columns)
+
+
+def _migration_005_idempotenz(cursor):
+    """Schlüssel bereits übernommener Journal-Einträge, damit Wiederholungen keine Duplikate erzeugen."""
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {IDEMPOTENZ_TABLE_NAME} (
+      schluessel CHAR(32) PRIMARY KEY,
+      angelegt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      INDEX idx_schluessel_angelegt (angelegt)
+    )
+    """)
+
+
+def _create_dosierung_tables(cursor, auto_increment, clustered=""):
+    """
+    Katalog, Dosierungstabellen und Nachlauf-Stand. `auto_increment` ist die Schlüsseldefinition
+    des Dialekts, `clustered` macht die Dosierungstabellen in SQLite zu Primärschlüssel-B-Bäumen
+    (bei InnoDB ohnehin so): jede Menge ist dann ein einziger Indexzugriff.
+    """
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {NAEHRSTOFF_TABLE_NAME} (
+      id {auto_increment},
+      kuerzel VARCHAR(50) NOT NULL UNIQUE,
+      bezeichnung VARCHAR(100) NOT NULL,
+      einheit VARCHAR(20) NOT NULL DEFAULT 'ml/L',
+      reihenfolge INT NOT NULL DEFAULT 0
+    )
+    """)
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {PROTOKOLL_DOSIERUNG_TABLE_NAME} (
+      protokoll_id INT NOT NULL,
+      naehrstoff_id INT NOT NULL,
+      menge FLOAT NOT NULL,
+      PRIMARY KEY (protokoll_id, naehrstoff_id)
+    ){clustered}
+    """)
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {PLANUNG_DOSIERUNG_TABLE_NAME} (
+      pflanzen_name VARCHAR(50) NOT NULL,
+      woche INT NOT NULL,
+      naehrstoff_id INT NOT NULL,
+      menge FLOAT NOT NULL,
+      PRIMARY KEY (pflanzen_name, woche, naehrstoff_id)
+    ){clustered}
+    """)
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {NACHLAUF_TABLE_NAME} (
+      name VARCHAR(50) PRIMARY KEY,
+      letzte_id INT NOT NULL DEFAULT 0,
+      ziel_id INT NOT NULL DEFAULT 0
+    )
+    """)
+
+
+def _seed_dosierung(cursor, insert_ignore):
+    """Stammkatalog anlegen, Pläne (klein) sofort umkopieren, Protokoll für den Nachlauf vormerken."""
+    cursor.executemany(
+        f"{insert_ignore} INTO {NAEHRSTOFF_TABLE_NAME} (id, kuerzel, bezeichnung, einheit, reihenfolge) "
+        f"VALUES (%s, %s, %s, %s, %s)",
+        [(nid, kuerzel, bezeichnung, einheit, nid) for nid, kuerzel, bezeichnung, einheit in NAEHRSTOFF_KATALOG]
+    )
+    for nid, kuerzel, _, _ in NAEHRSTOFF_KATALOG:
+        cursor.execute(
+            f"{insert_ignore} INTO {PLANUNG_DOSIERUNG_TABLE_NAME} (pflanzen_name, woche, naehrstoff_id, menge) "
+            f"SELECT pflanzen_name, woche, %s, {kuerzel} FROM {PLANUNG_TABLE_NAME} WHERE {kuerzel} IS NOT NULL",
+            (nid,)
+        )
+    # Das Protokoll kann sehr groß sein: es wird nicht hier (unter der Migrationssperre), sondern
+    # blockweise im laufenden Betrieb kopiert, siehe db_connector.run_dosierung_nachlauf
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {PROTOKOLL_TABLE_NAME}")
+    ziel_id = cursor.fetchone()[0]
+    cursor.execute(f"{insert_ignore} INTO {NACHLAUF_TABLE_NAME} (name, letzte_id, ziel_id) VALUES (%s, 0, %s)",
+                   (NACHLAUF_DOSIERUNG, ziel_id))
+
+
+def _migration_006_naehrstoffkatalog(cursor):
+    """Nährstoffkatalog, Dosierung im Langformat und breite Ansichten."""
+    _create_dosierung_tables(cursor, "INT AUTO_INCREMENT PRIMARY KEY")
+    _seed_dosierung(cursor, "INSERT IGNORE")
+    create_views(cursor)
+
+
+# --- Breite Ansichten ---------------------------------------------------------
+
+def _view_columns(alias, naehrstoffe, alt_spalten):
+    """Spaltenliste mit einer Mengen-Spalte je Katalogeintrag (Alias d<id> je Dosierungs-JOIN)."""
+    spalten = [f"{alias}.phase", f"{alias}.lichtzyklus_h"]
+    for nid, kuerzel in naehrstoffe:
+        if kuerzel in alt_spalten:
+            # Noch nicht umkopierte Altzeilen lesen ihre Menge aus der früheren Spalte
+            spalten.append(f"COALESCE(d{nid}.menge, {alias}.{kuerzel}) AS {kuerzel}")
+        else:
+            spalten.append(f"d{nid}.menge AS {kuerzel}")
+    return spalten + [f"{alias}.ph_wert_ziel", f"{alias}.ec_wert"]
+
+
+def view_definitions(naehrstoffe, nachlauf_offen, papierkorb=True, archiv=False):
+    """
+    SELECT-Anweisungen der Ansichten für `naehrstoffe` = [(id, kuerzel), ...].
+    Jede Menge kommt über einen LEFT JOIN auf den Primärschlüssel der Dosierungstabelle;
+    ohne GROUP BY bleibt die Ansicht zusammenführbar, Filter und Sortierung nutzen so
+    weiter die Indizes der Basistabelle. Mit `archiv` kommen Archiv- und Gesamtansicht hinzu.
+    """
+    alt_protokoll = set(ALT_SPALTEN) if nachlauf_offen else set()
+    protokoll = ", ".join(["p.id", "p.pflanzen_name", "p.woche"]
+                          + _view_columns("p", naehrstoffe, alt_protokoll) + ["p.erstellungsdatum"])
+    archiv_spalten = ", ".join(["p.id", "p.pflanzen_name", "p.woche"]
+                               + _view_columns("p", naehrstoffe, set()) + ["p.erstellungsdatum"])
+    protokoll_joins = "".join(
+        f" LEFT JOIN {PROTOKOLL_DOSIERUNG_TABLE_NAME} d{nid} ON d{nid}.protokoll_id = p.id AND d{nid}.naehrstoff_id = {nid}"
+        for nid, _ in naehrstoffe
+    )
+    planung = ", ".join(["s.pflanzen_name", "s.woche"] + _view_columns("s", naehrstoffe, set()))
+    planung_joins = "".join(
+        f" LEFT JOIN {PLANUNG_DOSIERUNG_TABLE_NAME} d{nid} ON d{nid}.pflanzen_name = s.pflanzen_name"
+        f" AND d{nid}.woche = s.woche AND d{nid}.naehrstoff_id = {nid}"
+        for nid, _ in naehrstoffe
+    )
+    # Vorläufig gelöschte Zeilen (Papierkorb) blendet die Ansicht aus
+    aktiv = " WHERE p.loeschung_id IS NULL" if papierkorb else ""
+    ansichten = {
+        PROTOKOLL_VIEW_NAME: f"SELECT {protokoll} FROM {PROTOKOLL_TABLE_NAME} p{protokoll_joins}{aktiv}",
+        PLANUNG_VIEW_NAME: f"SELECT {planung} FROM {PLANUNG_TABLE_NAME} s{planung_joins}",
+    }
+    if archiv:
+        # Archiviert wird erst nach dem Nachlauf: das Archiv kennt nur das Langformat
+        ansichten[ARCHIV_VIEW_NAME] = f"SELECT {archiv_spalten} FROM {ARCHIV_TABLE_NAME} p{protokoll_joins}"
+        ansichten[GESAMT_VIEW_NAME] = (f"SELECT * FROM {PROTOKOLL_VIEW_NAME} "
+                                       f"UNION ALL SELECT * FROM {ARCHIV_VIEW_NAME}")
+    return ansichten
+
+
+def nachlauf_stand(cursor, name=NACHLAUF_DOSIERUNG):
+    """(letzte_id, ziel_id) eines Nachlaufs oder None, wenn er nicht (mehr) existiert."""
+    cursor.execute(f"SELECT letzte_id, ziel_id FROM {NACHLAUF_TABLE_NAME} WHERE name = %s", (name,))
+    return cursor.fetchone()
+
+
+def create_views(cursor, dialect=None):
+    """(Neu-)Aufbau der breiten Ansichten aus dem aktuellen Katalog; nötig nach jeder Katalogänderung."""
+    cursor.execute(f"SELECT id, kuerzel FROM {NAEHRSTOFF_TABLE_NAME} ORDER BY reihenfolge, id")
+    naehrstoffe = [(nid, kuerzel) for nid, kuerzel in cursor.fetchall() if KUERZEL_MUSTER.match(kuerzel)]
+    stand = nachlauf_stand(cursor)
+    offen = stand is not None and stand[0] < stand[1]
+    # Die Spalte loeschung_id gibt es erst ab Migration 9
+    cursor.execute(f"SELECT * FROM {PROTOKOLL_TABLE_NAME} WHERE 1 = 0")
+    papierkorb = "loeschung_id" in [c[0] for c in cursor.description]
+    cursor.fetchall()
+    # Das Archiv ab Migration 10
+    archiv = _table_exists(cursor, ARCHIV_TABLE_NAME, dialect)
+    for name, select in view_definitions(naehrstoffe, offen, papierkorb, archiv).items():
+        if dialect == BACKEND_SQLITE:
+            cursor.execute(f"DROP VIEW IF EXISTS {name}")
+            cursor.execute(f"CREATE VIEW {name} AS {select}")
+        elif name == GESAMT_VIEW_NAME:
+            # UNION ist nicht zusammenführbar; MySQL wählt den Algorithmus selbst
+            cursor.execute(f"CREATE OR REPLACE VIEW {name} AS {select}")
+        else:
+            cursor.execute(f"CREATE OR REPLACE ALGORITHM=MERGE VIEW {name} AS {select}")
+
+
+def _migration_007_zeitreihe_index(cursor):
+    """Index für Zeitreihen einer Pflanze (Verlaufsdiagramm)."""
+    _add_index_if_missing(cursor, PROTOKOLL_TABLE_NAME, *ZEITREIHE_INDEX)
+
+
+def _create_anomalie_tables(cursor, insert_ignore):
+    """Zustand je Pflanze und Feld (Welford/EWMA) und Meldungen je Messung; Aufbau vormerken."""
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {ANOMALIE_ZUSTAND_TABLE_NAME} (
+      pflanzen_name VARCHAR(50) NOT NULL,
+      feld VARCHAR(30) NOT NULL,
+      anzahl INT NOT NULL,
+      mittel DOUBLE NOT NULL,
+      m2 DOUBLE NOT NULL,
+      ewma DOUBLE,
+      letzte_id INT NOT NULL,
+      PRIMARY KEY (pflanzen_name, feld)
+    )
+    """)
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {ANOMALIE_TABLE_NAME} (
+      protokoll_id INT NOT NULL,
+      feld VARCHAR(30) NOT NULL,
+      wert DOUBLE NOT NULL,
+      soll DOUBLE,
+      z_wert DOUBLE,
+      grund VARCHAR(100) NOT NULL,
+      PRIMARY KEY (protokoll_id, feld)
+    )
+    """)
+    cursor.execute(f"{insert_ignore} INTO {NACHLAUF_TABLE_NAME} (name, letzte_id, ziel_id) VALUES (%s, 0, 1)",
+                   (NACHLAUF_ANOMALIE,))
+
+
+def _migration_008_anomalien(cursor):
+    """Tabellen der laufenden Auffälligkeitserkennung."""
+    _create_anomalie_tables(cursor, "INSERT IGNORE")
+
+
+def _create_loeschung_table(cursor, auto_increment):
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {LOESCHUNG_TABLE_NAME} (
+      id {auto_increment},
+      zeitpunkt TIMESTAMP NOT NULL,
+      beschreibung VARCHAR(200),
+      anzahl INT NOT NULL DEFAULT 0
+    )
+    """)
+
+
+def _migration_009_papierkorb(cursor):
+    """Vorläufiges Löschen: Löschvorgänge, Verweis im Protokoll, Ansicht ohne gelöschte Zeilen."""
+    _create_loeschung_table(cursor, "INT AUTO_INCREMENT PRIMARY KEY")
+    _add_column_if_missing(cursor, PROTOKOLL_TABLE_NAME, "loeschung_id", "INT NULL")
+    _add_index_if_missing(cursor, PROTOKOLL_TABLE_NAME, *LOESCHUNG_INDEX)
+    create_views(cursor)
+
+
+# Spalten des Archivs: Stammdaten einer Messung mit unveränderter ID. Düngermengen und
+# Auffälligkeiten bleiben in ihren Tabellen (Schlüssel protokoll_id), Papierkorb-Zeilen werden
+# nicht archiviert.
+ARCHIV_COLUMNS = ["id", "pflanzen_name", "woche", "phase", "lichtzyklus_h", "ph_wert_ziel", "ec_wert",
+                  "erstellungsdatum"]
+
+ARCHIV_INDEXES = [
+    ("idx_archiv_name_datum", "pflanzen_name, erstellungsdatum"),
+    ("idx_archiv_datum_id", "erstellungsdatum, id"),
+]
+
+
+def _create_archiv_table(cursor, primary_key):
+    # TIMESTAMP NULL: kein automatisches DEFAULT/ON UPDATE bei älteren MySQL-Einstellungen
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {ARCHIV_TABLE_NAME} (
+      id {primary_key},
+      pflanzen_name VARCHAR(50) NOT NULL,
+      woche INT NOT NULL,
+      phase VARCHAR(50),
+      lichtzyklus_h INT,
+      ph_wert_ziel FLOAT,
+      ec_wert FLOAT,
+      erstellungsdatum TIMESTAMP NULL
+    )
+    """)
+
+
+def _migration_010_archiv(cursor):
+    """Archiv für abgeschlossene Grows samt Archiv- und Gesamtansicht."""
+    _create_archiv_table(cursor, "INT PRIMARY KEY")
+    for index, columns in ARCHIV_INDEXES:
+        _add_index_if_missing(cursor, ARCHIV_TABLE_NAME, index, columns)
+    create_views(cursor)
+
+
+def _migration_011_nichts(cursor):
+    """DATETIME-Spalten speichern in MySQL ohnehin nur ein Format."""
+
+
+def _migration_012_loeschung_index(cursor):
+    """Papierkorb-Index um Datum und id erweitern, damit Seiten der Datenansicht ohne Filesort auskommen."""
+    _add_index_if_missing(cursor, PROTOKOLL_TABLE_NAME, *LOESCHUNG_INDEX)
+    _drop_index_if_exists(cursor, PROTOKOLL_TABLE_NAME, LOESCHUNG_INDEX_ALT)
+
+
+# Reihenfolge ist verbindlich: neue Schritte nur hinten anhängen, nie umnummerieren.
+MIGRATIONS = [
+    (1, "Basistabellen anlegen", _migration_001_basistabellen),
+    (2, "Spalten Fish-Mix, Bio-Heaven, EC-Wert nachrüsten", _migration_002_fish_heaven_ec),
+    (3, "Änderungsprotokoll für Delta-Aktualisierung", _migration_003_aenderungsprotokoll),
+    (4, "Indizes auf Pflanze/Woche/Datum und Datum/id", _migration_004_protokoll_indizes),
+    (5, "Idempotenzschlüssel für das Offline-Journal", _migration_005_idempotenz),
+    (6, "Nährstoffkatalog und Dosierung im Langformat", _migration_006_naehrstoffkatalog),
+    (7, "Index auf Pflanze/Datum für Zeitreihen", _migration_007_zeitreihe_index),
+    (8, "Zustände und Meldungen der Auffälligkeitserkennung", _migration_008_anomalien),
+    (9, "Papierkorb für gelöschte Messungen", _migration_009_papierkorb),
+    (10, "Archiv für abgeschlossene Grows", _migration_010_archiv),
+    (11, "Erstellungsdatum einheitlich speichern", _migration_011_nichts),
+    (12, "Papierkorb-Index um Datum/id erweitern", _migration_012_loeschung_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# --- SQLite -------------------------------------------------------------------
+# Neue Installationen brauchen keine Nachrüstschritte; Zeitstempel wie bei MySQL in Ortszeit.
+
+def _sqlite_001_basistabellen(cursor):
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {PROTOKOLL_TABLE_NAME} (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      pflanzen_name VARCHAR(50) NOT NULL,
+      woche INT NOT NULL,
+      phase VARCHAR(50),
+      lichtzyklus_h INT,
+      root_juice_ml_l FLOAT,
+      calmag_ml_l FLOAT,
+      bio_grow_ml_l FLOAT,
+      fish_mix_ml_l FLOAT,
+      bio_heaven_ml_l FLOAT,
+      acti_alc_ml_l FLOAT,
+      bio_bloom_ml_l FLOAT,
+      top_max_ml_l FLOAT,
+      ph_wert_ziel FLOAT,
+      ec_wert FLOAT,
+      erstellungsdatum TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    )
+    """)
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {PLANUNG_TABLE_NAME} (
+      pflanzen_name VARCHAR(50) NOT NULL,
+      woche INT NOT NULL,
+      phase VARCHAR(50),
+      lichtzyklus_h INT,
+      root_juice_ml_l FLOAT,
+      calmag_ml_l FLOAT,
+      bio_grow_ml_l FLOAT,
+      fish_mix_ml_l FLOAT,
+      bio_heaven_ml_l FLOAT,
+      acti_alc_ml_l FLOAT,
+      bio_bloom_ml_l FLOAT,
+      top_max_ml_l FLOAT,
+      ph_wert_ziel FLOAT,
+      ec_wert FLOAT,
+      PRIMARY KEY (pflanzen_name, woche)
+    )
+    """)
+
+
+def _sqlite_002_nichts(cursor):
+    """Spalten sind in SQLite bereits in Schritt 1 enthalten."""
+
+
+def _sqlite_003_aenderungsprotokoll(cursor):
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE_NAME} (
+      log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+      datensatz_id INT NOT NULL,
+      aktion CHAR(1) NOT NULL,
+      zeitpunkt TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    )
+    """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_aenderungen_zeitpunkt ON {CHANGE_LOG_TABLE_NAME} (zeitpunkt)")
+
+
+def _sqlite_004_protokoll_indizes(cursor):
+    for index, columns in PROTOKOLL_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {PROTOKOLL_TABLE_NAME} ({columns})")
+
+
+def _sqlite_005_idempotenz(cursor):
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {IDEMPOTENZ_TABLE_NAME} (
+      schluessel CHAR(32) PRIMARY KEY,
+      angelegt TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    )
+    """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_schluessel_angelegt ON {IDEMPOTENZ_TABLE_NAME} (angelegt)")
+
+
+def _sqlite_006_naehrstoffkatalog(cursor):
+    _create_dosierung_tables(cursor, "INTEGER PRIMARY KEY AUTOINCREMENT", " WITHOUT ROWID")
+    _seed_dosierung(cursor, "INSERT OR IGNORE")
+    create_views(cursor, BACKEND_SQLITE)
+
+
+def _sqlite_007_zeitreihe_index(cursor):
+    index, columns = ZEITREIHE_INDEX
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {PROTOKOLL_TABLE_NAME} ({columns})")
+
+
+def _sqlite_008_anomalien(cursor):
+    _create_anomalie_tables(cursor, "INSERT OR IGNORE")
+
+
+def _sqlite_009_papierkorb(cursor):
+    _create_loeschung_table(cursor, "INTEGER PRIMARY KEY AUTOINCREMENT")
+    cursor.execute(f"ALTER TABLE {PROTOKOLL_TABLE_NAME} ADD COLUMN loeschung_id INTEGER")
+    index, columns = LOESCHUNG_INDEX
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {PROTOKOLL_TABLE_NAME} ({columns})")
+    create_views(cursor, BACKEND_SQLITE)
+
+
+def _sqlite_010_archiv(cursor):
+    _create_archiv_table(cursor, "INTEGER PRIMARY KEY")
+    for index, columns in ARCHIV_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {ARCHIV_TABLE_NAME} ({columns})")
+    create_views(cursor, BACKEND_SQLITE)
+
+
+def _sqlite_011_datum_einheitlich(cursor):
+    """
+    Ältere Versionen speicherten Datumseingaben der GUI als 'JJJJ-MM-TT' neben vollen Zeitstempeln.
+    SQLite vergleicht die Werte als Text; für Sortierung und Seitenschlüssel alles auf
+    'JJJJ-MM-TT HH:MM:SS' bringen.
+    """
+    for table in (PROTOKOLL_TABLE_NAME, ARCHIV_TABLE_NAME):
+        cursor.execute(f"UPDATE {table} SET erstellungsdatum = datetime(erstellungsdatum) "
+                       f"WHERE datetime(erstellungsdatum) IS NOT NULL AND erstellungsdatum <> datetime(erstellungsdatum)")
+
+
+def _sqlite_012_loeschung_index(cursor):
+    index, columns = LOESCHUNG_INDEX
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {PROTOKOLL_TABLE_NAME} ({columns})")
+    cursor.execute(f"DROP INDEX IF EXISTS {LOESCHUNG_INDEX_ALT}")
+
+
+SQLITE_MIGRATIONS = [
+    (1, "Basistabellen anlegen", _sqlite_001_basistabellen),
+    (2, "Spalten Fish-Mix, Bio-Heaven, EC-Wert nachrüsten", _sqlite_002_nichts),
+    (3, "Änderungsprotokoll für Delta-Aktualisierung", _sqlite_003_aenderungsprotokoll),
+    (4, "Indizes auf Pflanze/Woche/Datum und Datum/id", _sqlite_004_protokoll_indizes),
+    (5, "Idempotenzschlüssel für das Offline-Journal", _sqlite_005_idempotenz),
+    (6, "Nährstoffkatalog und Dosierung im Langformat", _sqlite_006_naehrstoffkatalog),
+    (7, "Index auf Pflanze/Datum für Zeitreihen", _sqlite_007_zeitreihe_index),
+    (8, "Zustände und Meldungen der Auffälligkeitserkennung", _sqlite_008_anomalien),
+    (9, "Papierkorb für gelöschte Messungen", _sqlite_009_papierkorb),
+    (10, "Archiv für abgeschlossene Grows", _sqlite_010_archiv),
+    (11, "Erstellungsdatum einheitlich speichern", _sqlite_011_datum_einheitlich),
+    (12, "Papierkorb-Index um Datum/id erweitern", _sqlite_012_loeschung_index),
+]
+
+
+def get_schema_version(cursor):
+    """Liefert die aktuell installierte Schema-Version (0 = leere Datenbank)."""
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE_NAME} (
+      version INT PRIMARY KEY,
+      beschreibung VARCHAR(200),
+      dauer_ms INT,
+      angewendet_am TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute(f"SELECT COALESCE(MAX(version), 0) FROM {SCHEMA_VERSION_TABLE_NAME}")
+    return cursor.fetchone()[0]
+
+
+def _run_sqlite_migrations(cursor):
+    """SQLite: alle fehlenden Schritte in einer Schreibtransaktion (DDL ist dort transaktional)."""
+    applied = []
+    version = 0
+    try:
+        if get_schema_version(cursor) >= LATEST_VERSION:
+            return True, []
+        # BEGIN IMMEDIATE sperrt andere Schreiber, bis die Migration durch ist
+        cursor.execute("BEGIN IMMEDIATE")
+        current = get_schema_version(cursor)
+        for version, beschreibung, schritt in SQLITE_MIGRATIONS:
+            if version <= current:
+                continue
+            start = time.perf_counter()
+            schritt(cursor)
+            dauer_ms = int((time.perf_counter() - start) * 1000)
+            cursor.execute(
+                f"INSERT INTO {SCHEMA_VERSION_TABLE_NAME} (version, beschreibung, dauer_ms) VALUES (%s, %s, %s)",
+                (version, beschreibung, dauer_ms)
+            )
+            applied.append((version, beschreibung, dauer_ms))
+        cursor.connection.commit()
+    except DB_ERRORS as err:
+        cursor.connection.rollback()
+        return False, f"Migration {version:03d} fehlgeschlagen: {err}"
+    for version, beschreibung, dauer_ms in applied:
+        print(f"🛠️ Migration {version:03d} ({beschreibung}) in {dauer_ms} ms ausgeführt.")
+    return True, applied
+
+
+def run_migrations(cursor, db_name, dialect=None):
+    """
+    Führt alle noch fehlenden Migrationen aus.
+    Gibt (True, [(version, beschreibung, dauer_ms), ...]) oder (False, Fehlermeldung) zurück.
+    Parallel startende Clients werden über eine benannte Sperre serialisiert.
+    """
+    if dialect == BACKEND_SQLITE:
+        return _run_sqlite_migrations(cursor)
+    try:
+        if get_schema_version(cursor) >= LATEST_VERSION:
+            return True, []
+
+        lock_name = f"{db_name}.schema_migration"
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (lock_name, LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            return False, "Zeitüberschreitung beim Warten auf die Migrationssperre."
+    except DB_ERRORS as err:
+        return False, f"Fehler beim Lesen der Schema-Version: {err}"
+
+    applied = []
+    version = current = 0
+    try:
+        # Stand nach Erhalt der Sperre erneut lesen, ein anderer Client kann schneller gewesen sein
+        current = get_schema_version(cursor)
+        for version, beschreibung, schritt in MIGRATIONS:
+            if version <= current:
+                continue
+            start = time.perf_counter()
+            schritt(cursor)
+            dauer_ms = int((time.perf_counter() - start) * 1000)
+            cursor.execute(
+                f"INSERT INTO {SCHEMA_VERSION_TABLE_NAME} (version, beschreibung, dauer_ms) VALUES (%s, %s, %s)",
+                (version, beschreibung, dauer_ms)
+            )
+            cursor.execute("COMMIT")
+            applied.append((version, beschreibung, dauer_ms))
+            print(f"🛠️ Migration {version:03d} ({beschreibung}) in {dauer_ms} ms ausgeführt.")
+        return True, applied
+    except DB_ERRORS as err:
+        return False, f"Migration {version:03d} fehlgeschlagen: {err}"
+    finally:
+        try:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (lock_name,))
+            cursor.fetchone()
+        except DB_ERRORS:
+            pass
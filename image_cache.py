@@ -0,0 +1,89 @@
+# image_cache.py
+# -*- coding: utf-8 -*-
+"""
+Thumbnail-Cache für Logo und Produktbilder.
+
+Verkleinerte Bilder werden als PNG unter .thumbnail_cache/ abgelegt. Der Dateiname
+ergibt sich aus Quellpfad, Änderungszeit, Dateigröße und Zielgröße; ändert sich das
+Originalbild, entsteht automatisch ein neuer Eintrag. Ein Cache-Treffer kostet nur das
+Dekodieren eines kleinen PNGs statt JPEG-Dekodierung plus Skalierung.
+
+load_thumbnail() ist thread-sicher und liefert ein PIL-Image; daraus ein
+ImageTk.PhotoImage zu machen, muss im Tk-Hauptthread geschehen. PhotoCache hält die
+fertigen PhotoImages begrenzt (LRU) vor, damit gleiche Bilder nur einmal erzeugt werden.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+
+from PIL import Image
+
+from instrumentation import timed
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".thumbnail_cache")
+DEFAULT_MAX_PHOTOS = 32
+
+
+def _cache_path(path, size, exact):
+    st = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{size[0]}x{size[1]}|{'exact' if exact else 'fit'}"
+    return os.path.join(CACHE_DIR, hashlib.sha1(raw.encode("utf-8")).hexdigest() + ".png")
+
+
+@timed
+def load_thumbnail(path, size, exact=False):
+    """
+    Liefert das Bild `path` verkleinert auf `size` (Breite, Höhe).
+    exact=True skaliert genau auf size, sonst wird das Seitenverhältnis beibehalten.
+    Ein vorhandener Cache-Eintrag wird direkt geladen, sonst wird er angelegt.
+    """
+    cached = _cache_path(path, size, exact)
+    if os.path.exists(cached):
+        try:
+            with Image.open(cached) as img:
+                img.load()
+                return img.copy()
+        except OSError:
+            pass  # beschädigter Eintrag -> neu erzeugen
+
+    with Image.open(path) as img:
+        if exact:
+            thumb = img.resize(size, Image.Resampling.LANCZOS)
+        else:
+            # draft() lässt den JPEG-Decoder direkt in reduzierter Auflösung dekodieren
+            img.draft("RGB", size)
+            thumb = img.copy()
+            thumb.thumbnail(size, Image.Resampling.LANCZOS)
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{cached}.{os.getpid()}.tmp"
+        thumb.save(tmp, "PNG")
+        os.replace(tmp, cached)
+    except OSError:
+        pass  # Cache ist nur eine Beschleunigung, Schreibfehler sind unkritisch
+    return thumb
+
+
+class PhotoCache:
+    """LRU-begrenzte Ablage fertiger PhotoImages (nur im Tk-Hauptthread benutzen)."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_PHOTOS):
+        self.max_entries = max_entries
+        self._photos = OrderedDict()
+
+    def get(self, key):
+        photo = self._photos.get(key)
+        if photo is not None:
+            self._photos.move_to_end(key)
+        return photo
+
+    def put(self, key, photo):
+        self._photos[key] = photo
+        self._photos.move_to_end(key)
+        while len(self._photos) > self.max_entries:
+            # Angezeigte Bilder bleiben über label.image referenziert und damit gültig
+            self._photos.popitem(last=False)
+
+    def __len__(self):
+        return len(self._photos)
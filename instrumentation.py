@@ -0,0 +1,169 @@
+# instrumentation.py
+# -*- coding: utf-8 -*-
+"""
+Laufzeitmessung einzelner Aufrufe (DB-Zugriffe, GUI-Handler, Bilddekodierung).
+
+@timed bzw. `with measure(name):` tragen jede Dauer in ein Histogramm je Name ein;
+der Diagnostik-Tab zeigt daraus Aufrufzahl, Mittelwert, p50/p95/p99 und Maximum.
+Ist die Messung aus (Standard), kostet ein dekorierter Aufruf nur eine Attributabfrage,
+measure() liefert dann einen gemeinsamen No-op-Kontext.
+
+Einschalten über [diagnostics] enabled = 1 in db_config.ini oder im Diagnostik-Tab.
+Mit [diagnostics] log_path wird zusätzlich jeder Aufruf in eine rotierende Logdatei geschrieben.
+"""
+import bisect
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from logging.handlers import RotatingFileHandler
+
+# Obergrenzen der Histogramm-Klassen in ms: 0,05 ms bis ca. 105 s, Faktor 2 je Klasse
+BUCKETS_MS = [0.05 * 2 ** i for i in range(22)]
+
+DEFAULT_LOG_MAX_KB = 1024
+DEFAULT_LOG_BACKUPS = 3
+
+_NOOP = nullcontext()
+
+
+class Histogram:
+    """Logarithmisches Histogramm; Perzentile sind auf die Klassengrenze genau."""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p):
+        """Obergrenze der Klasse, in der das p-Perzentil liegt (höchstens das Maximum)."""
+        if not self.count:
+            return 0.0
+        ziel = p / 100 * self.count
+        summe = 0
+        for index, anzahl in enumerate(self.counts):
+            summe += anzahl
+            if summe >= ziel and anzahl:
+                grenze = BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max_ms
+                return min(grenze, self.max_ms)
+        return self.max_ms
+
+
+class Metrics:
+    """Histogramme aller gemessenen Namen; thread-sicher."""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._logger = None
+
+    def enable(self, enabled=True):
+        self.enabled = bool(enabled)
+
+    def configure_log(self, path, max_kb=DEFAULT_LOG_MAX_KB, backups=DEFAULT_LOG_BACKUPS):
+        """Schreibt ab jetzt jeden Messwert zusätzlich in `path` (rotierend); leerer Pfad schaltet ab."""
+        if self._logger is not None:
+            for handler in list(self._logger.handlers):
+                self._logger.removeHandler(handler)
+                handler.close()
+            self._logger = None
+        if not path:
+            return
+        handler = RotatingFileHandler(path, maxBytes=int(max_kb) * 1024, backupCount=int(backups), encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(threadName)s %(message)s"))
+        logger = logging.getLogger("pflanzen.diagnostik")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self._logger = logger
+
+    def record(self, name, ms):
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = Histogram()
+            hist.add(ms)
+        if self._logger is not None:
+            self._logger.info("%s %.3f ms", name, ms)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self):
+        """Liste von Dicts je Name, nach Gesamtzeit absteigend sortiert."""
+        with self._lock:
+            werte = [
+                {"name": name, "aufrufe": h.count, "mittel_ms": h.total_ms / h.count,
+                 "p50_ms": h.percentile(50), "p95_ms": h.percentile(95), "p99_ms": h.percentile(99),
+                 "max_ms": h.max_ms, "gesamt_ms": h.total_ms}
+                for name, h in self._histograms.items() if h.count
+            ]
+        return sorted(werte, key=lambda w: w["gesamt_ms"], reverse=True)
+
+    def dump(self):
+        """Schreibt die aktuelle Zusammenfassung ins Log. Gibt False zurück, wenn kein Log konfiguriert ist."""
+        if self._logger is None:
+            return False
+        for w in self.snapshot():
+            self._logger.info("SUMME %s n=%d mittel=%.2f p50=%.2f p95=%.2f p99=%.2f max=%.2f ms", w["name"],
+                              w["aufrufe"], w["mittel_ms"], w["p50_ms"], w["p95_ms"], w["p99_ms"], w["max_ms"])
+        return True
+
+
+# Gemeinsame Instanz für den ganzen Prozess
+METRICS = Metrics()
+
+
+def timed(fn=None, *, name=None):
+    """Dekorator: misst jeden Aufruf unter `name` (Standard: modul.funktion). Auch als @timed nutzbar."""
+    if fn is None:
+        return functools.partial(timed, name=name)
+    label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not METRICS.enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            METRICS.record(label, (time.perf_counter() - start) * 1000)
+    return wrapper
+
+
+@contextmanager
+def _measure(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.record(name, (time.perf_counter() - start) * 1000)
+
+
+def measure(name):
+    """Kontextmanager für einzelne Blöcke: `with measure("tk.treeview"): ...`."""
+    if not METRICS.enabled:
+        return _NOOP
+    return _measure(name)
+
+
+def configure(config):
+    """Übernimmt [diagnostics] aus der Konfiguration (enabled, log_path, log_max_kb, log_backups)."""
+    METRICS.enable(str(config.get('diagnostics_enabled', '0')).strip().lower() in ('1', 'true', 'yes', 'ja'))
+    METRICS.configure_log(config.get('diagnostics_log_path', ''),
+                          config.get('diagnostics_log_max_kb') or DEFAULT_LOG_MAX_KB,
+                          config.get('diagnostics_log_backups') or DEFAULT_LOG_BACKUPS)
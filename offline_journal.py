@@ -0,0 +1,243 @@
+# offline_journal.py
+# -*- coding: utf-8 -*-
+"""
+Lokales Schreibjournal für Messungen (Write-Ahead-Queue).
+
+Jede neue Messung wird zuerst mit einem eindeutigen Schlüssel in eine lokale SQLite-Datei
+geschrieben (synchronous=FULL, übersteht also auch einen Stromausfall) und gilt damit als
+gesichert – unabhängig davon, ob der Datenbankserver gerade erreichbar ist.
+Der JournalFlusher überträgt die Einträge im Hintergrund blockweise in je einer Transaktion
+und löscht sie erst nach dem Commit aus dem Journal. Schlägt die Übertragung fehl, wird mit
+wachsendem Abstand erneut versucht. Der Server überspringt bereits übernommene Schlüssel,
+eine Wiederholung nach verlorener Bestätigung erzeugt deshalb keine doppelten Zeilen.
+Lehnt der Server dagegen die Daten selbst ab, werden die Einträge des Blocks einzeln gesendet
+und nur die abgelehnten wandern in die Quarantäne; die übrigen Messungen bleiben nicht hängen.
+"""
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+DEFAULT_PATH = 'messungen_journal.db'
+DEFAULT_BATCH_SIZE = 200
+
+# Wartezeit (s) nach einem Fehlschlag, verdoppelt sich bis RETRY_MAX
+RETRY_MIN = 2
+RETRY_MAX = 300
+
+
+class MeasurementJournal:
+    """Append-only-Warteschlange in einer SQLite-Datei; thread-sicher."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # Autocommit: jedes append() ist sofort dauerhaft gespeichert
+        self._cnx = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._cnx.execute("PRAGMA journal_mode=WAL")
+        self._cnx.execute("PRAGMA synchronous=FULL")
+        self._cnx.execute("""
+        CREATE TABLE IF NOT EXISTS journal (
+          seq INTEGER PRIMARY KEY AUTOINCREMENT,
+          schluessel TEXT NOT NULL UNIQUE,
+          datensatz TEXT NOT NULL,
+          angelegt TEXT NOT NULL,
+          versuche INTEGER NOT NULL DEFAULT 0,
+          letzter_fehler TEXT
+        )
+        """)
+        self._cnx.execute("""
+        CREATE TABLE IF NOT EXISTS quarantaene (
+          seq INTEGER PRIMARY KEY,
+          schluessel TEXT NOT NULL UNIQUE,
+          datensatz TEXT NOT NULL,
+          angelegt TEXT NOT NULL,
+          fehler TEXT NOT NULL,
+          abgelehnt TEXT NOT NULL
+        )
+        """)
+        self._pending = self._cnx.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+        self._rejected = self._cnx.execute("SELECT COUNT(*) FROM quarantaene").fetchone()[0]
+
+    @property
+    def pending(self):
+        """Anzahl noch nicht übertragener Messungen."""
+        return self._pending
+
+    @property
+    def rejected(self):
+        """Anzahl vom Server abgelehnter Messungen in der Quarantäne."""
+        return self._rejected
+
+    def append(self, datensatz):
+        """
+        Sichert einen Datensatz (Spalten wie PROTOKOLL_INSERT_COLUMNS) und gibt seinen Schlüssel zurück.
+        Zeitstempel landen als Text 'JJJJ-MM-TT HH:MM:SS' im Journal.
+        """
+        schluessel = uuid.uuid4().hex
+        with self._lock:
+            self._cnx.execute(
+                "INSERT INTO journal (schluessel, datensatz, angelegt) VALUES (?, ?, ?)",
+                (schluessel, json.dumps(list(datensatz), default=str), datetime.now().isoformat(" ", "seconds"))
+            )
+            self._pending += 1
+        return schluessel
+
+    def peek(self, limit=DEFAULT_BATCH_SIZE):
+        """Die ältesten Einträge als [(seq, schluessel, datensatz), ...], ohne sie zu entfernen."""
+        with self._lock:
+            rows = self._cnx.execute(
+                "SELECT seq, schluessel, datensatz FROM journal ORDER BY seq LIMIT ?", (int(limit),)
+            ).fetchall()
+        return [(seq, schluessel, tuple(json.loads(d))) for seq, schluessel, d in rows]
+
+    def remove_through(self, seq):
+        """Entfernt alle Einträge bis einschließlich `seq` (nach erfolgreicher Übertragung)."""
+        with self._lock:
+            self._cnx.execute("DELETE FROM journal WHERE seq <= ?", (seq,))
+            self._pending = self._cnx.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+
+    def mark_failed(self, seq, fehler):
+        """Vermerkt einen gescheiterten Übertragungsversuch für alle Einträge bis `seq`."""
+        with self._lock:
+            self._cnx.execute(
+                "UPDATE journal SET versuche = versuche + 1, letzter_fehler = ? WHERE seq <= ?", (str(fehler), seq)
+            )
+
+    def reject(self, seq, fehler):
+        """Verschiebt einen Eintrag, den der Server dauerhaft ablehnt, in die Quarantäne."""
+        with self._lock:
+            # Verschieben in einer Transaktion: bei einem Fehler bleibt der Eintrag im Journal
+            with self._cnx:
+                self._cnx.execute("BEGIN IMMEDIATE")
+                self._cnx.execute(
+                    "INSERT INTO quarantaene (seq, schluessel, datensatz, angelegt, fehler, abgelehnt) "
+                    "SELECT seq, schluessel, datensatz, angelegt, ?, ? FROM journal WHERE seq = ?",
+                    (str(fehler), datetime.now().isoformat(" ", "seconds"), seq)
+                )
+                self._cnx.execute("DELETE FROM journal WHERE seq = ?", (seq,))
+            self._pending = self._cnx.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+            self._rejected = self._cnx.execute("SELECT COUNT(*) FROM quarantaene").fetchone()[0]
+
+    def rejected_entries(self):
+        """Die Quarantäne als [(seq, datensatz, fehler, abgelehnt), ...], älteste zuerst."""
+        with self._lock:
+            rows = self._cnx.execute(
+                "SELECT seq, datensatz, fehler, abgelehnt FROM quarantaene ORDER BY seq"
+            ).fetchall()
+        return [(seq, tuple(json.loads(d)), fehler, abgelehnt) for seq, d, fehler, abgelehnt in rows]
+
+    def requeue(self, seqs):
+        """Stellt Einträge aus der Quarantäne (z.B. nach einer Schemaänderung) erneut hinten ins Journal."""
+        with self._lock:
+            with self._cnx:
+                self._cnx.execute("BEGIN IMMEDIATE")
+                for seq in seqs:
+                    self._cnx.execute(
+                        "INSERT INTO journal (schluessel, datensatz, angelegt) "
+                        "SELECT schluessel, datensatz, angelegt FROM quarantaene WHERE seq = ?", (seq,)
+                    )
+                    self._cnx.execute("DELETE FROM quarantaene WHERE seq = ?", (seq,))
+            self._pending = self._cnx.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+            self._rejected = self._cnx.execute("SELECT COUNT(*) FROM quarantaene").fetchone()[0]
+
+    def discard(self, seqs):
+        """Verwirft Einträge aus der Quarantäne endgültig."""
+        with self._lock:
+            self._cnx.executemany("DELETE FROM quarantaene WHERE seq = ?", [(seq,) for seq in seqs])
+            self._rejected = self._cnx.execute("SELECT COUNT(*) FROM quarantaene").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._cnx.close()
+
+
+class JournalFlusher:
+    """
+    Hintergrund-Thread, der das Journal leert.
+    `write_batch([(schluessel, datensatz), ...])` schreibt einen Block in die Datenbank und
+    gibt (ok, Ergebnis/Fehlermeldung) zurück, z.B. über db_connector.insert_pflanzen_data_idempotent.
+    Wirft es eine der `permanent_errors`, sind die Daten selbst ungültig: dann wird nicht
+    wiederholt, sondern der abgelehnte Eintrag in die Quarantäne verschoben.
+    """
+
+    def __init__(self, journal, write_batch, batch_size=DEFAULT_BATCH_SIZE, permanent_errors=()):
+        self.journal = journal
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.permanent_errors = tuple(permanent_errors)
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="journal-flusher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def wake(self):
+        """Sofortigen Übertragungsversuch anstoßen (z.B. nach einer neuen Messung)."""
+        self._wake.set()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _send(self, batch):
+        """Schreibt Journal-Einträge; Ausnahmen außer den dauerhaften gelten als vorübergehender Fehler."""
+        try:
+            return self.write_batch([(schluessel, datensatz) for _, schluessel, datensatz in batch])
+        except self.permanent_errors:
+            raise
+        except Exception as e:
+            return False, str(e)
+
+    def flush_once(self):
+        """Überträgt einen Block. Gibt False zurück, wenn die Übertragung scheiterte."""
+        batch = self.journal.peek(self.batch_size)
+        if not batch:
+            return True
+        try:
+            ok, result = self._send(batch)
+        except self.permanent_errors:
+            # Mindestens ein Eintrag ist ungültig: einzeln senden, damit nur dieser zurückbleibt
+            return self._flush_single(batch)
+        if ok:
+            self.journal.remove_through(batch[-1][0])
+            self.last_error = None
+        else:
+            self.journal.mark_failed(batch[-1][0], result)
+            self.last_error = result
+        return ok
+
+    def _flush_single(self, batch):
+        for eintrag in batch:
+            seq = eintrag[0]
+            try:
+                ok, result = self._send([eintrag])
+            except self.permanent_errors as e:
+                self.journal.reject(seq, e)
+                continue
+            if not ok:
+                self.journal.mark_failed(seq, result)
+                self.last_error = result
+                return False
+            self.journal.remove_through(seq)
+        self.last_error = None
+        return True
+
+    def _run(self):
+        delay = RETRY_MIN
+        while not self._stop.is_set():
+            if self.journal.pending:
+                if self.flush_once():
+                    delay = RETRY_MIN
+                    continue
+                # Eine neue Messung (wake) beendet die Wartezeit vorzeitig
+                self._wake.wait(delay)
+                delay = min(delay * 2, RETRY_MAX)
+            else:
+                self._wake.wait()
+            self._wake.clear()
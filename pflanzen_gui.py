@@ -1,35 +1,123 @@
 # pflanzen_gui.py
 # -*- coding: utf-8 -*-
+# Als Erstes importiert: setzt den Nullpunkt für --profile-startup
+from startup_profile import STARTUP, DEFAULT_BUDGET_MS
+import argparse
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
-import csv 
 import os 
 import platform  
+import sqlite3
 import subprocess 
 import sys
-import pandas as pd
+import threading
+import time
 from datetime import datetime
-from PIL import Image, ImageTk
+from PIL import ImageTk
 
 # Importiere die Logik aus den Begleitdateien
 from db_connector import (
-    get_db_connection, 
-    setup_database_and_table, 
+    close_all_pools,
+    initialize_database, 
+    run_with_connection, 
     insert_pflanzen_data, 
+    insert_pflanzen_data_idempotent,
+    parse_erstellungsdatum,
+    validate_datensatz,
+    DatensatzAbgelehnt,
     test_db_connection, 
-    fetch_all_data, 
-    delete_data_by_id, 
+    fetch_data_page, 
+    fetch_changes_since, 
+    delete_data_by_ids,
+    delete_data_where,
+    undo_delete,
+    purge_deleted,
+    archive_protokoll,
     save_pflanzen_plan, 
-    get_pflanzen_plan
+    get_pflanzen_plan_cached,
+    get_cached_plan_only,
+    delete_pflanzen_plan,
+    load_plan_index,
+    fetch_plan_weeks,
+    fetch_protokoll_names,
+    run_dosierung_nachlauf,
+    rebuild_anomaly_state,
+    fetch_anomalies,
+    CONNECTION_HEALTH,
+    VERBINDUNG_OK,
+    VERBINDUNG_OFFEN,
+    PLANNING_FIELDS,
+    PROTOKOLL_INSERT_COLUMNS,
+    NAEHRSTOFF_KATALOG,
+    DEFAULT_SORT
 )
 from config_manager import load_config, save_config
+from db_dialect import BACKENDS, BACKEND_SQLITE, backend_of
+from plan_cache import PLAN_INDEX
+from data_importer import import_file
+from data_export import export_protokoll
+from soll_ist import run_comparison
+from timeseries import load_series
+from chart_canvas import TimeSeriesChart
+from tree_pager import TreePager
+from db_executor import DbExecutor
+from image_cache import load_thumbnail, PhotoCache
+from offline_journal import MeasurementJournal, JournalFlusher
+from instrumentation import METRICS, timed, configure as configure_instrumentation
+from anomaly import configure as configure_anomaly
+
+# Intervall (ms), in dem der Export-Dialog den Fortschritt abfragt
+EXPORT_PROGRESS_MS = 200
+
+# Intervall (ms), in dem die Statuszeile die offenen Journal-Einträge anzeigt
+JOURNAL_STATUS_MS = 1000
+
+# Aktualisierungsintervall (ms) des Diagnostik-Tabs, solange er angezeigt wird
+DIAGNOSTICS_REFRESH_MS = 2000
+DIAGNOSTICS_COLUMNS = [("name", "Messpunkt", 360), ("aufrufe", "Aufrufe", 70), ("mittel_ms", "Mittel ms", 85),
+                       ("p50_ms", "p50 ms", 80), ("p95_ms", "p95 ms", 80), ("p99_ms", "p99 ms", 80),
+                       ("max_ms", "Max ms", 85), ("gesamt_ms", "Gesamt ms", 95)]
+
+# Bildgrößen (Breite, Höhe) für Header-Logo und Produkt-Thumbnails im Info-Tab
+LOGO_SIZE = (150, 100)
+THUMBNAIL_SIZE = (100, 100)
+
+# Tipp-Pause (ms), nach der eine Plan-Abfrage für Name/Woche ausgelöst wird
+PLAN_DEBOUNCE_MS = 300
+
+# Sollbereiche für die Filter "pH/EC außerhalb" in der Datenansicht (Voreinstellung)
+PH_RANGE = (5.8, 6.8)
+EC_RANGE = (0.4, 2.0)
+
+# Pause (ms) zwischen zwei Blöcken beim Umkopieren alter Düngermengen ins Langformat
+NACHLAUF_PAUSE_MS = 500
+
+# Abstand (ms), in dem der Papierkorb auf abgelaufene Löschvorgänge geprüft wird
+PURGE_INTERVAL_MS = 60 * 60 * 1000
+
+# Abstand (ms), in dem abgeschlossene Grows ins Archiv verschoben werden
+ARCHIV_INTERVAL_MS = 6 * 60 * 60 * 1000
+
+# Eingabefelder der Düngermengen aus dem Stammkatalog: (Beschriftung, Eingabe-Schlüssel, DB-Spalte)
+NAEHRSTOFF_EINGABEN = [(f"{bezeichnung} ({einheit})", f"entry_{kuerzel}", kuerzel)
+                       for _, kuerzel, bezeichnung, einheit in NAEHRSTOFF_KATALOG]
+
+# Eingabe-Schlüssel -> Spalte des Plans in der Soll-Anzeige
+PLAN_ANZEIGE = {
+    'entry_phase': 'phase', 'entry_licht': 'lichtzyklus_h',
+    **{key: spalte for _, key, spalte in NAEHRSTOFF_EINGABEN},
+    'entry_ph': 'ph_wert_ziel', 'entry_ec': 'ec_wert'
+}
+
+# Wählbare Reihen im Verlaufsdiagramm: Beschriftung -> Spalte (pH/EC sind vorausgewählt)
+CHART_FELDER = {"pH": "ph_wert_ziel", "EC (mS/cm)": "ec_wert", "Licht (h)": "lichtzyklus_h",
+                **{label: spalte for label, _, spalte in NAEHRSTOFF_EINGABEN}}
+CHART_VORAUSWAHL = ("ph_wert_ziel", "ec_wert")
 
-# Definierte Reihenfolge der Nährstofffelder (muss mit DB übereinstimmen)
-PLANNING_FIELDS = [
-    "phase", "lichtzyklus_h", "root_juice_ml_l", "calmag_ml_l", 
-    "bio_grow_ml_l", "fish_mix_ml_l", "bio_heaven_ml_l", "acti_alc_ml_l", 
-    "bio_bloom_ml_l", "top_max_ml_l", "ph_wert_ziel", "ec_wert"
-]
+# Spalten des Auffälligkeiten-Tabs: (Spalte, Überschrift, Breite)
+ANOMALY_COLUMNS = [("protokoll_id", "ID", 60), ("pflanzen_name", "Pflanze", 180), ("woche", "Woche", 60),
+                   ("erstellungsdatum", "Zeitpunkt", 150), ("feld", "Wert", 60), ("wert", "Ist", 70),
+                   ("soll", "Soll", 70), ("z_wert", "z", 60), ("grund", "Grund", 260)]
 
 # Optionen für Dropdowns
 FIELD_OPTIONS = {
@@ -37,9 +125,12 @@ FIELD_OPTIONS = {
     "phase": ["Anzucht", "Wachstum", "Blüte", "Spülen"]
 }
 
+STARTUP.mark("Module importieren")
+
 class PflanzenApp(tk.Tk):
     def __init__(self):
         super().__init__()
+        STARTUP.mark("Tk-Fenster erzeugen")
         self.title("🌱 Pflanzenprotokoll Pro - Biobizz Edition")
         
         # Fenster maximieren
@@ -47,31 +138,197 @@ class PflanzenApp(tk.Tk):
         
         # Konfiguration laden
         self.db_config = load_config()
-        
-        # Initialisiere DB-Struktur beim Start
-        self._initialize_db_structure()
+        configure_instrumentation(self.db_config)
+        configure_anomaly(self.db_config)
+        CONNECTION_HEALTH.configure(self.db_config)
+
+        # Alle DB-Zugriffe laufen im Hintergrund, Ergebnisse kommen per after() zurück
+        self.db = DbExecutor(self, on_busy_change=self._on_db_busy_change, on_error=self._on_db_error)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        # Messungen gehen erst ins lokale Journal, ein Hintergrund-Thread überträgt sie
+        self.schema_ready = False
+        self._setup_journal()
 
         # Variablen für Steuerung
         self.is_auto_refresh_active = tk.BooleanVar(value=False)
         self.refresh_interval = tk.IntVar(value=60)
         self.after_id = None
+        # Hochwassermarken (max. ID, max. Änderungsprotokoll-ID) für die Delta-Aktualisierung
+        self.delta_marks = None
+        # Filter und Sortierung der Datenansicht; beides wertet der Server aus
+        self.data_filters = {}
+        self.data_sort = DEFAULT_SORT
+        # Löschvorgänge dieser Sitzung (loeschung_id, Beschreibung) für Rückgängig, neuester zuletzt
+        self.undo_stack = []
+        self.purge_after_id = None
+        self.archive_after_id = None
+        self.plan_debounce_id = None
         self.plan_labels = {}
-        # Wichtig: Referenzen speichern, damit der Garbage Collector Bilder nicht löscht
-        self.image_refs = [] 
+        # Fertige PhotoImages (begrenzt); angezeigte Bilder hält zusätzlich ihr Label über label.image
+        self.image_refs = PhotoCache()
+        # Bilder werden in einem eigenen Worker dekodiert, damit sie keine DB-Aufgaben blockieren
+        self.images = DbExecutor(self, workers=1)
+        # Noch nicht geladene Produktbilder je Scroll-Frame: [(zeilen_frame, label, pfad)]
+        self.lazy_images = {}
+
+        STARTUP.mark("Konfiguration & Executor")
 
         # Logo laden
         self._setup_logo("diggerwf.jpeg")
 
         # GUI-Komponenten aufbauen
         self.create_menu_bar()
+        self.create_status_bar()
         self.create_main_tabs()
-        
-        # Initialer Refresh der Plan-Liste im Dropdown
-        self._refresh_plan_list()
+        self._update_journal_status()
+        STARTUP.mark("Logo, Menü, Statusleiste, Tab-Platzhalter")
+
+        # DB-Struktur erst nach dem ersten Zeichnen des Fensters initialisieren
+        self.bind("<Map>", self._on_first_map)
+
+    def _on_first_map(self, event):
+        # <Map> kommt auch für Kind-Widgets an, maßgeblich ist nur das Hauptfenster
+        if event.widget is not self: return
+        self.unbind("<Map>")
+        self.after_idle(self._after_first_paint)
+
+    def _after_first_paint(self):
+        STARTUP.mark("Erstes Zeichnen")
+        self._handle_tab_change(None)
+        # Initialisiere DB-Struktur, danach Refresh der Plan-Liste im Dropdown
+        self._initialize_db_structure()
 
     def __del__(self):
-        """Stoppt Timer beim Beenden."""
+        """Stoppt Timer beim Beenden und gibt die Pool-Verbindungen frei."""
         self._toggle_auto_refresh(stop=True)
+        close_all_pools()
+
+    def _on_close(self):
+        self._toggle_auto_refresh(stop=True)
+        if self.purge_after_id is not None: self.after_cancel(self.purge_after_id)
+        if self.archive_after_id is not None: self.after_cancel(self.archive_after_id)
+        if self.journal is not None:
+            # Nicht übertragene Messungen bleiben im Journal und werden beim nächsten Start gesendet
+            self.journal_flusher.stop(); self.journal.close()
+        self.db.shutdown()
+        self.images.shutdown()
+        close_all_pools()
+        self.destroy()
+
+    def create_status_bar(self):
+        """Statuszeile mit Busy-Anzeige für laufende Datenbankzugriffe."""
+        sb = tk.Frame(self, bd=1, relief=tk.SUNKEN); sb.pack(side=tk.BOTTOM, fill='x')
+        self.status_text = tk.Label(sb, text="Bereit", anchor='w'); self.status_text.pack(side=tk.LEFT, padx=5)
+        self.busy_bar = ttk.Progressbar(sb, mode='indeterminate', length=120)
+        self.busy_label = tk.Label(sb, text="", fg='#555555')
+        self.busy_label.pack(side=tk.RIGHT, padx=5)
+        self.journal_label = tk.Label(sb, text="", fg='#555555')
+        self.journal_label.pack(side=tk.RIGHT, padx=5)
+        self.journal_pending_shown = 0
+        self.quarantine_label = tk.Label(sb, text="", fg='#C62828', cursor='hand2')
+        self.quarantine_label.pack(side=tk.RIGHT, padx=5)
+        self.quarantine_label.bind("<Button-1>", lambda e: self._show_quarantine())
+        self.health_label = tk.Label(sb, text="", fg='#555555')
+        self.health_label.pack(side=tk.RIGHT, padx=5)
+
+    def _setup_journal(self):
+        """Öffnet das Offline-Journal; ohne beschreibbare Journal-Datei wird direkt gespeichert."""
+        try:
+            self.journal = MeasurementJournal(self.db_config.get('journal_path') or 'messungen_journal.db')
+        except (sqlite3.Error, OSError) as e:
+            print(f"Offline-Journal nicht verfügbar, speichere direkt: {e}")
+            self.journal = None; return
+        batch = int(self.db_config.get('journal_batch') or 200)
+        self.journal_flusher = JournalFlusher(self.journal, self._write_journal_batch, batch_size=max(1, batch),
+                                              permanent_errors=(DatensatzAbgelehnt,))
+        self.journal_flusher.start()
+
+    def _write_journal_batch(self, eintraege):
+        """Läuft im Flusher-Thread. War der Server beim Start nicht erreichbar, wird das Schema nachgezogen."""
+        if not self.schema_ready:
+            ok, msg = initialize_database(self.db_config)
+            if not ok: return False, msg
+            self.schema_ready = True
+        return run_with_connection(self.db_config, insert_pflanzen_data_idempotent, eintraege)
+
+    def _update_journal_status(self):
+        self._show_journal_status()
+        self._show_connection_status()
+        self.after(JOURNAL_STATUS_MS, self._update_journal_status)
+
+    def _show_journal_status(self):
+        """Zeigt die Zahl offener Journal-Einträge; sinkt sie, sind Messungen in der DB angekommen."""
+        if self.journal is not None:
+            pending = self.journal.pending
+            if pending:
+                fehler = self.journal_flusher.last_error
+                self.journal_label.config(text=f"📮 {pending} Messung(en) warten auf Übertragung" + (" (offline)" if fehler else ""),
+                                          fg='#C62828' if fehler else '#555555')
+            else:
+                self.journal_label.config(text="")
+            if pending < self.journal_pending_shown: self.refresh_data_delta(); self._refresh_anomalies()
+            self.journal_pending_shown = pending
+            abgelehnt = self.journal.rejected
+            self.quarantine_label.config(text=f"⚠️ {abgelehnt} Messung(en) abgelehnt" if abgelehnt else "")
+
+    def _show_quarantine(self):
+        """Vom Server abgelehnte Messungen mit Grund anzeigen; erneut senden oder verwerfen."""
+        if self.journal is None: return
+        win = tk.Toplevel(self); win.title("Abgelehnte Messungen"); win.transient(self); win.geometry("800x300")
+        spalten = [("pflanzen_name", "Pflanze", 140), ("woche", "Woche", 60), ("erstellungsdatum", "Datum", 140),
+                   ("fehler", "Grund", 300), ("abgelehnt", "Abgelehnt am", 140)]
+        tree = ttk.Treeview(win, columns=[c for c, _, _ in spalten], show='headings', selectmode="extended")
+        for c, text, breite in spalten:
+            tree.heading(c, text=text); tree.column(c, width=breite, anchor='w')
+        tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+        def _fill():
+            tree.delete(*tree.get_children())
+            for seq, ds, fehler, abgelehnt in self.journal.rejected_entries():
+                d = dict(zip(PROTOKOLL_INSERT_COLUMNS, ds))
+                tree.insert("", tk.END, iid=str(seq), values=(d.get("pflanzen_name"), d.get("woche"),
+                                                              d.get("erstellungsdatum"), fehler, abgelehnt))
+            self._show_journal_status()
+
+        def _requeue():
+            seqs = [int(i) for i in tree.selection()]
+            if not seqs: return
+            self.journal.requeue(seqs); self.journal_flusher.wake(); _fill()
+
+        def _discard():
+            seqs = [int(i) for i in tree.selection()]
+            if not seqs: return
+            if not messagebox.askyesno("Verwerfen", f"{len(seqs)} Messung(en) endgültig verwerfen?", parent=win): return
+            self.journal.discard(seqs); _fill()
+
+        bf = tk.Frame(win); bf.pack(pady=(0, 10))
+        tk.Button(bf, text="🔁 Erneut senden", command=_requeue).pack(side=tk.LEFT, padx=5)
+        tk.Button(bf, text="🗑️ Verwerfen", bg='#FFCDD2', command=_discard).pack(side=tk.LEFT, padx=5)
+        _fill()
+
+    def _show_connection_status(self):
+        """Ampel für den Datenbankserver; bei offenem Schutzschalter mit Zeit bis zum nächsten Versuch."""
+        if backend_of(self.db_config) == BACKEND_SQLITE:
+            self.health_label.config(text="💾 SQLite", fg='#555555'); return
+        zustand, meldung, warten = CONNECTION_HEALTH.status()
+        if zustand == VERBINDUNG_OK:
+            self.health_label.config(text="🟢 Server verbunden", fg='#555555')
+        elif zustand == VERBINDUNG_OFFEN:
+            self.health_label.config(text=f"🔴 Server nicht erreichbar, nächster Versuch in {warten:.0f} s", fg='#C62828')
+        else:
+            self.health_label.config(text="🟡 Verbindungsprobleme", fg='#E65100')
+
+    def _on_db_busy_change(self, pending):
+        if pending > 0:
+            self.busy_label.config(text=f"⏳ Datenbank arbeitet... ({pending})")
+            if not self.busy_bar.winfo_ismapped(): self.busy_bar.pack(side=tk.RIGHT, padx=5); self.busy_bar.start(15)
+        else:
+            self.busy_label.config(text="")
+            if self.busy_bar.winfo_ismapped(): self.busy_bar.stop(); self.busy_bar.pack_forget()
+
+    def _on_db_error(self, exc):
+        print(f"DB-Fehler: {exc}")
+        self.status_text.config(text=f"❌ {exc}", fg='red')
 
     def _set_maximized_state(self):
         """Setzt das Fenster auf Vollbild je nach Betriebssystem."""
@@ -83,31 +340,111 @@ class PflanzenApp(tk.Tk):
             except: self.geometry("1200x800")
 
     def _initialize_db_structure(self):
-        """Erstellt Datenbank und Tabellen, falls nicht vorhanden."""
-        try:
-            cnx, cursor = get_db_connection(self.db_config)
-            if cnx:
-                setup_database_and_table(cursor, self.db_config['database'])
-                cnx.close()
-        except Exception as e:
-            print(f"DB-Fehler beim Start: {e}")
+        """Erstellt Datenbank und Tabellen, falls nicht vorhanden (im Hintergrund)."""
+        start = time.perf_counter()
+        def _done(result):
+            ok, msg = result
+            if not ok: print(f"DB-Fehler beim Start: {msg}"); self.status_text.config(text=msg, fg='red')
+            else:
+                self.status_text.config(text=msg, fg='black'); self.schema_ready = True
+                if self.journal is not None: self.journal_flusher.wake()
+                self._run_dosierung_nachlauf()
+                self._rebuild_anomalies(only_pending=True)
+                self._run_purge()
+                self._run_archive()
+            self._refresh_plan_list()
+            STARTUP.add("DB-Initialisierung (Hintergrund)", (time.perf_counter() - start) * 1000)
+            STARTUP.report()
+        self.db.submit(initialize_database, self.db_config, on_done=_done, key="init_db")
+
+    def _run_dosierung_nachlauf(self):
+        """Kopiert alte Düngermengen blockweise ins Langformat; zwischen den Blöcken laufen andere Abfragen."""
+        def _done(result):
+            ok, offen = result
+            if ok and offen: self.after(NACHLAUF_PAUSE_MS, self._run_dosierung_nachlauf)
+            elif not ok: print(f"Umkopieren der Düngermengen unterbrochen: {offen}")
+        self.db.submit(run_dosierung_nachlauf, self.db_config, on_done=_done, key="dosierung_nachlauf")
+
+    def _run_purge(self):
+        """Löscht abgelaufene Papierkorb-Zeilen in kleinen Blöcken endgültig, danach erst wieder in PURGE_INTERVAL_MS."""
+        self.purge_after_id = None
+        def _done(result):
+            ok, offen = result
+            if not ok: print(f"Papierkorb leeren unterbrochen: {offen}")
+            self.purge_after_id = self.after(NACHLAUF_PAUSE_MS if ok and offen else PURGE_INTERVAL_MS, self._run_purge)
+        self.db.submit(purge_deleted, self.db_config, self.db_config.get('trash_keep_days') or 7,
+                       on_done=_done, key="papierkorb")
+
+    def _run_archive(self, archiviert=0):
+        """Verschiebt abgeschlossene Grows blockweise ins Archiv, danach erst wieder in ARCHIV_INTERVAL_MS."""
+        self.archive_after_id = None
+        def _done(result):
+            ok, data = result
+            if not ok:
+                print(f"Archivieren unterbrochen: {data}")
+                self.archive_after_id = self.after(ARCHIV_INTERVAL_MS, self._run_archive); return
+            anzahl, offen = data
+            if offen: self.archive_after_id = self.after(NACHLAUF_PAUSE_MS, self._run_archive, archiviert + anzahl); return
+            if archiviert + anzahl:
+                self.status_text.config(text=f"📦 {archiviert + anzahl} Messungen abgeschlossener Grows archiviert.", fg='black')
+                self.refresh_data_delta()
+            self.archive_after_id = self.after(ARCHIV_INTERVAL_MS, self._run_archive)
+        self.db.submit(archive_protokoll, self.db_config, self.db_config.get('archive_after_days') or 180,
+                       on_done=_done, key="archiv")
+
+    def _rebuild_anomalies(self, only_pending=False):
+        """Baut die Auffälligkeitserkennung aus dem ganzen Protokoll auf (nach der Migration oder auf Wunsch)."""
+        def _done(result):
+            ok, msg = result
+            if msg: self.status_text.config(text=msg, fg='black' if ok else 'red')
+            if ok and msg: self._refresh_anomalies()
+        self.db.submit(rebuild_anomaly_state, self.db_config, only_pending, on_done=_done, key="anomalie_aufbau")
 
     def _setup_logo(self, image_path):
-        """Lädt das Header-Logo."""
+        """Header-Logo: Platzhalter in Endgröße sofort, das (gecachte) Bild folgt aus dem Hintergrund."""
         if os.path.exists(image_path):
-            try:
-                img = Image.open(image_path)
-                img = img.resize((150, 100), Image.Resampling.LANCZOS)
-                self.logo_img = ImageTk.PhotoImage(img)
-                tk.Label(self, image=self.logo_img).pack(pady=5)
-            except: pass
+            self.logo_img = tk.PhotoImage(width=LOGO_SIZE[0], height=LOGO_SIZE[1])
+            lbl = tk.Label(self, image=self.logo_img); lbl.pack(pady=5)
+            self._load_image_async(lbl, image_path, LOGO_SIZE, exact=True)
+
+    def _load_image_async(self, label, path, size, exact=False):
+        """Setzt das Thumbnail von `path` in `label`; Dekodieren und Skalieren laufen im Hintergrund."""
+        key = (path, size, exact)
+        photo = self.image_refs.get(key)
+        if photo is not None:
+            label.config(image=photo, text=""); label.image = photo
+            return
+        def _done(img):
+            if not label.winfo_exists(): return
+            photo = ImageTk.PhotoImage(img)
+            self.image_refs.put(key, photo)
+            label.config(image=photo, text=""); label.image = photo
+        def _error(exc):
+            if label.winfo_exists(): label.config(image="", text="[Bild Fehler]")
+        self.images.submit(load_thumbnail, path, size, exact, on_done=_done, on_error=_error)
+
+    def _load_visible_images(self, scroll_f):
+        """Lädt die Produktbilder, die im sichtbaren Bereich (plus eine Bildschirmhöhe) liegen."""
+        pending = self.lazy_images.get(scroll_f)
+        canvas = scroll_f.canvas
+        if not pending or not canvas.winfo_ismapped(): return
+        top = canvas.canvasy(0); height = canvas.winfo_height()
+        bottom = top + 2 * height
+        rest = []
+        for row, label, path in pending:
+            y = row.winfo_y()
+            if y + row.winfo_height() >= top and y <= bottom:
+                self._load_image_async(label, path, THUMBNAIL_SIZE)
+            else:
+                rest.append((row, label, path))
+        self.lazy_images[scroll_f] = rest
 
     def create_menu_bar(self):
         menubar = tk.Menu(self)
         self.config(menu=menubar)
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Datei", menu=file_menu)
-        file_menu.add_command(label="Beenden", command=self.quit)
+        file_menu.add_command(label="Beenden", command=self._on_close)
         db_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Datenbank", menu=db_menu)
         db_menu.add_command(label="MySQL Einstellungen", command=self.show_db_settings)
@@ -116,33 +453,51 @@ class PflanzenApp(tk.Tk):
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(pady=10, padx=10, expand=True, fill="both")
         
+        # Tabs werden erst bei ihrer ersten Auswahl aufgebaut, bis dahin zeigen sie einen Platzhalter
+        self.tab_builders = {}
         # TAB 0: INFO & GUIDE (Indoor / Outdoor / Substrate)
-        self.tab_info = tk.Frame(self.notebook, padx=10, pady=10)
-        self.notebook.add(self.tab_info, text="ℹ️ Info & Guide")
-        self.create_info_tab_content(self.tab_info)
-
+        self.tab_info = self._add_lazy_tab("ℹ️ Info & Guide", self.create_info_tab_content)
         # TAB 1: EINGABE
-        self.tab_eingabe = tk.Frame(self.notebook, padx=10, pady=10)
-        self.notebook.add(self.tab_eingabe, text="🌿 Daten eingeben")
-        self.create_input_widgets(self.tab_eingabe)
-
+        self.tab_eingabe = self._add_lazy_tab("🌿 Daten eingeben", self.create_input_widgets)
         # TAB 2: ANZEIGE
-        self.tab_anzeige = tk.Frame(self.notebook, padx=10, pady=10)
-        self.notebook.add(self.tab_anzeige, text="📈 Daten anzeigen")
-        self.create_display_widgets(self.tab_anzeige)
-
+        self.tab_anzeige = self._add_lazy_tab("📈 Daten anzeigen", self.create_display_widgets)
+        # TAB 2b: SOLL/IST-ABGLEICH
+        self.tab_vergleich = self._add_lazy_tab("⚖️ Soll/Ist", self.create_comparison_tab)
+        # TAB 2c: VERLAUF (Zeitreihen je Pflanze gegen den Plan)
+        self.tab_verlauf = self._add_lazy_tab("📉 Verlauf", self.create_chart_tab)
+        # TAB 2d: AUFFÄLLIGKEITEN (laufende pH/EC-Erkennung)
+        self.tab_anomalien = self._add_lazy_tab("⚠️ Auffälligkeiten", self.create_anomaly_tab)
         # TAB 3: SETTINGS
-        self.tab_settings = tk.Frame(self.notebook, padx=10, pady=10)
-        self.notebook.add(self.tab_settings, text="⚙️ Einstellungen")
-        self.create_settings_tab(self.tab_settings)
-        
+        self.tab_settings = self._add_lazy_tab("⚙️ Einstellungen", self.create_settings_tab)
         # TAB 4: UPDATE
-        self.tab_update = tk.Frame(self.notebook, padx=10, pady=10)
-        self.notebook.add(self.tab_update, text="🔄 Update")
-        self.create_update_tab(self.tab_update)
+        self.tab_update = self._add_lazy_tab("🔄 Update", self.create_update_tab)
+        # TAB 5: DIAGNOSTIK (Laufzeiten von DB-Zugriffen und GUI-Handlern)
+        self.tab_diagnostik = self._add_lazy_tab("🩺 Diagnostik", self.create_diagnostics_tab)
+        self.diag_after_id = None
 
         self.notebook.bind("<<NotebookTabChanged>>", self._handle_tab_change)
 
+    def _add_lazy_tab(self, text, builder):
+        frame = tk.Frame(self.notebook, padx=10, pady=10)
+        self.notebook.add(frame, text=text)
+        placeholder = tk.Label(frame, text="⏳ Wird geladen...", fg="gray"); placeholder.pack(expand=True)
+        self.tab_builders[str(frame)] = (frame, builder, placeholder)
+        return frame
+
+    def _tab_built(self, frame):
+        return str(frame) not in self.tab_builders
+
+    def _build_tab(self, key):
+        """Baut einen Tab beim ersten Anzeigen auf. Gibt False zurück, wenn er schon aufgebaut war."""
+        entry = self.tab_builders.pop(key, None)
+        if entry is None: return False
+        frame, builder, placeholder = entry
+        with STARTUP.phase(f"Tab aufbauen: {self.notebook.tab(frame, 'text')}"):
+            placeholder.destroy()
+            builder(frame)
+        if frame is self.tab_eingabe: self._refresh_plan_list()
+        return True
+
     def create_info_tab_content(self, parent_frame):
         """Erstellt den Guide mit Indoor, Outdoor, Substraten und Düngeschema."""
         info_nb = ttk.Notebook(parent_frame)
@@ -249,9 +604,15 @@ class PflanzenApp(tk.Tk):
         vsb = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
         scroll_f = tk.Frame(canvas)
         
+        scroll_f.canvas = canvas
         scroll_f.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
         canvas.create_window((0, 0), window=scroll_f, anchor="nw")
-        canvas.configure(yscrollcommand=vsb.set)
+        # Jede Scroll- oder Größenänderung prüft, ob weitere Produktbilder sichtbar werden
+        def _on_yscroll(first, last):
+            vsb.set(first, last); self._load_visible_images(scroll_f)
+        canvas.configure(yscrollcommand=_on_yscroll)
+        for seq in ("<Configure>", "<Map>"):
+            canvas.bind(seq, lambda e: self.after_idle(self._load_visible_images, scroll_f))
         
         def _on_mousewheel(event):
             if event.num == 4 or event.delta > 0:
@@ -272,14 +633,12 @@ class PflanzenApp(tk.Tk):
         f.pack(fill="x", expand=True)
         img_path = os.path.join("biobizz", img_name)
         if os.path.exists(img_path):
-            try:
-                img_obj = Image.open(img_path)
-                img_obj.thumbnail((100, 100))
-                photo = ImageTk.PhotoImage(img_obj)
-                self.image_refs.append(photo)
-                tk.Label(f, image=photo).grid(row=0, column=0, rowspan=4, padx=15)
-            except: 
-                tk.Label(f, text="[Bild Fehler]").grid(row=0, column=0, rowspan=4)
+            # Platzhalter in Thumbnail-Größe; das Bild wird erst geladen, wenn die Zeile sichtbar wird
+            if not hasattr(self, "thumb_placeholder"):
+                self.thumb_placeholder = tk.PhotoImage(width=THUMBNAIL_SIZE[0], height=THUMBNAIL_SIZE[1])
+            lbl = tk.Label(f, image=self.thumb_placeholder, compound="center")
+            lbl.grid(row=0, column=0, rowspan=4, padx=15)
+            self.lazy_images.setdefault(parent, []).append((f, lbl, img_path))
         else:
             tk.Label(f, text="[Kein Bild]").grid(row=0, column=0, rowspan=4)
 
@@ -316,10 +675,7 @@ class PflanzenApp(tk.Tk):
         self.fields = [
             ("Datum (JJJJ-MM-TT)", "entry_datum"), ("Name der Pflanze", "entry_name"),
             ("Woche", "entry_woche"), ("Phase", "entry_phase"), ("Lichtzyklus (h)", "entry_licht"),
-            ("Root·Juice (ml/L)", "entry_root"), ("Calmag (ml/L)", "entry_calmag"),
-            ("Bio·Grow (ml/L)", "entry_grow"), ("Fish·Mix (ml/L)", "entry_fish"),
-            ("Bio·Heaven (ml/L)", "entry_heaven"), ("Acti·a•alc (ml/L)", "entry_acti"),
-            ("Bio·Bloom (ml/L)", "entry_bloom"), ("Top·Max (ml/L)", "entry_topmax"),
+            *[(label, key) for label, key, _ in NAEHRSTOFF_EINGABEN],
             ("pH-Wert (Ziel)", "entry_ph"), ("EC-Wert", "entry_ec")
         ]
         
@@ -343,7 +699,7 @@ class PflanzenApp(tk.Tk):
                 entry.grid(row=i, column=1)
             self.entries[key] = entry
             if key in ["entry_name", "entry_woche"]:
-                entry.bind("<KeyRelease>", self._load_plan_for_current_inputs)
+                entry.bind("<KeyRelease>", self._on_plan_input_changed)
             if key not in ["entry_datum", "entry_name", "entry_woche"]:
                 row_f = tk.Frame(plan_display_frame)
                 row_f.grid(row=plan_display_row, column=0, sticky='w', pady=2)
@@ -359,17 +715,16 @@ class PflanzenApp(tk.Tk):
         tk.Button(bp_f, text="Planung Bearbeiten (SOLL)", command=self.open_plan_window, bg='orange', fg='white', font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=5)
         tk.Button(bp_f, text="Planung Löschen", command=self._delete_plan_logic, bg='red', fg='white', font=('Arial', 9)).pack(side=tk.LEFT, padx=5)
 
-    def _refresh_plan_list(self):
-        try:
-            cnx, _ = get_db_connection(self.db_config)
-            if cnx:
-                cursor = cnx.cursor()
-                cursor.execute(f"USE {self.db_config['database']}")
-                cursor.execute("SELECT DISTINCT pflanzen_name FROM pflanzenplanung ORDER BY pflanzen_name ASC")
-                names = [row[0] for row in cursor.fetchall()]
-                self.plan_auswahl_combobox['values'] = names
-                cursor.close(); cnx.close()
-        except: pass
+    def _refresh_plan_list(self, reload=True):
+        """Füllt das Plan-Dropdown aus dem Plan-Index; mit reload (oder veraltetem Index) wird er neu geladen."""
+        # Ohne Eingabe-Tab gibt es kein Dropdown; die Liste wird beim Aufbau des Tabs geladen
+        if not self._tab_built(self.tab_eingabe): return
+        if not reload and PLAN_INDEX.is_fresh(self.db_config):
+            self.plan_auswahl_combobox['values'] = PLAN_INDEX.names(); return
+        def _done(result):
+            names, _ = result
+            if names is not None: self.plan_auswahl_combobox['values'] = names
+        self.db.submit(load_plan_index, self.db_config, on_done=_done, key="plan_names")
 
     def _on_plan_dropdown_select(self, event):
         name = self.plan_auswahl_combobox.get()
@@ -377,20 +732,21 @@ class PflanzenApp(tk.Tk):
         if name:
             self.entries['entry_name'].delete(0, tk.END)
             self.entries['entry_name'].insert(0, name)
-            try:
-                cnx, _ = get_db_connection(self.db_config)
-                if cnx:
-                    cursor = cnx.cursor()
-                    cursor.execute(f"USE {self.db_config['database']}")
-                    cursor.execute("SELECT woche FROM pflanzenplanung WHERE pflanzen_name = %s ORDER BY woche ASC", (name,))
-                    weeks = [row[0] for row in cursor.fetchall()]
-                    self.wochen_auswahl_combobox['values'] = weeks
-                    if weeks:
-                        if akt_w in [str(w) for w in weeks]: self.wochen_auswahl_combobox.set(akt_w)
-                        else: self.wochen_auswahl_combobox.current(0)
-                        self._on_week_dropdown_select(None)
-                    cursor.close(); cnx.close()
-            except: pass
+            def _done(result):
+                weeks, _ = result
+                if weeks is None: return
+                self.wochen_auswahl_combobox['values'] = weeks
+                if weeks:
+                    if akt_w in [str(w) for w in weeks]: self.wochen_auswahl_combobox.set(akt_w)
+                    else: self.wochen_auswahl_combobox.current(0)
+                    self._on_week_dropdown_select(None)
+            if PLAN_INDEX.is_loaded(self.db_config):
+                # Planwechsel ohne DB-Zugriff; ein veralteter Index wird im Hintergrund aufgefrischt
+                _done((PLAN_INDEX.weeks(name), None))
+                if not PLAN_INDEX.is_fresh(self.db_config): self._refresh_plan_list()
+                return
+            # Schneller Planwechsel: die Abfrage für den vorherigen Plan wird verworfen
+            self.db.submit(fetch_plan_weeks, self.db_config, name, on_done=_done, key="plan_weeks")
 
     def _on_week_dropdown_select(self, event):
         w = self.wochen_auswahl_combobox.get()
@@ -403,43 +759,51 @@ class PflanzenApp(tk.Tk):
         name = self.plan_auswahl_combobox.get()
         if not name: messagebox.showwarning("Hinweis", "Bitte wählen Sie erst einen Plan aus."); return
         if messagebox.askyesno("Löschen", f"Möchten Sie den Plan für '{name}' wirklich löschen?"):
-            try:
-                cnx, _ = get_db_connection(self.db_config)
-                if cnx:
-                    cursor = cnx.cursor()
-                    cursor.execute(f"USE {self.db_config['database']}")
-                    cursor.execute("DELETE FROM pflanzenplanung WHERE pflanzen_name = %s", (name,))
-                    cnx.commit(); cnx.close()
-                    messagebox.showinfo("Erfolg", f"Plan für {name} gelöscht.")
-                    self._refresh_plan_list(); self._load_plan_for_current_inputs()
-            except Exception as e: messagebox.showerror("Fehler", f"Konnte nicht löschen: {e}")
+            def _done(result):
+                suc, msg = result
+                if suc:
+                    messagebox.showinfo("Erfolg", msg)
+                    # delete_pflanzen_plan hat den Plan-Index bereits angepasst
+                    self._refresh_plan_list(reload=False); self._load_plan_for_current_inputs()
+                else: messagebox.showerror("Fehler", msg)
+            self.db.submit(delete_pflanzen_plan, self.db_config, name, on_done=_done)
 
     def _set_today_date(self, entry_widget):
         today = datetime.now().strftime("%Y-%m-%d")
         entry_widget.delete(0, tk.END); entry_widget.insert(0, today)
 
-    def _load_plan_for_current_inputs(self, event=None):
+    def _on_plan_input_changed(self, event=None):
+        """Tastendruck in Name/Woche: Cache-Treffer sofort anzeigen, die DB erst nach der Tipp-Pause fragen."""
+        if self.plan_debounce_id: self.after_cancel(self.plan_debounce_id); self.plan_debounce_id = None
         name = self.entries['entry_name'].get().strip()
         w_t = self.entries['entry_woche'].get().strip()
         if not name or not w_t: self._update_plan_display(None, None); return
-        try:
-            w = int(w_t)
-            v, c = get_pflanzen_plan(self.db_config, name, w)
-            self._update_plan_display(v, c)
-        except: self._update_plan_display(None, None)
+        try: w = int(w_t)
+        except ValueError: self._update_plan_display(None, None); return
+        hit, value = get_cached_plan_only(self.db_config, name, w)
+        if hit: self._update_plan_display(*value)
+        else: self.plan_debounce_id = self.after(PLAN_DEBOUNCE_MS, self._load_plan_for_current_inputs)
+
+    @timed
+    def _load_plan_for_current_inputs(self, event=None):
+        if self.plan_debounce_id: self.after_cancel(self.plan_debounce_id); self.plan_debounce_id = None
+        name = self.entries['entry_name'].get().strip()
+        w_t = self.entries['entry_woche'].get().strip()
+        if not name or not w_t: self.db.cancel("plan_lookup"); self._update_plan_display(None, None); return
+        try: w = int(w_t)
+        except ValueError: self.db.cancel("plan_lookup"); self._update_plan_display(None, None); return
+        hit, value = get_cached_plan_only(self.db_config, name, w)
+        if hit: self.db.cancel("plan_lookup"); self._update_plan_display(*value); return
+        # Eine neuere Eingabe storniert die noch laufende Abfrage der vorherigen
+        self.db.submit(get_pflanzen_plan_cached, self.db_config, name, w,
+                       on_done=lambda r: self._update_plan_display(*r), key="plan_lookup")
 
     def _update_plan_display(self, values, columns):
         if values is None:
             for l in self.plan_labels.values(): l.config(text="---", fg="black")
             return
         data = dict(zip(columns, values))
-        mapping = {
-            'entry_phase': 'phase', 'entry_licht': 'lichtzyklus_h', 'entry_root': 'root_juice_ml_l',
-            'entry_calmag': 'calmag_ml_l', 'entry_grow': 'bio_grow_ml_l', 'entry_fish': 'fish_mix_ml_l',
-            'entry_heaven': 'bio_heaven_ml_l', 'entry_acti': 'acti_alc_ml_l', 'entry_bloom': 'bio_bloom_ml_l',
-            'entry_topmax': 'top_max_ml_l', 'entry_ph': 'ph_wert_ziel', 'entry_ec': 'ec_wert'
-        }
-        for gui, db in mapping.items():
+        for gui, db in PLAN_ANZEIGE.items():
             if gui in self.plan_labels:
                 val = data.get(db)
                 if val is not None:
@@ -458,10 +822,8 @@ class PflanzenApp(tk.Tk):
         ff = tk.Frame(pw); ff.pack(pady=10)
         p_entries = {}
         fields = [
-            ("phase", "Phase"), ("lichtzyklus_h", "Lichtzyklus (h)"), ("root_juice_ml_l", "Root·Juice (ml/L)"),
-            ("calmag_ml_l", "Calmag (ml/L)"), ("bio_grow_ml_l", "Bio·Grow (ml/L)"), ("fish_mix_ml_l", "Fish·Mix (ml/L)"),
-            ("bio_heaven_ml_l", "Bio·Heaven (ml/L)"), ("acti_alc_ml_l", "Acti·a•alc (ml/L)"),
-            ("bio_bloom_ml_l", "Bio·Bloom (ml/L)"), ("top_max_ml_l", "Top·Max (ml/L)"),
+            ("phase", "Phase"), ("lichtzyklus_h", "Lichtzyklus (h)"),
+            *[(spalte, label) for label, _, spalte in NAEHRSTOFF_EINGABEN],
             ("ph_wert_ziel", "pH-Wert (Ziel)"), ("ec_wert", "EC-Wert (Soll)")
         ]
         for i, (k, l) in enumerate(fields):
@@ -470,18 +832,19 @@ class PflanzenApp(tk.Tk):
             else: e = tk.Entry(ff, width=20)
             e.grid(row=i, column=1, padx=5, pady=2); p_entries[k] = e
         
-        def _load():
-            try:
-                n, w = en.get().strip(), int(ew.get())
-                p, c = get_pflanzen_plan(self.db_config, n, w)
-                if p:
-                    d = dict(zip(c, p))
-                    for k, ent in p_entries.items():
-                        v = d.get(k, "")
-                        if isinstance(ent, ttk.Combobox): ent.set(str(v))
-                        else: ent.delete(0, tk.END); ent.insert(0, f"{v:.2f}" if isinstance(v, float) else str(v))
-            except: pass
-        _load()
+        def _fill(result):
+            p, c = result
+            if p and pw.winfo_exists():
+                d = dict(zip(c, p))
+                for k, ent in p_entries.items():
+                    v = d.get(k, "")
+                    if isinstance(ent, ttk.Combobox): ent.set(str(v))
+                    else: ent.delete(0, tk.END); ent.insert(0, f"{v:.2f}" if isinstance(v, float) else str(v))
+        try:
+            hit, value = get_cached_plan_only(self.db_config, en.get().strip(), int(ew.get()))
+            if hit: _fill(value)
+            else: self.db.submit(get_pflanzen_plan_cached, self.db_config, en.get().strip(), int(ew.get()), on_done=_fill)
+        except ValueError: pass
         tk.Button(pw, text="Planung Speichern", bg='blue', fg='white', font=('Arial', 10, 'bold'),
                   command=lambda: self._save_plan_from_window(pw, en, ew, p_entries)).pack(pady=20)
 
@@ -495,13 +858,16 @@ class PflanzenApp(tk.Tk):
                 if fk == "phase": lst.append(v)
                 elif fk == "lichtzyklus_h": lst.append(int(float(v)) if v else 0)
                 else: lst.append(float(v) if v else 0.0)
-            cnx, _ = get_db_connection(self.db_config)
-            if cnx:
-                suc, msg = save_pflanzen_plan(cnx, tuple(lst))
-                cnx.close()
-                if suc: messagebox.showinfo("Erfolg", msg); win.destroy(); self._refresh_plan_list(); self._load_plan_for_current_inputs()
-                else: messagebox.showerror("Fehler", msg)
-        except Exception as e: messagebox.showerror("Fehler", f"Ungültig: {e}")
+        except Exception as e: messagebox.showerror("Fehler", f"Ungültig: {e}"); return
+        def _done(result):
+            suc, msg = result
+            if suc:
+                messagebox.showinfo("Erfolg", msg)
+                if win.winfo_exists(): win.destroy()
+                # save_pflanzen_plan hat den Plan-Index bereits ergänzt
+                self._refresh_plan_list(reload=False); self._load_plan_for_current_inputs()
+            else: messagebox.showerror("Fehler", msg)
+        self.db.submit(run_with_connection, self.db_config, save_pflanzen_plan, tuple(lst), on_done=_done)
 
     def save_data_to_db(self):
         try:
@@ -510,25 +876,30 @@ class PflanzenApp(tk.Tk):
             ds = (
                 self.entries['entry_name'].get().strip(), int(self.entries['entry_woche'].get()),
                 self.entries['entry_phase'].get().strip(), int(self.entries['entry_licht'].get() or 0),
-                float(self.entries['entry_root'].get().replace(',', '.') or 0.0),
-                float(self.entries['entry_calmag'].get().replace(',', '.') or 0.0),
-                float(self.entries['entry_grow'].get().replace(',', '.') or 0.0),
-                float(self.entries['entry_fish'].get().replace(',', '.') or 0.0),
-                float(self.entries['entry_heaven'].get().replace(',', '.') or 0.0),
-                float(self.entries['entry_acti'].get().replace(',', '.') or 0.0),
-                float(self.entries['entry_bloom'].get().replace(',', '.') or 0.0),
-                float(self.entries['entry_topmax'].get().replace(',', '.') or 0.0),
+                *[float(self.entries[key].get().replace(',', '.') or 0.0) for _, key, _ in NAEHRSTOFF_EINGABEN],
                 float(self.entries['entry_ph'].get().replace(',', '.') or 0.0),
                 float(self.entries['entry_ec'].get().replace(',', '.') or 0.0),
-                self.entries['entry_datum'].get()
+                parse_erstellungsdatum(self.entries['entry_datum'].get().strip())
             )
-            cnx, cursor = get_db_connection(self.db_config)
-            if cnx:
-                setup_database_and_table(cursor, self.db_config['database'])
-                suc, msg = insert_pflanzen_data(cnx, ds); cnx.close()
-                if suc: messagebox.showinfo("Erfolg", msg); self.load_data_into_treeview()
-                else: messagebox.showerror("Fehler", msg)
-        except Exception as e: messagebox.showerror("Fehler", f"Fehler: {e}")
+            # Vor dem Journal prüfen: was dort als gesichert gilt, muss der Server auch annehmen
+            validate_datensatz(ds)
+        except Exception as e: messagebox.showerror("Fehler", f"Fehler: {e}"); return
+        if self.journal is not None:
+            # Lokal gesichert ist die Messung sofort; die Übertragung folgt im Hintergrund
+            try: self.journal.append(ds)
+            except sqlite3.Error as e: messagebox.showerror("Fehler", f"Messung konnte nicht gesichert werden: {e}"); return
+            self.journal_flusher.wake()
+            self.status_text.config(text=f"✅ Messung für {ds[0]} (Woche {ds[1]}) gesichert.", fg='green')
+            self._show_journal_status(); return
+        def _done(result):
+            suc, msg = result
+            if suc:
+                # Auffällige Messungen gleich beim Speichern melden
+                (messagebox.showwarning if "⚠️" in msg else messagebox.showinfo)("Erfolg", msg)
+                self.refresh_data_delta(); self._refresh_anomalies()
+            else: messagebox.showerror("Fehler", msg)
+        # Schema wird einmalig beim Start migriert, hier genügt ein einzelnes INSERT
+        self.db.submit(run_with_connection, self.db_config, insert_pflanzen_data, ds, on_done=_done)
 
     def create_display_widgets(self, parent_frame):
         cf = tk.Frame(parent_frame); cf.pack(fill='x', pady=(0, 10))
@@ -537,39 +908,380 @@ class PflanzenApp(tk.Tk):
         tk.Label(rf, text=" Intervall (s):").pack(side=tk.LEFT)
         tk.Entry(rf, textvariable=self.refresh_interval, width=5).pack(side=tk.LEFT, padx=5)
         tk.Button(cf, text="🔄 Jetzt Aktualisieren", command=self.load_data_into_treeview).pack(side=tk.LEFT, padx=20)
+        self.undo_button = tk.Button(cf, text="↩️ Rückgängig", state=tk.DISABLED, command=self._undo_last_delete)
+        self.undo_button.pack(side=tk.RIGHT, padx=5)
+        tk.Button(cf, text="🗑️ Gefilterte löschen", bg='#FFCDD2', command=self._delete_filtered_data).pack(side=tk.RIGHT, padx=5)
         tk.Button(cf, text="🗑️ Löschen", bg='#FFCDD2', command=self._delete_selected_data).pack(side=tk.RIGHT, padx=5)
-        tk.Button(cf, text="📊 CSV Export", command=self.export_data_to_csv).pack(side=tk.RIGHT, padx=5)
-        self.tree = ttk.Treeview(parent_frame, selectmode="browse"); self.tree.pack(side=tk.LEFT, fill='both', expand=True)
+        tk.Button(cf, text="📊 Export", command=self.export_data_to_csv).pack(side=tk.RIGHT, padx=5)
+        tk.Button(cf, text="📥 Import", command=self.import_data_from_file).pack(side=tk.RIGHT, padx=5)
+        self._create_data_filter_bar(parent_frame)
+        self.tree = ttk.Treeview(parent_frame, selectmode="extended"); self.tree.pack(side=tk.LEFT, fill='both', expand=True)
         sb = ttk.Scrollbar(parent_frame, orient="vertical", command=self.tree.yview); sb.pack(side=tk.RIGHT, fill='y')
-        self.tree.configure(yscrollcommand=sb.set)
+        # Nur die sichtbaren Seiten plus Vorlade-Fenster liegen im Treeview, der Rest wird beim Scrollen nachgeladen
+        self.tree_pager = TreePager(self.tree, sb, lambda **kw: fetch_data_page(self.db_config, filters=self.data_filters, **kw),
+                                    on_columns=self._setup_tree_columns, on_error=lambda msg: self._on_db_error(msg),
+                                    runner=lambda fn, on_done, key: self.db.submit(fn, on_done=on_done, key=key),
+                                    sort=self.data_sort)
+
+    def _create_data_filter_bar(self, parent_frame):
+        ff = tk.LabelFrame(parent_frame, text="Filter", padx=10, pady=5); ff.pack(fill='x', pady=(0, 10))
+        self.data_filter_entries = {}
+        for key, label, width in [('pflanzen_name', "Pflanze:", 18), ('phase', "Phase:", 10), ('woche_von', "Woche von:", 4),
+                                  ('woche_bis', "bis:", 4), ('datum_von', "Datum von:", 11), ('datum_bis', "bis:", 11)]:
+            tk.Label(ff, text=label).pack(side=tk.LEFT)
+            if key == 'phase': e = ttk.Combobox(ff, values=[""] + FIELD_OPTIONS["phase"], state="readonly", width=width)
+            else: e = tk.Entry(ff, width=width); e.bind("<Return>", lambda ev: self._apply_data_filter())
+            e.pack(side=tk.LEFT, padx=(2, 8)); self.data_filter_entries[key] = e
+        self.data_range_filters = {}
+        for key, label, (lo, hi) in [('ph_ausserhalb', "pH außerhalb", PH_RANGE), ('ec_ausserhalb', "EC außerhalb", EC_RANGE)]:
+            var = tk.BooleanVar(value=False)
+            tk.Checkbutton(ff, text=label, variable=var).pack(side=tk.LEFT)
+            lo_e = tk.Entry(ff, width=4); lo_e.insert(0, str(lo)); lo_e.pack(side=tk.LEFT)
+            tk.Label(ff, text="–").pack(side=tk.LEFT)
+            hi_e = tk.Entry(ff, width=4); hi_e.insert(0, str(hi)); hi_e.pack(side=tk.LEFT, padx=(0, 8))
+            self.data_range_filters[key] = (var, lo_e, hi_e)
+        self.data_archiv = tk.BooleanVar(value=False)
+        tk.Checkbutton(ff, text="inkl. Archiv", variable=self.data_archiv).pack(side=tk.LEFT)
+        tk.Button(ff, text="🔍 Filtern", command=self._apply_data_filter).pack(side=tk.LEFT, padx=5)
+        tk.Button(ff, text="✖ Zurücksetzen", command=self._reset_data_filter).pack(side=tk.LEFT)
+
+    def _parse_filters(self, werte):
+        """Wandelt Eingaben (Strings) in Filter für build_protokoll_filter um. Wirft ValueError bei ungültigen Werten."""
+        def _datum(v): return datetime.strptime(v, "%Y-%m-%d").date() if v else None
+        def _zahl(v): return int(v) if v else None
+        return {
+            'pflanzen_name': werte.get('pflanzen_name') or None,
+            'phase': werte.get('phase') or None,
+            'woche_von': _zahl(werte.get('woche_von')),
+            'woche_bis': _zahl(werte.get('woche_bis')),
+            'datum_von': _datum(werte.get('datum_von')),
+            'datum_bis': _datum(werte.get('datum_bis')),
+        }
 
+    def _apply_data_filter(self):
+        try:
+            filters = self._parse_filters({k: e.get().strip() for k, e in self.data_filter_entries.items()})
+            for key, (var, lo_e, hi_e) in self.data_range_filters.items():
+                if var.get(): filters[key] = (float(lo_e.get().replace(',', '.')), float(hi_e.get().replace(',', '.')))
+            if self.data_archiv.get(): filters['archiv'] = True
+        except ValueError:
+            messagebox.showerror("Filter", "Woche und Bereichsgrenzen müssen Zahlen sein, Datum im Format JJJJ-MM-TT."); return
+        self.data_filters = {k: v for k, v in filters.items() if v is not None}
+        self.load_data_into_treeview()
+
+    def _reset_data_filter(self):
+        for key, e in self.data_filter_entries.items():
+            if key == 'phase': e.set("")
+            else: e.delete(0, tk.END)
+        for var, _, _ in self.data_range_filters.values(): var.set(False)
+        self.data_archiv.set(False)
+        self.data_filters = {}
+        self.load_data_into_treeview()
+
+    def _setup_tree_columns(self, cols):
+        self.tree["columns"] = cols; self.tree.column("#0", width=0, stretch=tk.NO)
+        for c in cols: self.tree.heading(c, command=lambda c=c: self._sort_data_by(c)); self.tree.column(c, width=85, anchor='center')
+        self._update_sort_headings()
+
+    def _update_sort_headings(self):
+        spalte, absteigend = self.data_sort
+        for c in self.tree["columns"]:
+            pfeil = (" ▼" if absteigend else " ▲") if c == spalte else ""
+            self.tree.heading(c, text=c.replace('_', ' ').title() + pfeil)
+
+    def _sort_data_by(self, column):
+        """Spaltenkopf-Klick: sortiert serverseitig, erneuter Klick kehrt die Richtung um."""
+        spalte, absteigend = self.data_sort
+        # Datum und ID zuerst absteigend (neueste oben), alle anderen Spalten zuerst aufsteigend
+        absteigend = not absteigend if column == spalte else column in ('erstellungsdatum', 'id')
+        self.data_sort = (column, absteigend)
+        self.tree_pager.set_sort(column, absteigend)
+        self._update_sort_headings()
+        self.load_data_into_treeview()
+
+    @timed
     def load_data_into_treeview(self):
-        d, cols = fetch_all_data(self.db_config)
-        if d is not None:
-            self.tree["columns"] = cols; self.tree.column("#0", width=0, stretch=tk.NO)
-            for c in cols: self.tree.heading(c, text=c.replace('_', ' ').title()); self.tree.column(c, width=85, anchor='center')
-            for i in self.tree.get_children(): self.tree.delete(i)
-            for r in d: self.tree.insert("", tk.END, values=r)
+        if not self._tab_built(self.tab_anzeige): return
+        # Marken vor der Seite lesen: Zwischenzeitliche Änderungen landen so sicher im nächsten Delta
+        def _done(result):
+            ok, changes = result
+            self.delta_marks = changes['marks'] if ok else None
+            self.tree_pager.reset()
+        self.db.cancel("tree_delta")
+        self.db.submit(fetch_changes_since, self.db_config, on_done=_done, key="tree_load")
+
+    def refresh_data_delta(self):
+        """Holt nur neue, geänderte und gelöschte Zeilen und patcht den Treeview in-place."""
+        if not self._tab_built(self.tab_anzeige): return
+        if self.delta_marks is None: self.load_data_into_treeview(); return
+        def _done(result):
+            ok, changes = result
+            if not ok: self._on_db_error(changes); return
+            if changes['neu_laden']: self.load_data_into_treeview(); return
+            self.tree_pager.apply_changes(changes['neu'], changes['geaendert'], changes['geloescht'])
+            self.delta_marks = changes['marks']
+        self.db.submit(fetch_changes_since, self.db_config, self.delta_marks, filters=self.data_filters,
+                       on_done=_done, key="tree_delta")
 
     def _delete_selected_data(self):
-        it = self.tree.focus()
-        if not it: messagebox.showwarning("Auswahl", "Bitte wählen Sie einen Datensatz."); return
-        rid = self.tree.item(it, 'values')[0]
-        if messagebox.askyesno("Löschen", f"ID {rid} löschen?"):
-            suc, msg = delete_data_by_id(self.db_config, rid)
-            if suc: self.load_data_into_treeview()
-            else: messagebox.showerror("Fehler", msg)
-
+        """Löscht alle markierten Zeilen (Strg/Umschalt-Klick) in einem Vorgang."""
+        ids = [self.tree.item(it, 'values')[0] for it in self.tree.selection()]
+        if not ids: messagebox.showwarning("Auswahl", "Bitte wählen Sie mindestens einen Datensatz."); return
+        frage = f"ID {ids[0]} löschen?" if len(ids) == 1 else f"{len(ids)} Datensätze löschen?"
+        if messagebox.askyesno("Löschen", frage + "\n(Rückgängig bis zum endgültigen Löschen möglich)"):
+            self.db.submit(delete_data_by_ids, self.db_config, ids, on_done=self._on_deleted)
+
+    def _delete_filtered_data(self):
+        """Löscht alle Zeilen, die der angewendete Filter zeigt (z.B. Pflanze + Datumsbereich), mit einer Anweisung."""
+        bedingungen = {k: v for k, v in self.data_filters.items() if k != 'archiv'}
+        if not bedingungen:
+            messagebox.showwarning("Löschen", "Bitte zuerst einen Filter (Pflanze, Woche, Datum) anwenden."); return
+        beschreibung = "\n".join(f"  {k}: {v}" for k, v in bedingungen.items())
+        # Archivierte Messungen sind schreibgeschützt
+        if 'archiv' in self.data_filters: beschreibung += "\n(archivierte Messungen bleiben erhalten)"
+        if messagebox.askyesno("Löschen", f"Alle Datensätze löschen, die diesem Filter entsprechen?\n{beschreibung}"):
+            self.db.submit(delete_data_where, self.db_config, dict(self.data_filters), on_done=self._on_deleted)
+
+    def _on_deleted(self, result):
+        ok, data = result
+        if not ok: messagebox.showerror("Fehler", data); return
+        loeschung_id, anzahl = data
+        if not anzahl: self.status_text.config(text="Keine passenden Datensätze gefunden.", fg='black'); return
+        self.undo_stack.append((loeschung_id, anzahl))
+        self.undo_button.config(state=tk.NORMAL)
+        self.status_text.config(text=f"🗑️ {anzahl} Datensatz/Datensätze gelöscht – Rückgängig möglich.", fg='black')
+        self.refresh_data_delta()
+
+    def _undo_last_delete(self):
+        if not self.undo_stack: return
+        loeschung_id, _ = self.undo_stack.pop()
+        if not self.undo_stack: self.undo_button.config(state=tk.DISABLED)
+        def _done(result):
+            ok, msg = result
+            self.status_text.config(text=msg, fg='black' if ok else 'red')
+            if ok: self.refresh_data_delta()
+        self.db.submit(undo_delete, self.db_config, loeschung_id, on_done=_done)
+
+    @timed
     def export_data_to_csv(self):
-        if not self.tree.get_children(): messagebox.showwarning("Export", "Keine Daten."); return
-        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Datei", "*.csv")])
-        if path:
+        """Export-Dialog: Filter wählen, Export läuft im Hintergrund mit Fortschritt und Abbruch."""
+        win = tk.Toplevel(self); win.title("Daten exportieren"); win.transient(self); win.resizable(False, False)
+        ff = tk.LabelFrame(win, text="Filter (leer = alle)", padx=10, pady=5); ff.pack(fill='x', padx=10, pady=10)
+        felder = {}
+        for r, (key, label) in enumerate([('pflanzen_name', "Pflanze:"), ('woche_von', "Woche von:"), ('woche_bis', "Woche bis:"),
+                                          ('datum_von', "Datum von (JJJJ-MM-TT):"), ('datum_bis', "Datum bis (JJJJ-MM-TT):")]):
+            tk.Label(ff, text=label).grid(row=r, column=0, sticky='w', pady=2)
+            felder[key] = tk.Entry(ff, width=25); felder[key].grid(row=r, column=1, pady=2)
+        mit_archiv = tk.BooleanVar(value=False)
+        tk.Checkbutton(ff, text="Archivierte Grows einbeziehen", variable=mit_archiv).grid(row=len(felder), column=0, columnspan=2, sticky='w')
+        fmt = tk.StringVar(value="csv")
+        of = tk.LabelFrame(win, text="Format", padx=10, pady=5); of.pack(fill='x', padx=10)
+        for value, text in [("csv", "CSV"), ("csv.gz", "CSV (gzip)"), ("parquet", "Parquet")]:
+            tk.Radiobutton(of, text=text, variable=fmt, value=value).pack(side=tk.LEFT)
+        bar = ttk.Progressbar(win, mode='determinate', length=300); bar.pack(padx=10, pady=(10, 0))
+        info = tk.Label(win, text=""); info.pack()
+        bf = tk.Frame(win); bf.pack(pady=10)
+        start_btn = tk.Button(bf, text="📊 Exportieren", bg='#C8E6C9'); start_btn.pack(side=tk.LEFT, padx=5)
+        cancel_btn = tk.Button(bf, text="Abbrechen", state=tk.DISABLED); cancel_btn.pack(side=tk.LEFT, padx=5)
+        stand = {'exportiert': 0, 'gesamt': 0, 'laeuft': False}
+        cancel_event = threading.Event()
+
+        def _filters():
             try:
-                with open(path, mode='w', newline='', encoding='utf-8') as f:
-                    w = csv.writer(f, delimiter=';'); w.writerow(self.tree["columns"])
-                    for ri in self.tree.get_children(): w.writerow(self.tree.item(ri, 'values'))
-                messagebox.showinfo("Export", "Erfolg!")
-            except Exception as e: messagebox.showerror("Fehler", str(e))
+                return {**self._parse_filters({k: e.get().strip() for k, e in felder.items()}), 'archiv': mit_archiv.get()}
+            except ValueError:
+                messagebox.showerror("Fehler", "Woche muss eine Zahl sein, Datum im Format JJJJ-MM-TT.", parent=win)
+                return None
+
+        def _progress(exportiert, gesamt):
+            # Läuft im Worker-Thread: nur Werte ablegen, die Anzeige aktualisiert _poll
+            stand['exportiert'], stand['gesamt'] = exportiert, gesamt
+
+        def _poll():
+            if not stand['laeuft'] or not win.winfo_exists(): return
+            if stand['gesamt']:
+                bar['value'] = 100 * stand['exportiert'] / stand['gesamt']
+                info.config(text=f"{stand['exportiert']} / {stand['gesamt']} Zeilen")
+            win.after(EXPORT_PROGRESS_MS, _poll)
+
+        def _done(result):
+            stand['laeuft'] = False
+            ok, msg = result
+            if win.winfo_exists():
+                bar['value'] = 100 if ok else 0; info.config(text="")
+                start_btn.config(state=tk.NORMAL); cancel_btn.config(state=tk.DISABLED)
+            if ok: messagebox.showinfo("Export", msg, parent=win if win.winfo_exists() else self)
+            else: messagebox.showwarning("Export", msg, parent=win if win.winfo_exists() else self)
+
+        def _start():
+            filters = _filters()
+            if filters is None: return
+            ext = {"csv": ".csv", "csv.gz": ".csv.gz", "parquet": ".parquet"}[fmt.get()]
+            path = filedialog.asksaveasfilename(parent=win, defaultextension=ext, filetypes=[("Exportdatei", f"*{ext}")])
+            if not path: return
+            cancel_event.clear()
+            stand.update(exportiert=0, gesamt=0, laeuft=True)
+            start_btn.config(state=tk.DISABLED); cancel_btn.config(state=tk.NORMAL); info.config(text="Zähle Zeilen...")
+            self.db.submit(export_protokoll, self.db_config, path, fmt=fmt.get(), filters=filters, progress=_progress,
+                           cancel_event=cancel_event, on_done=_done, on_error=lambda e: _done((False, str(e))))
+            _poll()
+
+        def _close():
+            # Ein laufender Export wird beim Schließen des Dialogs abgebrochen
+            cancel_event.set(); win.destroy()
+
+        start_btn.config(command=_start); cancel_btn.config(command=cancel_event.set)
+        win.protocol("WM_DELETE_WINDOW", _close)
+
+    def import_data_from_file(self):
+        path = filedialog.askopenfilename(filetypes=[("CSV Datei", "*.csv"), ("JSON Lines", "*.jsonl"), ("Alle Dateien", "*.*")])
+        if path:
+            def _done(result):
+                ok, msg = result
+                if ok: messagebox.showinfo("Import", msg); self.load_data_into_treeview()
+                else: messagebox.showerror("Import", msg)
+            self.db.submit(import_file, self.db_config, path, on_done=_done)
+
+    def create_comparison_tab(self, parent_frame):
+        """Abweichungsmatrix Ist - Soll je Pflanze und Woche; Spaltenköpfe sortieren per Klick."""
+        cf = tk.Frame(parent_frame); cf.pack(fill='x', pady=(0, 10))
+        tk.Label(cf, text="Pflanze (leer = alle):").pack(side=tk.LEFT)
+        self.vergleich_name = tk.Entry(cf, width=25); self.vergleich_name.pack(side=tk.LEFT, padx=5)
+        self.vergleich_archiv = tk.BooleanVar(value=False)
+        tk.Checkbutton(cf, text="inkl. Archiv", variable=self.vergleich_archiv).pack(side=tk.LEFT)
+        tk.Button(cf, text="⚖️ Vergleich berechnen", command=self._run_comparison).pack(side=tk.LEFT, padx=10)
+        self.vergleich_info = tk.Label(cf, text="", fg="gray"); self.vergleich_info.pack(side=tk.LEFT, padx=10)
+        self.vergleich_tree = ttk.Treeview(parent_frame, show="headings")
+        self.vergleich_tree.tag_configure("verstoss", background="#FFCDD2")
+        sb = ttk.Scrollbar(parent_frame, orient="vertical", command=self.vergleich_tree.yview)
+        self.vergleich_tree.configure(yscrollcommand=sb.set)
+        self.vergleich_tree.pack(side=tk.LEFT, fill='both', expand=True); sb.pack(side=tk.RIGHT, fill='y')
+        self._run_comparison()
+
+    def _run_comparison(self):
+        name = self.vergleich_name.get().strip()
+        self.vergleich_info.config(text="Berechne...")
+        def _done(result):
+            ok, data = result
+            tree = self.vergleich_tree
+            tree.delete(*tree.get_children())
+            if not ok: self.vergleich_info.config(text=data); return
+            cols, rows, info = data
+            tree["columns"] = cols
+            for c in cols:
+                titel = c.replace('abw_', 'Δ ').replace('drift_', 'Drift ').replace('_', ' ').title()
+                tree.heading(c, text=titel, command=lambda c=c: self._sort_treeview(tree, c, False))
+                tree.column(c, width=110 if c == 'pflanzen_name' else 75, anchor='center')
+            v_idx = cols.index('verstoesse')
+            for row in rows:
+                tree.insert("", tk.END, values=["" if v is None else v for v in row],
+                            tags=("verstoss",) if row[v_idx] else ())
+            self.vergleich_info.config(text=info)
+        self.db.submit(run_comparison, self.db_config, {'pflanzen_name': name or None, 'archiv': self.vergleich_archiv.get()},
+                       on_done=_done, key="soll_ist")
+
+    def create_chart_tab(self, parent_frame):
+        """Verlauf der Messwerte einer Pflanze gegen den Plan; Mausrad zoomt, Ziehen verschiebt."""
+        cf = tk.Frame(parent_frame); cf.pack(fill='x', pady=(0, 10))
+        tk.Label(cf, text="Pflanze:").pack(side=tk.LEFT)
+        self.chart_name = ttk.Combobox(cf, width=28); self.chart_name.pack(side=tk.LEFT, padx=5)
+        self.chart_name.bind("<<ComboboxSelected>>", lambda e: self._load_chart())
+        self.chart_name.bind("<Return>", lambda e: self._load_chart())
+        tk.Label(cf, text="Werte:").pack(side=tk.LEFT, padx=(10, 0))
+        self.chart_felder = tk.Listbox(cf, selectmode=tk.MULTIPLE, height=4, width=22, exportselection=False)
+        for i, (label, spalte) in enumerate(CHART_FELDER.items()):
+            self.chart_felder.insert(tk.END, label)
+            if spalte in CHART_VORAUSWAHL: self.chart_felder.selection_set(i)
+        sb = ttk.Scrollbar(cf, orient="vertical", command=self.chart_felder.yview)
+        self.chart_felder.configure(yscrollcommand=sb.set)
+        self.chart_felder.pack(side=tk.LEFT, padx=(5, 0)); sb.pack(side=tk.LEFT, fill='y')
+        self.chart_archiv = tk.BooleanVar(value=False)
+        tk.Checkbutton(cf, text="inkl. Archiv", variable=self.chart_archiv, command=self._load_chart_names).pack(side=tk.LEFT, padx=(10, 0))
+        tk.Button(cf, text="📉 Anzeigen", command=self._load_chart).pack(side=tk.LEFT, padx=10)
+        self.chart_info = tk.Label(cf, text="Doppelklick: ganzer Verlauf", fg="gray"); self.chart_info.pack(side=tk.LEFT, padx=10)
+        canvas = tk.Canvas(parent_frame, bg="white", highlightthickness=0)
+        canvas.pack(fill='both', expand=True)
+        self.chart = TimeSeriesChart(canvas, on_view_change=self._reload_chart_range,
+                                     labels={spalte: label for label, spalte in CHART_FELDER.items()})
+        self.chart.clear("Pflanze wählen")
+        self.chart_auswahl = None
+        self._load_chart_names()
+
+    def _load_chart_names(self):
+        def _names(result):
+            names, error = result
+            if names is None: self.chart_info.config(text=error); return
+            self.chart_name['values'] = names
+        self.db.submit(fetch_protokoll_names, self.db_config, self.chart_archiv.get(), on_done=_names, key="chart_names")
+
+    def _load_chart(self):
+        name = self.chart_name.get().strip()
+        felder = [list(CHART_FELDER.values())[i] for i in self.chart_felder.curselection()]
+        if not name or not felder: self.chart.clear("Pflanze und mindestens einen Wert wählen"); return
+        archiv = self.chart_archiv.get()
+        self.chart_auswahl = (name, felder, archiv)
+        self.chart_info.config(text="Lade...")
+        def _done(result):
+            ok, data = result
+            if not ok: self.chart.clear(data); self.chart_info.config(text=""); return
+            self.chart.set_data(data, reset_view=True)
+            self.chart_info.config(text=data['info'])
+        self.db.submit(load_series, self.db_config, name, felder, points=self.chart.plot_width(), archiv=archiv,
+                       on_done=_done, key="chart")
+
+    def _reload_chart_range(self, von, bis, pixels):
+        """Lädt nach Zoom/Verschieben nur den sichtbaren Zeitraum in Pixelauflösung nach."""
+        if self.chart_auswahl is None: return
+        name, felder, archiv = self.chart_auswahl
+        def _done(result):
+            ok, data = result
+            # Eine inzwischen gewählte andere Pflanze nicht überschreiben
+            if not ok or self.chart_auswahl != (name, felder, archiv): return
+            self.chart.set_data(data)
+            self.chart_info.config(text=data['info'])
+        self.db.submit(load_series, self.db_config, name, felder, von, bis, pixels, archiv, on_done=_done, key="chart")
+
+    def create_anomaly_tab(self, parent_frame):
+        """Zuletzt erkannte pH/EC-Auffälligkeiten, neueste zuerst."""
+        cf = tk.Frame(parent_frame); cf.pack(fill='x', pady=(0, 10))
+        tk.Button(cf, text="🔄 Aktualisieren", command=self._refresh_anomalies).pack(side=tk.LEFT)
+        tk.Button(cf, text="♻️ Neu aufbauen", command=self._rebuild_anomalies).pack(side=tk.LEFT, padx=10)
+        cfg = self.db_config
+        tk.Label(cf, fg="gray", text=f"Schwellen: z > {cfg.get('anomaly_z_limit')}, pH ± {cfg.get('anomaly_ph_tolerance')}, "
+                                     f"EC ± {cfg.get('anomaly_ec_tolerance')} ([anomaly] in db_config.ini)").pack(side=tk.LEFT, padx=10)
+        self.anomalie_tree = ttk.Treeview(parent_frame, show="headings", columns=[c for c, _, _ in ANOMALY_COLUMNS])
+        for col, titel, breite in ANOMALY_COLUMNS:
+            self.anomalie_tree.heading(col, text=titel, command=lambda c=col: self._sort_treeview(self.anomalie_tree, c, False))
+            self.anomalie_tree.column(col, width=breite, anchor='w' if col in ("pflanzen_name", "grund") else 'center')
+        sb = ttk.Scrollbar(parent_frame, orient="vertical", command=self.anomalie_tree.yview)
+        self.anomalie_tree.configure(yscrollcommand=sb.set)
+        self.anomalie_tree.pack(side=tk.LEFT, fill='both', expand=True); sb.pack(side=tk.RIGHT, fill='y')
+
+    def _refresh_anomalies(self):
+        if not self._tab_built(self.tab_anomalien): return
+        def _done(result):
+            rows, cols = result
+            if rows is None: self.status_text.config(text=cols, fg='red'); return
+            tree = self.anomalie_tree
+            tree.delete(*tree.get_children())
+            for row in rows:
+                werte = dict(zip(cols, row))
+                werte['feld'] = "pH" if werte['feld'] == "ph_wert_ziel" else "EC"
+                if werte['z_wert'] is not None: werte['z_wert'] = f"{werte['z_wert']:+.1f}"
+                tree.insert("", tk.END, values=["" if werte[c] is None else werte[c] for c, _, _ in ANOMALY_COLUMNS])
+        self.db.submit(fetch_anomalies, self.db_config, on_done=_done, key="anomalien")
+
+    def _sort_treeview(self, tree, col, descending):
+        """Sortiert die geladenen Zeilen nach einer Spalte; leere Werte landen immer am Ende."""
+        def _key(value):
+            if value == "": return (1, 0, "")
+            try: return (0, float(value), "")
+            except ValueError: return (0, 0, value.lower())
+        items = sorted(tree.get_children(""), key=lambda k: _key(tree.set(k, col)), reverse=descending)
+        # Leere Werte auch bei absteigender Sortierung ans Ende
+        items.sort(key=lambda k: tree.set(k, col) == "")
+        for pos, k in enumerate(items): tree.move(k, "", pos)
+        tree.heading(col, command=lambda: self._sort_treeview(tree, col, not descending))
 
     def _toggle_auto_refresh(self, start=False, stop=False):
         if self.after_id: self.after_cancel(self.after_id); self.after_id = None
@@ -578,43 +1290,107 @@ class PflanzenApp(tk.Tk):
             self.after_id = self.after(self.refresh_interval.get() * 1000, self._auto_refresh_loop)
             
     def _auto_refresh_loop(self):
-        if self.is_auto_refresh_active.get(): self.load_data_into_treeview(); self._toggle_auto_refresh(start=True)
+        if self.is_auto_refresh_active.get(): self.refresh_data_delta(); self._toggle_auto_refresh(start=True)
 
     def create_settings_tab(self, parent_frame):
         sf = tk.Frame(parent_frame); sf.pack(pady=20)
-        tk.Label(sf, text="MySQL Konfiguration", font=('Arial', 12, 'bold')).grid(row=0, columnspan=2, pady=10)
+        tk.Label(sf, text="Datenbank Konfiguration", font=('Arial', 12, 'bold')).grid(row=0, columnspan=2, pady=10)
         self.settings_entries = {}
-        flds = [('Host', 'host'), ('Port', 'port'), ('User', 'user'), ('Passwort', 'password'), ('Datenbank', 'database')]
-        for i, (l, k) in enumerate(flds, start=1):
+        tk.Label(sf, text="Speicher:").grid(row=1, column=0, sticky='w', padx=5, pady=5)
+        backend = ttk.Combobox(sf, values=BACKENDS, state="readonly", width=27); backend.grid(row=1, column=1, padx=5, pady=5)
+        backend.set(backend_of(self.db_config)); self.settings_entries['storage_backend'] = backend
+        # MySQL-Felder werden bei backend = sqlite nicht genutzt, bleiben aber zum Umschalten erhalten
+        flds = [('SQLite-Datei', 'storage_sqlite_path'), ('Host', 'host'), ('Port', 'port'), ('User', 'user'),
+                ('Passwort', 'password'), ('Datenbank', 'database')]
+        for i, (l, k) in enumerate(flds, start=2):
             tk.Label(sf, text=f"{l}:").grid(row=i, column=0, sticky='w', padx=5, pady=5)
             e = tk.Entry(sf, width=30, show='*' if k == 'password' else ''); e.grid(row=i, column=1, padx=5, pady=5)
             e.insert(0, str(self.db_config.get(k, ''))); self.settings_entries[k] = e
-        tk.Button(sf, text="Speichern & Struktur anlegen", bg='green', fg='white', command=self._save_db_settings).grid(row=6, column=0, pady=20, padx=5)
-        tk.Button(sf, text="Verbindung Testen", command=self._test_connection).grid(row=6, column=1, pady=20, padx=5)
-        self.status_label = tk.Label(sf, text="Status: Unbekannt"); self.status_label.grid(row=7, columnspan=2)
+        tk.Button(sf, text="Speichern & Struktur anlegen", bg='green', fg='white', command=self._save_db_settings).grid(row=8, column=0, pady=20, padx=5)
+        tk.Button(sf, text="Verbindung Testen", command=self._test_connection).grid(row=8, column=1, pady=20, padx=5)
+        self.status_label = tk.Label(sf, text="Status: Unbekannt"); self.status_label.grid(row=9, columnspan=2)
 
-    def _test_connection(self):
+    def _settings_from_entries(self):
+        """Liest die Einstellungsfelder; der Port ist nur für MySQL Pflicht."""
         conf = {k: e.get() for k, e in self.settings_entries.items()}
-        try:
-            conf['port'] = int(conf['port']); ok, msg = test_db_connection(conf)
+        if conf['port'].strip() or conf['storage_backend'] != BACKEND_SQLITE: conf['port'] = int(conf['port'])
+        else: conf['port'] = 3306
+        return conf
+
+    def _test_connection(self):
+        try: conf = self._settings_from_entries()
+        except ValueError: self.status_label.config(text="Status: Port ungültig", fg='red'); return
+        self.status_label.config(text="Status: Teste Verbindung...", fg='black')
+        def _done(result):
+            ok, msg = result
             self.status_label.config(text=msg, fg='green' if ok else 'red')
-        except: self.status_label.config(text="Status: Port ungültig", fg='red')
+        self.db.submit(test_db_connection, conf, on_done=_done, key="test_connection")
 
     def _save_db_settings(self):
         try:
-            nc = {k: e.get() for k, e in self.settings_entries.items()}
-            nc['port'] = int(nc['port']); save_config(nc); self.db_config = nc
-            cnx, cursor = get_db_connection(self.db_config)
-            if cnx: setup_database_and_table(cursor, self.db_config['database']); cnx.close(); messagebox.showinfo("Erfolg", "Gespeichert."); self._test_connection()
-            else: messagebox.showerror("Fehler", "Verbindung fehlgeschlagen.")
-        except Exception as e: messagebox.showerror("Fehler", str(e))
+            nc = self._settings_from_entries(); save_config(nc); self.db_config = {**self.db_config, **nc}
+            close_all_pools(); CONNECTION_HEALTH.configure(self.db_config)
+        except Exception as e: messagebox.showerror("Fehler", str(e)); return
+        def _done(result):
+            ok, msg = result
+            if ok: messagebox.showinfo("Erfolg", f"Gespeichert. {msg}"); self._refresh_plan_list()
+            else: messagebox.showerror("Fehler", msg)
+            self._test_connection()
+        self.db.submit(initialize_database, self.db_config, on_done=_done, key="init_db")
 
     def show_db_settings(self): self.notebook.select(self.tab_settings)
 
     def _handle_tab_change(self, event):
+        key = self.notebook.select()
+        if key in self.tab_builders:
+            # Erst den Platzhalter zeichnen lassen, dann den Tab im nächsten Idle-Durchlauf aufbauen
+            self.after_idle(self._build_selected_tab, key); return
+        self._on_tab_activated()
+
+    def _build_selected_tab(self, key):
+        if not self._build_tab(key) or self.notebook.select() != key: return
+        STARTUP.interactive()
+        self._on_tab_activated()
+
+    def _on_tab_activated(self):
         tab = self.notebook.tab(self.notebook.select(), "text")
         if tab == "📈 Daten anzeigen": self.load_data_into_treeview(); self._toggle_auto_refresh(start=True)
         else: self._toggle_auto_refresh(stop=True)
+        if tab == "🩺 Diagnostik": self._refresh_diagnostics()
+        if tab == "⚠️ Auffälligkeiten": self._refresh_anomalies()
+
+    def create_diagnostics_tab(self, parent_frame):
+        """Histogramm-Auswertung aller gemessenen Aufrufe, nach Gesamtzeit sortiert."""
+        cf = tk.Frame(parent_frame); cf.pack(fill='x', pady=(0, 10))
+        self.diag_enabled = tk.BooleanVar(value=METRICS.enabled)
+        tk.Checkbutton(cf, text="Messung aktiv", variable=self.diag_enabled,
+                       command=lambda: METRICS.enable(self.diag_enabled.get())).pack(side=tk.LEFT)
+        tk.Button(cf, text="🔄 Aktualisieren", command=self._refresh_diagnostics).pack(side=tk.LEFT, padx=10)
+        tk.Button(cf, text="🧹 Zurücksetzen", command=lambda: (METRICS.reset(), self._refresh_diagnostics())).pack(side=tk.LEFT)
+        tk.Button(cf, text="📝 In Log schreiben", command=self._dump_diagnostics).pack(side=tk.LEFT, padx=10)
+        log = self.db_config.get('diagnostics_log_path')
+        tk.Label(cf, text=f"Log: {log}" if log else "Kein Log ([diagnostics] log_path)", fg="gray").pack(side=tk.LEFT, padx=10)
+        self.diag_tree = ttk.Treeview(parent_frame, show="headings", columns=[c for c, _, _ in DIAGNOSTICS_COLUMNS])
+        for c, titel, breite in DIAGNOSTICS_COLUMNS:
+            self.diag_tree.heading(c, text=titel, command=lambda c=c: self._sort_treeview(self.diag_tree, c, c != "name"))
+            self.diag_tree.column(c, width=breite, anchor='w' if c == "name" else 'e')
+        sb = ttk.Scrollbar(parent_frame, orient="vertical", command=self.diag_tree.yview)
+        self.diag_tree.configure(yscrollcommand=sb.set)
+        self.diag_tree.pack(side=tk.LEFT, fill='both', expand=True); sb.pack(side=tk.RIGHT, fill='y')
+
+    def _refresh_diagnostics(self):
+        """Zeigt die aktuellen Messwerte und plant sich neu ein, solange der Tab sichtbar ist."""
+        if self.diag_after_id is not None: self.after_cancel(self.diag_after_id); self.diag_after_id = None
+        if not self._tab_built(self.tab_diagnostik) or self.notebook.select() != str(self.tab_diagnostik): return
+        tree = self.diag_tree
+        tree.delete(*tree.get_children())
+        for w in METRICS.snapshot():
+            tree.insert("", tk.END, values=[w["name"], w["aufrufe"]] + [f"{w[c]:.2f}" for c, _, _ in DIAGNOSTICS_COLUMNS[2:]])
+        self.diag_after_id = self.after(DIAGNOSTICS_REFRESH_MS, self._refresh_diagnostics)
+
+    def _dump_diagnostics(self):
+        if METRICS.dump(): self.status_text.config(text="📝 Diagnose-Zusammenfassung ins Log geschrieben.", fg='black')
+        else: messagebox.showinfo("Diagnostik", "Kein Log konfiguriert. In db_config.ini unter [diagnostics] log_path setzen.")
 
     def create_update_tab(self, parent_frame):
         f = tk.Frame(parent_frame); f.pack(expand=True)
@@ -632,6 +1408,13 @@ class PflanzenApp(tk.Tk):
             else: messagebox.showerror("Fehler", f"{script} fehlt")
         except Exception as e: messagebox.showerror("Update Fehler", str(e))
 
-if __name__ == "__main__":
-
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pflanzenprotokoll Pro")
+    parser.add_argument("--profile-startup", action="store_true", help="Zeitaufschlüsselung des Starts ausgeben")
+    parser.add_argument("--startup-budget", type=int, default=DEFAULT_BUDGET_MS, help="Zielzeit bis bedienbar (ms)")
+    args = parser.parse_args(argv)
+    if args.profile_startup: STARTUP.enable(args.startup_budget)
     app = PflanzenApp(); app.mainloop()
+
+if __name__ == "__main__":
+    main()
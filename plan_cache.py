@@ -0,0 +1,142 @@
+# plan_cache.py
+# -*- coding: utf-8 -*-
+"""
+Zwischenspeicher für Soll-Werte aus der Planungstabelle.
+
+PlanIndex hält die komplette Planungstabelle im Speicher (Name -> Woche -> Planzeile).
+Sie wird mit einer einzigen Abfrage geladen; Plan- und Wochenauswahl sind danach reine
+Speicherzugriffe. Schreibzugriffe über db_connector tragen sich direkt ein, nach der
+TTL wird der Index neu geladen, um Änderungen anderer Clients zu übernehmen.
+
+PlanCache ist der LRU-Cache für einzelne (Datenbank, pflanzen_name, woche), solange
+der Index (noch) nicht geladen ist. Auch "kein Plan vorhanden" wird gecacht, damit
+Tippen im Namensfeld nicht für jedes Zwischenergebnis eine Abfrage auslöst.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from db_dialect import BACKEND_SQLITE, backend_of, sqlite_path
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL = 300  # Sekunden
+
+
+def db_key(config):
+    """Identifiziert die Datenbank, damit Pläne verschiedener Server nicht vermischt werden."""
+    if backend_of(config) == BACKEND_SQLITE:
+        return (BACKEND_SQLITE, sqlite_path(config))
+    return (config.get('host'), str(config.get('port', 3306)), config.get('database'))
+
+
+class PlanCache:
+    """Thread-sicherer LRU-Cache mit Ablaufzeit."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, config, name, woche):
+        """Gibt (True, (plan, columns)) bei einem Treffer zurück, sonst (False, None)."""
+        key = (db_key(config), name, int(woche))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, config, name, woche, value):
+        key = (db_key(config), name, int(woche))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, name=None, woche=None):
+        """Entfernt Einträge einer Pflanze (optional nur einer Woche); ohne Argumente alles."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[1] == name and (woche is None or k[2] == int(woche))]:
+                del self._entries[key]
+
+
+class PlanIndex:
+    """Vollständiger, thread-sicherer Index aller Pläne einer Datenbank."""
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = None
+        self._loaded_at = None
+        self._plans = {}
+        self.columns = None
+
+    def load(self, config, rows, columns):
+        """Ersetzt den Index durch das Ergebnis von SELECT * auf die Planungstabelle."""
+        name_idx, woche_idx = columns.index('pflanzen_name'), columns.index('woche')
+        plans = {}
+        for row in rows:
+            plans.setdefault(row[name_idx], {})[int(row[woche_idx])] = tuple(row)
+        with self._lock:
+            self._db = db_key(config)
+            self._plans = plans
+            self.columns = list(columns)
+            self._loaded_at = time.monotonic()
+
+    def is_loaded(self, config):
+        with self._lock:
+            return self._loaded_at is not None and self._db == db_key(config)
+
+    def is_fresh(self, config):
+        """Geladen und jünger als die TTL."""
+        with self._lock:
+            return (self._loaded_at is not None and self._db == db_key(config)
+                    and time.monotonic() - self._loaded_at <= self.ttl)
+
+    def names(self):
+        with self._lock:
+            return sorted(self._plans)
+
+    def weeks(self, name):
+        with self._lock:
+            return sorted(self._plans.get(name, ()))
+
+    def get(self, config, name, woche):
+        """Wie PlanCache.get; ist der Index geladen, ist auch "kein Plan" eine sichere Antwort."""
+        with self._lock:
+            if self._loaded_at is None or self._db != db_key(config):
+                return False, None
+            return True, (self._plans.get(name, {}).get(int(woche)), self.columns)
+
+    def upsert(self, values):
+        """Trägt einen gespeicherten Plan ein; `values` = {spalte: wert}."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            row = tuple(values.get(c) for c in self.columns)
+            self._plans.setdefault(values['pflanzen_name'], {})[int(values['woche'])] = row
+
+    def remove(self, name):
+        with self._lock:
+            self._plans.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._db = self._loaded_at = None
+            self._plans = {}
+
+
+# Gemeinsame Instanzen für die ganze Anwendung
+PLAN_CACHE = PlanCache()
+PLAN_INDEX = PlanIndex()
@@ -0,0 +1,89 @@
+# soll_ist.py
+# -*- coding: utf-8 -*-
+"""
+Soll/Ist-Abgleich über alle Pflanzen und Wochen.
+
+Eine einzige JOIN-Abfrage (db_connector.fetch_soll_ist_rows) liefert jede Messung
+zusammen mit ihrem Plan. Abweichungen, Toleranzverstöße und die pH/EC-Drift werden
+anschließend in einem vektorisierten NumPy/pandas-Durchlauf berechnet, statt jede
+(Pflanze, Woche) einzeln abzufragen. pandas wird erst beim ersten Abgleich geladen,
+damit es den Programmstart nicht verzögert.
+"""
+import time
+
+from db_connector import fetch_soll_ist_rows, PLANNING_FIELDS
+
+# Verglichene Felder (alle numerischen Planungsfelder)
+FIELDS = [f for f in PLANNING_FIELDS if f != "phase"]
+
+# Erlaubte absolute Abweichung je Feld; Dünger in ml/L
+DEFAULT_TOLERANCE = 0.5
+TOLERANZEN = {
+    "lichtzyklus_h": 1.0,
+    "ph_wert_ziel": 0.3,
+    "ec_wert": 0.2,
+}
+
+# Felder, deren Veränderung gegenüber der Vorwoche als Drift ausgewiesen wird
+DRIFT_FIELDS = ["ph_wert_ziel", "ec_wert"]
+
+KEY_COLUMNS = ["pflanzen_name", "woche"]
+
+
+def compare(rows, columns, toleranzen=None):
+    """
+    Berechnet die Abweichungsmatrix: eine Zeile je (Pflanze, Woche) mit Anzahl Messungen,
+    Anzahl Toleranzverstöße, mittlerer Abweichung Ist - Soll je Feld und der Drift von
+    pH/EC gegenüber der Vorwoche derselben Pflanze. Gibt einen pandas.DataFrame zurück.
+    """
+    import numpy as np
+    import pandas as pd
+
+    toleranzen = {**TOLERANZEN, **(toleranzen or {})}
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    ist = df[[f"ist_{f}" for f in FIELDS]].to_numpy(dtype=float)
+    soll = df[[f"soll_{f}" for f in FIELDS]].to_numpy(dtype=float)
+    tol = np.array([toleranzen.get(f, DEFAULT_TOLERANCE) for f in FIELDS])
+
+    # Fehlende Soll- oder Ist-Werte ergeben NaN und zählen nicht als Verstoß
+    abw = ist - soll
+    with np.errstate(invalid="ignore"):
+        verstoesse = (np.abs(abw) > tol).sum(axis=1)
+
+    werte = pd.DataFrame(abw, columns=[f"abw_{f}" for f in FIELDS])
+    werte[KEY_COLUMNS] = df[KEY_COLUMNS]
+    werte["verstoesse"] = verstoesse
+    werte["messungen"] = 1
+
+    agg = {c: "mean" for c in werte.columns if c.startswith("abw_")}
+    agg.update(verstoesse="sum", messungen="sum")
+    matrix = werte.groupby(KEY_COLUMNS, sort=True).agg(agg)
+    for f in DRIFT_FIELDS:
+        matrix[f"drift_{f}"] = matrix.groupby(level=0)[f"abw_{f}"].diff()
+
+    front = ["messungen", "verstoesse"] + [f"drift_{f}" for f in DRIFT_FIELDS]
+    matrix = matrix[front + [c for c in matrix.columns if c not in front]]
+    return matrix.round(2).reset_index()
+
+
+def run_comparison(config, filters=None, toleranzen=None):
+    """
+    Lädt alle Messungen mit Plan und berechnet die Abweichungsmatrix.
+    Gibt (True, (spalten, zeilen, zusammenfassung)) oder (False, Fehlermeldung) zurück;
+    fehlende Werte sind in den Zeilen None.
+    """
+    start = time.perf_counter()
+    rows, columns = fetch_soll_ist_rows(config, FIELDS, filters)
+    if rows is None:
+        return False, columns
+    if not rows:
+        return False, "Keine Messungen mit passendem Plan gefunden."
+    geladen = time.perf_counter()
+
+    matrix = compare(rows, columns, toleranzen)
+    zeilen = [tuple(None if v != v else v for v in row) for row in matrix.itertuples(index=False)]
+    ende = time.perf_counter()
+    zusammenfassung = (f"{len(rows)} Messungen in {len(zeilen)} Plan-Wochen, "
+                       f"{int(matrix['verstoesse'].sum())} Toleranzverstöße "
+                       f"(Abfrage {(geladen - start) * 1000:.0f} ms, Berechnung {(ende - geladen) * 1000:.0f} ms)")
+    return True, (list(matrix.columns), zeilen, zusammenfassung)
@@ -0,0 +1,174 @@
+# sqlite_backend.py
+# -*- coding: utf-8 -*-
+"""
+Eingebettetes SQLite-Backend für Einzelplatz-Installationen ohne Datenbankserver.
+
+Die Verbindungen verhalten sich nach außen wie die gepoolten MySQL-Verbindungen aus
+db_connector: cursor() versteht %s-Platzhalter, close() gibt die Verbindung nur frei.
+Jeder Thread behält seine eigene, dauerhaft geöffnete Verbindung (sqlite3-Verbindungen
+sind nicht für parallele Nutzung gedacht), im WAL-Modus lesen sie parallel zum Schreiber.
+Kompilierte Anweisungen hält sqlite3 je Verbindung im Statement-Cache vor.
+"""
+import sqlite3
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+
+from db_dialect import BACKEND_SQLITE
+
+# Sekunden, die auf eine gesperrte Datenbank gewartet wird
+BUSY_TIMEOUT = 10
+STATEMENT_CACHE = 256
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",       # Leser blockieren den Schreiber nicht
+    "PRAGMA synchronous=NORMAL",     # im WAL-Modus sicher bei Programmabsturz, fsync nur beim Checkpoint
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",      # 16 MB Seiten-Cache je Verbindung
+    "PRAGMA mmap_size=134217728",    # 128 MB Memory-Mapping für Lesezugriffe
+]
+
+
+def _parse_timestamp(raw):
+    value = raw.decode('utf-8')
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return value
+
+
+# Zeitstempel wie bei MySQL als datetime zurückgeben; gespeichert wird ISO-Text, der sich korrekt sortiert
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(" "))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_converter("TIMESTAMP", _parse_timestamp)
+
+
+@lru_cache(maxsize=512)
+def _translate(sql):
+    """Übersetzt die %s-Platzhalter von mysql.connector in die ?-Platzhalter von sqlite3."""
+    return sql.replace("%s", "?")
+
+
+class SQLiteCursor:
+    """Cursor mit der Schnittstelle, die db_connector von mysql.connector-Cursorn nutzt."""
+
+    def __init__(self, connection, cursor):
+        self.connection = connection
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(_translate(sql), tuple(params))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(_translate(sql), seq_of_params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Hülle um die Thread-Verbindung; close() rollt nur offene Transaktionen zurück."""
+
+    dialect = BACKEND_SQLITE
+
+    def __init__(self, cnx, path):
+        self._cnx = cnx
+        self.path = path
+
+    def cursor(self, **kwargs):
+        # buffered/dictionary aus der mysql.connector-API haben hier keine Bedeutung
+        return SQLiteCursor(self, self._cnx.cursor())
+
+    def commit(self):
+        self._cnx.commit()
+
+    def rollback(self):
+        self._cnx.rollback()
+
+    @property
+    def in_transaction(self):
+        return self._cnx.in_transaction
+
+    def close(self):
+        if self._cnx.in_transaction:
+            self._cnx.rollback()
+
+    def discard(self):
+        """Schließt die Verbindung dieses Threads endgültig; der nächste Zugriff öffnet eine neue."""
+        _forget(self._cnx)
+        self._cnx.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_LOCAL = threading.local()
+_OPEN = set()
+_OPEN_LOCK = threading.Lock()
+# Wird von close_all() erhöht; Thread-Verbindungen einer älteren Generation sind geschlossen
+_GENERATION = 0
+
+
+def _forget(cnx):
+    with _OPEN_LOCK:
+        _OPEN.discard(cnx)
+    conns = getattr(_LOCAL, 'connections', {})
+    for path, (_, c) in list(conns.items()):
+        if c is cnx:
+            del conns[path]
+
+
+def connect(path):
+    """Liefert die Verbindung dieses Threads zur Datei `path` (wird beim ersten Zugriff geöffnet)."""
+    conns = getattr(_LOCAL, 'connections', None)
+    if conns is None:
+        conns = _LOCAL.connections = {}
+    generation, cnx = conns.get(path, (None, None))
+    if cnx is None or generation != _GENERATION:
+        cnx = sqlite3.connect(path, timeout=BUSY_TIMEOUT, detect_types=sqlite3.PARSE_DECLTYPES,
+                              check_same_thread=False, cached_statements=STATEMENT_CACHE)
+        for pragma in PRAGMAS:
+            cnx.execute(pragma)
+        conns[path] = (_GENERATION, cnx)
+        with _OPEN_LOCK:
+            _OPEN.add(cnx)
+    return SQLiteConnection(cnx, path)
+
+
+def close_all():
+    """Schließt alle offenen SQLite-Verbindungen aller Threads."""
+    global _GENERATION
+    with _OPEN_LOCK:
+        _GENERATION += 1
+        offene = list(_OPEN)
+        _OPEN.clear()
+    for cnx in offene:
+        try:
+            cnx.close()
+        except sqlite3.Error:
+            pass
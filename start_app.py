@@ -1,8 +1,13 @@
+# Als Erstes importiert: Nullpunkt für die Messung "Start bis Fenster" (--profile-startup)
+from startup_profile import STARTUP
 import sys
 import subprocess
 import tkinter as tk
 from tkinter import messagebox
 import os
+import json
+import importlib.util
+from importlib import metadata
 
 # Konfiguration der benötigten Bibliotheken
 # Format: (Modulname für import, Name für pip, Kurzbeschreibung)
@@ -13,6 +18,47 @@ REQUIRED_PACKAGES = [
     ("rich", "rich", "fuer schoene Konsolenausgaben")
 ]
 
+# Merkt sich eine erfolgreiche Prüfung; passt der Schlüssel, entfällt die Prüfung beim nächsten Start
+STAMP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".preflight_ok")
+
+def _stamp_key():
+    """Interpreter plus installierte Versionen aller benötigten Distributionen (ohne sie zu importieren)."""
+    versions = {}
+    for _, pip_name, _ in REQUIRED_PACKAGES:
+        try:
+            versions[pip_name] = metadata.version(pip_name)
+        except metadata.PackageNotFoundError:
+            versions[pip_name] = None
+    return {"python": sys.executable, "version": sys.version, "pakete": versions}
+
+def _stamp_valid(key):
+    try:
+        with open(STAMP_FILE, encoding="utf-8") as f:
+            return json.load(f) == key
+    except (OSError, ValueError):
+        return False
+
+def _write_stamp(key):
+    try:
+        with open(STAMP_FILE, "w", encoding="utf-8") as f:
+            json.dump(key, f)
+    except OSError:
+        pass
+
+def invalidate_stamp():
+    """Erzwingt beim nächsten Start eine vollständige Prüfung."""
+    try:
+        os.remove(STAMP_FILE)
+    except OSError:
+        pass
+
+def _module_available(import_name):
+    # find_spec sucht das Modul nur, ohne es zu laden (pandas & Co. kosten sonst Sekunden)
+    try:
+        return importlib.util.find_spec(import_name) is not None
+    except (ImportError, ValueError):
+        return False
+
 def ensure_pip():
     """Stellt sicher, dass pip aktuell ist, bevor Pakete installiert werden."""
     try:
@@ -31,61 +77,58 @@ def ensure_pip():
 
 def check_and_install_packages():
     """Prüft Abhängigkeiten einzeln und installiert sie bei Bedarf grafisch."""
-    # Unsichtbares Tkinter-Hauptfenster für Dialoge
+    key = _stamp_key()
+    if None not in key["pakete"].values() and _stamp_valid(key):
+        print("✅ Abhaengigkeiten unveraendert seit der letzten Pruefung.")
+        return True
+
+    missing = []
+    for import_name, pip_name, description in REQUIRED_PACKAGES:
+        if _module_available(import_name):
+            print(f"✅ Modul vorhanden: {import_name}")
+        else:
+            print(f"❌ Modul fehlt: {import_name}")
+            missing.append((import_name, pip_name, description))
+
+    if not missing:
+        _write_stamp(key)
+        return True
+
+    # Unsichtbares Tkinter-Hauptfenster für Dialoge (nur, wenn wirklich etwas fehlt)
     root = tk.Tk()
     root.withdraw()
     
     all_ready = True
 
-    for import_name, pip_name, description in REQUIRED_PACKAGES:
-        try:
-            # Gründliche Einzelprüfung: Versucht das Modul wirklich zu laden
-            if import_name == "pandas":
-                import pandas as pd
-                # Kleiner Funktionstest für Pandas
-                pd.DataFrame()
-            elif import_name == "PIL":
-                from PIL import Image, ImageTk
-            elif import_name == "rich":
-                import rich
-                from rich.console import Console
-                # Testet, ob die Hauptkomponente von Rich geladen werden kann
-                _ = Console()
-            else:
-                __import__(import_name)
-            
-            print(f"✅ Modul vorhanden und funktionsfaehig: {import_name}")
-        except (ImportError, ModuleNotFoundError, Exception):
-            print(f"❌ Modul fehlt oder ist defekt: {import_name}")
-            
-            # Grafische Abfrage beim Nutzer
-            is_linux = sys.platform.startswith('linux')
-            zusatz_info = "\n(Nutzt --break-system-packages unter Linux)" if is_linux else ""
-            
-            frage = (f"Die Bibliothek '{pip_name}' ({description}) fehlt.\n\n"
-                     f"Soll sie jetzt automatisch installiert werden?{zusatz_info}")
-            
-            if messagebox.askyesno("Abhängigkeit installieren", frage):
-                try:
-                    # Pip vorbereiten
-                    ensure_pip()
-                    
-                    print(f"📥 Installiere {pip_name}...")
-                    # Installation über den aktuellen Python-Interpreter
-                    install_cmd = [sys.executable, "-m", "pip", "install", pip_name]
+    for import_name, pip_name, description in missing:
+        # Grafische Abfrage beim Nutzer
+        is_linux = sys.platform.startswith('linux')
+        zusatz_info = "\n(Nutzt --break-system-packages unter Linux)" if is_linux else ""
+        
+        frage = (f"Die Bibliothek '{pip_name}' ({description}) fehlt.\n\n"
+                 f"Soll sie jetzt automatisch installiert werden?{zusatz_info}")
+        
+        if messagebox.askyesno("Abhängigkeit installieren", frage):
+            try:
+                # Pip vorbereiten
+                ensure_pip()
+                
+                print(f"📥 Installiere {pip_name}...")
+                # Installation über den aktuellen Python-Interpreter
+                install_cmd = [sys.executable, "-m", "pip", "install", pip_name]
+                
+                # Fix für das 'externally-managed-environment' Problem unter Linux
+                if is_linux:
+                    install_cmd.append("--break-system-packages")
                     
-                    # Fix für das 'externally-managed-environment' Problem unter Linux
-                    if is_linux:
-                        install_cmd.append("--break-system-packages")
-                        
-                    subprocess.check_call(install_cmd)
-                    print(f"✅ {pip_name} erfolgreich installiert.")
-                except Exception as e:
-                    messagebox.showerror("Fehler", f"Installation von {pip_name} fehlgeschlagen:\n{e}")
-                    all_ready = False
-            else:
-                messagebox.showwarning("Warnung", f"Ohne {pip_name} wird die App wahrscheinlich abstuerzen.")
+                subprocess.check_call(install_cmd)
+                print(f"✅ {pip_name} erfolgreich installiert.")
+            except Exception as e:
+                messagebox.showerror("Fehler", f"Installation von {pip_name} fehlgeschlagen:\n{e}")
                 all_ready = False
+        else:
+            messagebox.showwarning("Warnung", f"Ohne {pip_name} wird die App wahrscheinlich abstuerzen.")
+            all_ready = False
 
     root.destroy()
     return all_ready
@@ -96,11 +139,13 @@ def start_main_app():
         print("🚀 Lade Pflanzenprotokoll-Oberflaeche...")
         # Hier wird deine eigentliche Datei importiert und gestartet
         import pflanzen_gui
-        app = pflanzen_gui.PflanzenApp()
-        app.mainloop()
+        # Kommandozeilenoptionen (z.B. --profile-startup) an die GUI durchreichen
+        pflanzen_gui.main(sys.argv[1:])
     except Exception as e:
         error_msg = f"Kritischer Fehler beim Starten von pflanzen_gui.py:\n{e}"
         print(error_msg)
+        # Evtl. ist eine Bibliothek defekt, obwohl sie gefunden wurde -> beim nächsten Start neu prüfen
+        invalidate_stamp()
         # Kurzes Notfall-Fenster für den Fehler
         temp_root = tk.Tk()
         temp_root.withdraw()
@@ -109,7 +154,9 @@ def start_main_app():
 
 if __name__ == "__main__":
     # Schritt 1: Jedes Paket einzeln prüfen
-    if check_and_install_packages():
+    ok = check_and_install_packages()
+    STARTUP.mark("Abhaengigkeiten pruefen")
+    if ok:
         # Schritt 2: Wenn alles okay ist, Haupt-App starten
         start_main_app()
     else:
@@ -0,0 +1,76 @@
+# startup_profile.py
+# -*- coding: utf-8 -*-
+"""
+Zeitmessung des Kaltstarts (Aufruf mit --profile-startup).
+
+Der Nullpunkt ist der Import dieses Moduls; es wird deshalb als erstes importiert.
+Die wenigen Marken werden immer erfasst (ein perf_counter() je Aufruf), damit auch
+Phasen vor dem Auswerten der Kommandozeile zählen. Ausgegeben wird nur nach enable().
+"""
+import time
+from contextlib import contextmanager
+
+# Zielzeit bis zum bedienbaren Fenster (ms), ausgelegt auf einen Raspberry Pi
+DEFAULT_BUDGET_MS = 3000
+
+
+class StartupProfiler:
+    """Sammelt Phasendauern und gibt sie einmalig als Tabelle aus."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self._last = self.t0
+        self.enabled = False
+        self.budget_ms = DEFAULT_BUDGET_MS
+        self.phases = []
+        self.interactive_ms = None
+        self._reported = False
+
+    def enable(self, budget_ms=DEFAULT_BUDGET_MS):
+        self.enabled = True
+        self.budget_ms = budget_ms
+
+    def mark(self, name):
+        """Schließt eine Phase ab: Dauer ist die Zeit seit der vorherigen Marke."""
+        now = time.perf_counter()
+        self.phases.append((name, (now - self._last) * 1000))
+        self._last = now
+
+    @contextmanager
+    def phase(self, name):
+        """Misst genau den umschlossenen Block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last = time.perf_counter()
+            self.phases.append((name, (self._last - start) * 1000))
+
+    def add(self, name, ms):
+        """Trägt eine anderswo gemessene Dauer ein (z.B. Hintergrundaufgaben)."""
+        self.phases.append((name, ms))
+
+    def interactive(self):
+        """Markiert den Zeitpunkt, ab dem das Fenster bedienbar ist (nur der erste Aufruf zählt)."""
+        if self.interactive_ms is None:
+            self.interactive_ms = (time.perf_counter() - self.t0) * 1000
+
+    def report(self):
+        """Gibt die Aufschlüsselung aus. Gibt False zurück, wenn das Budget überschritten wurde."""
+        if not self.enabled or self._reported:
+            return True
+        self._reported = True
+        print("\n⏱️ Startprofil")
+        for name, ms in self.phases:
+            print(f"   {name:<40}{ms:>9.1f} ms")
+        gesamt = (time.perf_counter() - self.t0) * 1000
+        bedienbar = self.interactive_ms if self.interactive_ms is not None else gesamt
+        ok = bedienbar <= self.budget_ms
+        print(f"   {'Bis bedienbar':<40}{bedienbar:>9.1f} ms  (Budget {self.budget_ms} ms) "
+              f"{'✅' if ok else '⚠️ Budget überschritten'}")
+        print(f"   {'Gesamt inkl. Hintergrundaufgaben':<40}{gesamt:>9.1f} ms\n")
+        return ok
+
+
+# Gemeinsame Instanz für den ganzen Prozess
+STARTUP = StartupProfiler()
@@ -0,0 +1,133 @@
+# synthetic_data.py
+# -*- coding: utf-8 -*-
+"""
+Generator für realistische, reproduzierbare Testdaten (Grows mit Plan und Tagesmessungen).
+
+Ein Grow ist eine Sorte über 1–20 Wochen. Die Wochen sind anteilig den Phasen
+Anzucht, Wachstum, Blüte und Spülen zugeordnet; Lichtzyklus, Düngermengen (Biobizz-
+Schema), pH und EC folgen der Phase. Für jeden Tag entsteht eine Messung, deren Werte
+um den Plan streuen, pH und EC driften zusätzlich langsam. Gleicher Seed, gleiche Daten.
+
+Aufruf von der Kommandozeile (schreibt ';'-getrennte CSV, importierbar über data_importer):
+    python synthetic_data.py testdaten.csv --rows 100000 [--seed 42]
+"""
+import argparse
+import csv
+import random
+import sys
+from datetime import datetime, timedelta
+
+from db_connector import PROTOKOLL_INSERT_COLUMNS
+
+# Wie FIELD_OPTIONS["phase"] in pflanzen_gui
+PHASEN = ["Anzucht", "Wachstum", "Blüte", "Spülen"]
+
+SORTEN = [
+    "Amnesia Haze", "Blue Dream", "Critical", "Gorilla Glue", "Northern Lights", "White Widow",
+    "Tomate Harzfeuer", "Tomate Ochsenherz", "Paprika Yolo", "Chili Habanero", "Gurke Dorninger",
+    "Basilikum Genovese", "Erdbeere Senga", "Zucchini Black Beauty", "Salat Lollo Rosso",
+]
+
+# Plan-Richtwerte je Phase: (Licht h, Root Juice, CalMag, Bio Grow, Fish Mix, Bio Heaven,
+# Acti Alc, Bio Bloom, Top Max, pH, EC); Dünger in ml/L
+PHASEN_PLAN = {
+    "Anzucht":  (18, 4.0, 0.5, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 6.2, 0.4),
+    "Wachstum": (18, 0.0, 1.0, 2.0, 1.0, 2.0, 1.0, 0.0, 0.0, 6.2, 1.2),
+    "Blüte":    (12, 0.0, 1.0, 1.0, 0.0, 4.0, 2.0, 3.0, 2.0, 6.3, 1.6),
+    "Spülen":   (12, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 6.4, 0.2),
+}
+
+# Streuung der Messwerte um den Plan (Dünger relativ, pH/EC absolut)
+DUENGER_STREUUNG = 0.1
+PH_STREUUNG = 0.15
+EC_STREUUNG = 0.08
+MAX_WOCHEN = 20
+
+
+def phase_for_week(woche, wochen):
+    """Phase einer Woche: 15 % Anzucht, bis 45 % Wachstum, bis 90 % Blüte, Rest Spülen."""
+    anteil = (woche - 0.5) / wochen
+    if anteil < 0.15:
+        return PHASEN[0]
+    if anteil < 0.45:
+        return PHASEN[1]
+    if anteil < 0.9:
+        return PHASEN[2]
+    return PHASEN[3]
+
+
+def plan_row(sorte, woche, wochen):
+    """Plan-Datensatz (Spalten wie db_connector.PLAN_COLUMNS)."""
+    phase = phase_for_week(woche, wochen)
+    return (sorte, woche, phase) + PHASEN_PLAN[phase]
+
+
+def generate_grows(seed=42, start=None):
+    """
+    Endloser Strom von Grows: [(sorte, wochen, plan_zeilen, mess_zeilen), ...].
+    Messzeilen haben die Spaltenreihenfolge von PROTOKOLL_INSERT_COLUMNS.
+    """
+    rnd = random.Random(seed)
+    beginn = start or datetime(2020, 1, 1, 8, 0)
+    nummer = 0
+    while True:
+        nummer += 1
+        # Jede Sorte wird mehrfach angebaut; der Durchgang macht den Namen eindeutig
+        sorte = f"{rnd.choice(SORTEN)} #{nummer}"
+        wochen = rnd.randint(1, MAX_WOCHEN)
+        plaene = [plan_row(sorte, w, wochen) for w in range(1, wochen + 1)]
+        messungen = []
+        ph_drift = ec_drift = 0.0
+        tag0 = beginn + timedelta(days=rnd.randint(0, 5 * 365))
+        for woche, plan in enumerate(plaene, start=1):
+            licht, *duenger, ph, ec = plan[3:]
+            for tag in range(7):
+                ph_drift += rnd.gauss(0, 0.02)
+                ec_drift += rnd.gauss(0, 0.01)
+                werte = [round(max(0.0, d * rnd.gauss(1, DUENGER_STREUUNG)), 2) for d in duenger]
+                zeitpunkt = tag0 + timedelta(days=(woche - 1) * 7 + tag, minutes=rnd.randint(0, 600))
+                messungen.append(
+                    (sorte, woche, plan[2], licht, *werte,
+                     round(ph + ph_drift + rnd.gauss(0, PH_STREUUNG), 2),
+                     round(max(0.0, ec + ec_drift + rnd.gauss(0, EC_STREUUNG)), 2),
+                     zeitpunkt)
+                )
+        yield sorte, wochen, plaene, messungen
+
+
+def generate_dataset(rows, seed=42):
+    """Erzeugt Grows, bis `rows` Messungen erreicht sind. Gibt (plaene, messungen-Generator) zurück."""
+    plaene = []
+
+    def _messungen():
+        erzeugt = 0
+        for _, _, grow_plaene, messungen in generate_grows(seed):
+            plaene.extend(grow_plaene)
+            for zeile in messungen[:rows - erzeugt]:
+                yield zeile
+            erzeugt = min(rows, erzeugt + len(messungen))
+            if erzeugt >= rows:
+                return
+
+    # plaene füllt sich beim Durchlaufen der Messungen
+    return plaene, _messungen()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetische Grow-Daten als CSV erzeugen.")
+    parser.add_argument("datei", help="Zieldatei (CSV, ';'-getrennt)")
+    parser.add_argument("--rows", type=int, default=10000, help="Anzahl Messungen")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    plaene, messungen = generate_dataset(max(1, args.rows), args.seed)
+    with open(args.datei, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(PROTOKOLL_INSERT_COLUMNS)
+        writer.writerows(messungen)
+    print(f"✅ {args.rows} Messungen aus {len({p[0] for p in plaene})} Grows geschrieben: {args.datei}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
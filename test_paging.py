@@ -0,0 +1,110 @@
+# test_paging.py
+# -*- coding: utf-8 -*-
+"""
+Keyset-Pagination der Datenansicht auf dem SQLite-Backend.
+
+Aufruf: python -m pytest -q test_paging.py
+"""
+from datetime import date, datetime
+
+import pytest
+
+from db_connector import (
+    build_protokoll_query,
+    close_all_pools,
+    fetch_data_page,
+    get_db_connection,
+    initialize_database,
+    insert_pflanzen_data,
+    insert_pflanzen_data_many,
+    PROTOKOLL_INSERT_COLUMNS,
+)
+from db_migrations import PROTOKOLL_TABLE_NAME, _sqlite_011_datum_einheitlich
+
+
+@pytest.fixture
+def config(tmp_path):
+    cfg = {'storage_backend': 'sqlite', 'storage_sqlite_path': str(tmp_path / 'pflanzen.db'), 'database': 'pflanzen'}
+    ok, msg = initialize_database(cfg)
+    assert ok, msg
+    yield cfg
+    close_all_pools()
+
+
+def _datensatz(name, datum):
+    werte = dict.fromkeys(PROTOKOLL_INSERT_COLUMNS)
+    werte.update(pflanzen_name=name, woche=1, phase="Wachstum", lichtzyklus_h=18, erstellungsdatum=datum)
+    return tuple(werte[c] for c in PROTOKOLL_INSERT_COLUMNS)
+
+
+def _alle_seiten(config, limit=3):
+    """Blättert vorwärts durch die Datenansicht und gibt die ids in Anzeigereihenfolge zurück."""
+    ids, after = [], None
+    for _ in range(100):
+        rows, columns = fetch_data_page(config, after=after, limit=limit)
+        assert rows is not None, columns
+        if not rows:
+            return ids
+        ids += [row[columns.index('id')] for row in rows]
+        letzte = rows[-1]
+        after = (letzte[columns.index('erstellungsdatum')], letzte[columns.index('id')])
+    pytest.fail("Pagination endet nicht")
+
+
+def test_gleicher_zeitstempel(config):
+    cnx, _ = get_db_connection(config)
+    ok, anzahl = insert_pflanzen_data_many(cnx, [_datensatz("A", datetime(2024, 3, 1, 12, 0))] * 7)
+    cnx.close()
+    assert ok and anzahl == 7
+    assert _alle_seiten(config) == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_nur_datum_und_zeitstempel_gemischt(config):
+    for datum in ["2024-03-01", datetime(2024, 3, 1, 9, 30), "01.03.2024", "2024-03-01", datetime(2024, 3, 2, 8, 0),
+                  "2024-03-01", datetime(2024, 2, 28, 23, 0)]:
+        cnx, _ = get_db_connection(config)
+        ok, msg = insert_pflanzen_data(cnx, _datensatz("B", datum))
+        cnx.close()
+        assert ok, msg
+    # Neueste zuerst, bei gleichem Zeitstempel (Mitternacht am 1.3.) die höhere id zuerst
+    assert _alle_seiten(config) == [5, 2, 6, 4, 3, 1, 7]
+
+
+def test_ungueltiges_datum_wird_abgelehnt(config):
+    cnx, _ = get_db_connection(config)
+    ok, msg = insert_pflanzen_data(cnx, _datensatz("C", "1.3."))
+    cnx.close()
+    assert not ok and "Ungültiges Datum" in msg
+
+
+def test_migration_vereinheitlicht_alte_werte(config):
+    cnx, _ = get_db_connection(config)
+    cursor = cnx.cursor()
+    cursor.executemany(f"INSERT INTO {PROTOKOLL_TABLE_NAME} (pflanzen_name, woche, erstellungsdatum) VALUES (%s, %s, %s)",
+                       [("D", 1, "2024-03-01"), ("D", 1, "2024-03-01 08:00:00"), ("D", 1, "2024-03-01")])
+    _sqlite_011_datum_einheitlich(cursor)
+    cnx.commit()
+    cursor.execute(f"SELECT CAST(erstellungsdatum AS TEXT) FROM {PROTOKOLL_TABLE_NAME} ORDER BY id")
+    assert [row[0] for row in cursor.fetchall()] == ["2024-03-01 00:00:00", "2024-03-01 08:00:00", "2024-03-01 00:00:00"]
+    cursor.close()
+    cnx.close()
+    assert _alle_seiten(config) == [2, 3, 1]
+
+
+@pytest.mark.parametrize("filters, after", [
+    (None, None),
+    (None, (datetime(2024, 3, 1, 12, 0), 5)),
+    ({'datum_von': date(2024, 1, 1)}, None),
+    ({'datum_von': date(2024, 1, 1), 'datum_bis': date(2024, 6, 30)}, (datetime(2024, 3, 1, 12, 0), 5)),
+])
+def test_seiten_ohne_sortierung_im_speicher(config, filters, after):
+    # Ohne ANALYZE-Statistik, wie in einer frischen Installation: die Seite muss über einen Index
+    # in Sortierreihenfolge gelesen werden statt den ganzen Bestand je Seite zu sortieren
+    query, params = build_protokoll_query(filters, after=after)
+    cnx, _ = get_db_connection(config)
+    cursor = cnx.cursor()
+    cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+    plan = [row[3] for row in cursor.fetchall()]
+    cursor.close()
+    cnx.close()
+    assert not any("TEMP B-TREE" in schritt for schritt in plan), plan
@@ -0,0 +1,134 @@
+# timeseries.py
+# -*- coding: utf-8 -*-
+"""
+Zeitreihen einer Pflanze für das Verlaufsdiagramm.
+
+Die Datenbank fasst die Messungen des sichtbaren Zeitraums zu Zeitfenstern zusammen
+(db_connector.fetch_zeitreihe), etwa OVERSAMPLING Fenster je Pixel Diagrammbreite.
+Daraus wählt LTTB (Largest Triangle Three Buckets) so viele Punkte aus, wie das Diagramm
+Pixel breit ist; Spitzen und Knicke bleiben dabei erhalten. Minimum und Maximum werden
+für dieselben Abschnitte zu einem Band zusammengefasst. Beim Zoomen und Verschieben wird
+nur der sichtbare Bereich neu geladen.
+
+Zeiten sind Sekunden seit 1970-01-01 ohne Zeitzone, wie sie in der Datenbank stehen.
+"""
+import time
+from datetime import datetime, timedelta
+
+from db_connector import fetch_zeitreihe, fetch_zeitraum
+
+EPOCH = datetime(1970, 1, 1)
+
+# Zeitfenster je Pixel, aus denen LTTB auswählt
+OVERSAMPLING = 4
+# Kleinste Fensterbreite (s); darunter liegt ohnehin höchstens eine Messung je Fenster
+MIN_WINDOW_S = 60
+
+
+def to_seconds(value):
+    return (value - EPOCH).total_seconds()
+
+
+def from_seconds(seconds):
+    return EPOCH + timedelta(seconds=seconds)
+
+
+def _buckets(length, n):
+    """Abschnitte [(start, ende), ...] wie bei LTTB: erster und letzter Punkt allein, dazwischen n-2 gleich große."""
+    teil = (length - 2) / (n - 2)
+    grenzen = [(0, 1)]
+    grenzen += [(int(j * teil) + 1, int((j + 1) * teil) + 1) for j in range(n - 2)]
+    grenzen.append((length - 1, length))
+    return grenzen
+
+
+def lttb(xs, ys, n):
+    """Indizes der `n` von LTTB ausgewählten Punkte; bei höchstens `n` Punkten alle."""
+    length = len(xs)
+    if n >= length or n < 3:
+        return list(range(length))
+    grenzen = _buckets(length, n)
+    auswahl = [0]
+    a = 0
+    for j in range(1, n - 1):
+        start, ende = grenzen[j]
+        n_start, n_ende = grenzen[j + 1]
+        # Dritte Dreiecksecke: Schwerpunkt des nächsten Abschnitts
+        anzahl = n_ende - n_start
+        cx = sum(xs[n_start:n_ende]) / anzahl
+        cy = sum(ys[n_start:n_ende]) / anzahl
+        ax, ay = xs[a], ys[a]
+        beste, beste_flaeche = start, -1.0
+        for i in range(start, ende):
+            flaeche = abs((ax - cx) * (ys[i] - ay) - (ax - xs[i]) * (cy - ay))
+            if flaeche > beste_flaeche:
+                beste, beste_flaeche = i, flaeche
+        auswahl.append(beste)
+        a = beste
+    auswahl.append(length - 1)
+    return auswahl
+
+
+def _steps(punkte):
+    """Reduziert eine Stufenfunktion [(x, y), ...] auf den Beginn jeder Stufe und den letzten Punkt."""
+    stufen = [p for i, p in enumerate(punkte) if i == 0 or p[1] != punkte[i - 1][1]]
+    if punkte and stufen[-1] is not punkte[-1]:
+        stufen.append(punkte[-1])
+    return stufen
+
+
+def build_series(rows, columns, fields, points):
+    """
+    Bereitet das Ergebnis von fetch_zeitreihe für das Diagramm auf: je Feld
+    {'x', 'y', 'min', 'max'} mit höchstens `points` Punkten und 'soll' als Stufen [(x, y), ...].
+    """
+    idx = {c: i for i, c in enumerate(columns)}
+    zi = idx['zeit']
+    serien = {}
+    for f in fields:
+        mi, lo, hi, si = idx[f"{f}_mittel"], idx[f"{f}_min"], idx[f"{f}_max"], idx[f"{f}_soll"]
+        werte = [r for r in rows if r[mi] is not None]
+        xs = [float(r[zi]) for r in werte]
+        ys = [float(r[mi]) for r in werte]
+        mins = [float(r[lo]) for r in werte]
+        maxs = [float(r[hi]) for r in werte]
+        auswahl = lttb(xs, ys, points)
+        if len(auswahl) < len(xs):
+            # Band über denselben Abschnitten, aus denen LTTB je einen Punkt gewählt hat
+            grenzen = _buckets(len(xs), points)
+            mins = [min(mins[a:b]) for a, b in grenzen]
+            maxs = [max(maxs[a:b]) for a, b in grenzen]
+            xs = [xs[i] for i in auswahl]
+            ys = [ys[i] for i in auswahl]
+        soll = _steps([(float(r[zi]), float(r[si])) for r in rows if r[si] is not None])
+        serien[f] = {'x': xs, 'y': ys, 'min': mins, 'max': maxs, 'soll': soll}
+    return serien
+
+
+def load_series(config, plant_name, fields, von=None, bis=None, points=800, archiv=False):
+    """
+    Lädt die Zeitreihen von `fields` einer Pflanze zwischen von und bis (Sekunden; ohne Angabe
+    der ganze Verlauf) für ein Diagramm mit `points` Pixeln Breite; mit `archiv` samt Archiv.
+    Gibt (True, {'von', 'bis', 'serien', 'info'}) oder (False, Fehlermeldung) zurück.
+    """
+    start = time.perf_counter()
+    if von is None or bis is None:
+        erste, letzte = fetch_zeitraum(config, plant_name, archiv)
+        if erste is None:
+            return False, f"Keine Messungen für {plant_name} gefunden."
+        von_dt, bis_dt = erste, letzte + timedelta(seconds=1)
+    else:
+        von_dt, bis_dt = from_seconds(von), from_seconds(bis)
+    points = max(3, int(points))
+    fenster_s = max(MIN_WINDOW_S, (bis_dt - von_dt).total_seconds() / (points * OVERSAMPLING))
+    rows, columns = fetch_zeitreihe(config, plant_name, fields, von_dt, bis_dt, fenster_s, archiv)
+    if rows is None:
+        return False, columns
+    geladen = time.perf_counter()
+
+    serien = build_series(rows, columns, fields, points)
+    ende = time.perf_counter()
+    messungen = sum(r[columns.index('anzahl')] for r in rows)
+    info = (f"{messungen} Messungen in {len(rows)} Zeitfenstern "
+            f"(Abfrage {(geladen - start) * 1000:.0f} ms, Aufbereitung {(ende - geladen) * 1000:.0f} ms)")
+    return True, {'von': to_seconds(von_dt), 'bis': to_seconds(bis_dt), 'serien': serien, 'info': info}
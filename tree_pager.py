@@ -0,0 +1,287 @@
+# tree_pager.py
+# -*- coding: utf-8 -*-
+"""
+Virtualisierte Anzeige großer Tabellen in einem ttk.Treeview.
+
+Im Treeview liegen immer nur wenige Seiten rund um den sichtbaren Bereich.
+Nähert sich die Scrollposition dem Ende des geladenen Fensters, wird die nächste
+Seite per Keyset-Pagination nachgeladen und am anderen Ende eine Seite verworfen.
+Speicherbedarf und Ladezeit bleiben dadurch unabhängig von der Tabellengröße.
+"""
+from collections import deque
+
+import tkinter as tk
+
+
+def run_inline(fn, on_done, key=None):
+    """Standard-Runner: führt die Abfrage direkt (synchron) aus."""
+    on_done(fn())
+
+
+class TreePager:
+    """
+    Hält ein Fenster aus höchstens `max_pages` Seiten im Treeview.
+
+    fetch_page(after=None, before=None, limit=..., sort=(spalte, absteigend)) muss
+    (rows, column_names) oder (None, Fehlermeldung) liefern, sortiert nach (spalte, id),
+    wie db_connector.fetch_data_page. Die Item-IDs im Treeview sind die Datensatz-IDs.
+
+    runner(fn, on_done, key) führt die Abfrage aus und übergibt ihr Ergebnis an on_done.
+    Mit einem DbExecutor laufen Seitenabrufe im Hintergrund; Antworten einer durch
+    reset() überholten Anfrage werden verworfen.
+    """
+
+    # Anteil des geladenen Fensters, ab dem vor dem Rand nachgeladen wird
+    PREFETCH_THRESHOLD = 0.15
+
+    def __init__(self, tree, scrollbar, fetch_page, page_size=200, max_pages=5, on_columns=None, on_error=None,
+                 runner=run_inline, sort=("erstellungsdatum", True)):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.on_columns = on_columns
+        self.on_error = on_error
+        self.runner = runner
+        self.sort_column, self.descending = sort
+
+        self.columns = []
+        self.pages = deque()
+        self.at_start = True
+        self.at_end = True
+        self._loading = False
+        self._generation = 0
+
+        self.tree.configure(yscrollcommand=self._on_yscroll)
+
+    # --- Hilfsfunktionen ------------------------------------------------------
+
+    def _key(self, row):
+        return row[self._sort_idx], row[self._id_idx]
+
+    def _precedes(self, a, b):
+        """True, wenn Schlüssel a in der Anzeige vor b steht (NULL gilt wie in SQL als kleinster Wert)."""
+        if a == b:
+            return False
+        (wert_a, id_a), (wert_b, id_b) = a, b
+        if wert_a == wert_b:
+            kleiner = id_a < id_b
+        elif wert_a is None or wert_b is None:
+            kleiner = wert_a is None
+        else:
+            kleiner = wert_a < wert_b
+        return kleiner != self.descending
+
+    def set_sort(self, column, descending):
+        """Neue Sortierung; wirksam mit dem nächsten reset()."""
+        self.sort_column, self.descending = column, descending
+        if self.columns:
+            self._sort_idx = self.columns.index(column)
+
+    def _request(self, apply, **kwargs):
+        """Fordert eine Seite an und ruft apply(rows) auf, sofern die Antwort noch aktuell ist."""
+        generation = self._generation
+        self._loading = True
+
+        sort = (self.sort_column, self.descending)
+
+        def _fetch():
+            # Ausnahmen als Fehlermeldung zurückgeben: nur _done setzt _loading zurück,
+            # sonst bliebe das Nachladen bis zum nächsten reset() gesperrt
+            try:
+                return self.fetch_page(limit=self.page_size, sort=sort, **kwargs)
+            except Exception as e:
+                return None, str(e)
+
+        def _done(result):
+            if generation != self._generation:
+                return
+            self._loading = False
+            rows, info = result
+            if rows is None:
+                if self.on_error:
+                    self.on_error(info)
+                return
+            if info != self.columns:
+                self.columns = info
+                self._id_idx = info.index('id')
+                self._sort_idx = info.index(self.sort_column)
+                if self.on_columns:
+                    self.on_columns(info)
+            apply(rows)
+
+        # Gemeinsamer Schlüssel: eine neue Anfrage (z.B. durch reset) storniert die laufende
+        self.runner(_fetch, _done, f"tree_pager_{id(self)}")
+
+    def _top_index(self):
+        total = len(self.tree.get_children())
+        return int(round(self.tree.yview()[0] * total)) if total else 0
+
+    def _restore_top(self, index):
+        total = len(self.tree.get_children())
+        if total:
+            self.tree.yview_moveto(max(0, index) / total)
+
+    def _drop_first_page(self):
+        for row in self.pages.popleft():
+            self.tree.delete(str(row[self._id_idx]))
+        self.at_start = False
+
+    def _drop_last_page(self):
+        for row in self.pages.pop():
+            self.tree.delete(str(row[self._id_idx]))
+        self.at_end = False
+
+    # --- Öffentliche Schnittstelle --------------------------------------------
+
+    @property
+    def loaded_rows(self):
+        """Anzahl der aktuell im Treeview materialisierten Zeilen."""
+        return sum(len(p) for p in self.pages)
+
+    def reset(self):
+        """Verwirft das Fenster und lädt die neueste Seite."""
+        self._generation += 1
+
+        def _apply(rows):
+            self.tree.delete(*self.tree.get_children())
+            self.pages.clear()
+            for row in rows:
+                self.tree.insert("", tk.END, iid=str(row[self._id_idx]), values=row)
+            self.pages.append(list(rows))
+            self.at_start = True
+            self.at_end = len(rows) < self.page_size
+            self.tree.yview_moveto(0)
+
+        self._request(_apply)
+
+    def load_older(self):
+        """Hängt die nächst ältere Seite unten an und verwirft bei Bedarf die oberste."""
+        last = self._last_key()
+        if self._loading or self.at_end or last is None:
+            return
+
+        def _apply(rows):
+            if not rows:
+                self.at_end = True
+                return
+            top = self._top_index()
+            for row in rows:
+                self.tree.insert("", tk.END, iid=str(row[self._id_idx]), values=row)
+            self.pages.append(list(rows))
+            self.at_end = len(rows) < self.page_size
+            if len(self.pages) > self.max_pages:
+                top -= len(self.pages[0])
+                self._drop_first_page()
+            self._restore_top(top)
+
+        self._request(_apply, after=last)
+
+    def load_newer(self):
+        """Fügt die direkt neuere Seite oben ein und verwirft bei Bedarf die unterste."""
+        first = self._first_key()
+        if self._loading or self.at_start or first is None:
+            return
+
+        def _apply(rows):
+            if not rows:
+                self.at_start = True
+                return
+            top = self._top_index()
+            for pos, row in enumerate(rows):
+                self.tree.insert("", pos, iid=str(row[self._id_idx]), values=row)
+            self.pages.appendleft(list(rows))
+            self.at_start = len(rows) < self.page_size
+            if len(self.pages) > self.max_pages:
+                self._drop_last_page()
+            self._restore_top(top + len(rows))
+
+        self._request(_apply, before=first)
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._loading:
+            return
+        if float(last) >= 1 - self.PREFETCH_THRESHOLD and not self.at_end:
+            self.load_older()
+        elif float(first) <= self.PREFETCH_THRESHOLD and not self.at_start:
+            self.load_newer()
+
+    def _first_key(self):
+        for page in self.pages:
+            if page:
+                return self._key(page[0])
+        return None
+
+    def _last_key(self):
+        for page in reversed(self.pages):
+            if page:
+                return self._key(page[-1])
+        return None
+
+    def _remove_row(self, iid):
+        for page in self.pages:
+            for i, row in enumerate(page):
+                if str(row[self._id_idx]) == iid:
+                    del page[i]
+                    self.tree.delete(iid)
+                    if not page and len(self.pages) > 1:
+                        self.pages.remove(page)
+                    return True
+        return False
+
+    def _insert_sorted(self, row):
+        """Sortiert eine Zeile an der richtigen Stelle ein, sofern sie ins geladene Fenster fällt."""
+        key = self._key(row)
+        first, last = self._first_key(), self._last_key()
+        if first is not None and not self.at_start and self._precedes(key, first):
+            return False
+        if last is not None and not self.at_end and self._precedes(last, key):
+            return False
+        pos = 0
+        for page in self.pages:
+            for i, other in enumerate(page):
+                if self._precedes(key, self._key(other)):
+                    page.insert(i, row)
+                    self.tree.insert("", pos, iid=str(row[self._id_idx]), values=row)
+                    return True
+                pos += 1
+        if not self.pages:
+            self.pages.append([])
+        self.pages[-1].append(row)
+        self.tree.insert("", tk.END, iid=str(row[self._id_idx]), values=row)
+        return True
+
+    def apply_changes(self, neu=(), geaendert=(), geloescht=()):
+        """
+        Patcht das geladene Fenster in-place statt es neu aufzubauen:
+        gelöschte Zeilen verschwinden, geänderte werden aktualisiert (bzw. bei geändertem
+        Sortierwert umsortiert), neue werden einsortiert, falls sie ins Fenster fallen.
+        Gibt die Anzahl der im Treeview betroffenen Zeilen zurück.
+        """
+        if not self.columns:
+            return 0
+        betroffen = 0
+        for rid in geloescht:
+            betroffen += self._remove_row(str(rid))
+        for row in list(geaendert) + list(neu):
+            iid = str(row[self._id_idx])
+            if self.tree.exists(iid):
+                alt = next(r for page in self.pages for r in page if str(r[self._id_idx]) == iid)
+                if self._key(alt) == self._key(row):
+                    self.tree.item(iid, values=row)
+                    for page in self.pages:
+                        for i, r in enumerate(page):
+                            if r is alt:
+                                page[i] = row
+                    betroffen += 1
+                    continue
+                self._remove_row(iid)
+            betroffen += self._insert_sorted(row)
+        return betroffen
+
+    def iter_rows(self):
+        """Alle aktuell geladenen Zeilen in Anzeigereihenfolge."""
+        for page in self.pages:
+            yield from page